@@ -0,0 +1,289 @@
+# Developed by Montassar Bellah Abdallah
+
+import copy
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import BATCH_MAX_CONCURRENCY, BATCH_SERPER_BUDGET, SEARCH_MODE, init_telemetry
+from checkpoint import RunCheckpoint
+from rate_limiter import RequestBudget
+from run_context import (RunContext, new_run_id, RUN_STARTED, ATTEMPT_STARTED, STAGE_STARTED, STAGE_COMPLETED,
+                         PAGE_PRUNED, PRODUCT_EXTRACTED, EXTRACTION_FAILED, WHOIS_COMPLETED, RUN_FINISHED)
+from run_store import prune_runs
+from url_utils import normalize_url, registrable_domain
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+# The agent stack, Crawl4AI and WHOIS are imported by run_batch, so the page bookkeeping loads without them
+
+
+class _CategoryRun:
+    """Run context, checkpoint, pages found and outcome of one category of a batch."""
+
+    def __init__(self, product_category: str, excluded_platforms_list: list, on_event=None):
+        self.product_category = product_category
+        self.run_id = new_run_id()
+        self.ctx = RunContext(product_category, excluded_platforms_list, run_id=self.run_id, on_event=on_event)
+        self.checkpoint = RunCheckpoint.load_or_create(self.run_id, product_category, excluded_platforms_list)
+        # Search results of every attempt, one per normalized URL, in the order they were found
+        self.found = {}
+        # As in run_analysis, only an attempt that found nothing usable makes the next one search deeper
+        self.widen_search = False
+        self.page_tokens = 0
+        self.extraction_input_tokens = 0
+        self.error = None
+        self.success = False
+
+
+class _PageUnion:
+    """Distinct pages found by the categories of a batch, each with the runs that found it."""
+
+    def __init__(self):
+        self.pages = {}
+
+    def add(self, run: _CategoryRun, results: list) -> list:
+        """Merge one run's search results; returns the normalized URLs the run has not found before."""
+        added = []
+        for result in results:
+            key = normalize_url(result.get("url", ""))
+            if key not in run.found or result.get("score", 0.0) > run.found[key].get("score", 0.0):
+                if key not in run.found:
+                    added.append(key)
+                run.found[key] = result
+            page = self.pages.setdefault(key, {"result": result, "runs": {}})
+            if result.get("score", 0.0) > page["result"].get("score", 0.0):
+                page["result"] = result
+            page["runs"][run] = None  # Ordered set: a run is listed once however often it found the page
+        return added
+
+    def runs(self, url: str) -> list:
+        return list(self.pages.get(normalize_url(url), {}).get("runs", ()))
+
+    def shared(self, run: _CategoryRun = None) -> int:
+        """Pages found by more than one category (of those found by `run`, if given)."""
+        keys = run.found if run is not None else self.pages
+        return sum(1 for key in keys if len(self.pages[key]["runs"]) > 1)
+
+
+def _search_attempt(run: _CategoryRun, excluded_platforms_list: list, budget: dict, search_mode: str,
+                    serper_budget: RequestBudget, attempt: int):
+    """One queries and search attempt of a category."""
+    from main_crewai import attempt_inputs, queries_and_search_stage
+
+    token = run.ctx.activate()
+    try:
+        run.ctx.emit(ATTEMPT_STARTED, attempt=attempt, max_attempts=budget["max_attempts"])
+        inputs = attempt_inputs(run.product_category, excluded_platforms_list, budget, attempt)
+        queries_and_search_stage(run.ctx, run.checkpoint, inputs, search_mode, run.widen_search,
+                                 pages=attempt, serper_budget=serper_budget)
+        run.error = None
+        if not run.ctx.search_results:
+            run.error = "No search results"
+            run.widen_search = True
+    except Exception as e:
+        logger.error(f"Search failed for {run.product_category!r} on attempt {attempt}: {e}")
+        run.error = f"{type(e).__name__}: {e}"
+        run.ctx.set_search_results([])
+    finally:
+        run.ctx.deactivate(token)
+
+
+def run_batch(categories: list, excluded_platforms_list: list, search_mode: str = None, on_event=None,
+              max_workers: int = BATCH_MAX_CONCURRENCY, serper_budget: int = BATCH_SERPER_BUDGET,
+              max_attempts: int = None, score_threshold: float = None, max_search_results: int = None,
+              no_keywords: int = None) -> dict:
+    """
+    Analyze several categories together.
+
+    Query generation and search run concurrently per category, sharing the
+    Gemini rate limiter and one Serper request budget. The search results of
+    every category are then merged, so a page found by several categories is
+    scraped and WHOIS-enriched once; its product is attributed to each of
+    them, scored from that category's own search result. Each category still
+    gets its own run directory, so the dashboard can open any of them.
+
+    As in run_analysis, a category without any extracted product is retried
+    with a wider search (deeper result pages, lower threshold), up to
+    max_attempts; failed pages are scraped again. Unlike run_analysis, a
+    batch never falls back to the bundled demo data: such a category is
+    reported as failed.
+
+    Args:
+        categories: Product categories to analyze
+        excluded_platforms_list: Platforms excluded for every category
+        search_mode: Overrides config.SEARCH_MODE
+        on_event: Progress listener shared by the runs (events carry their run_id)
+        max_workers: Categories searched at once
+        serper_budget: Serper requests for the whole batch (0 = unlimited, cached answers are free)
+        max_attempts, score_threshold, max_search_results, no_keywords: Per-category search budget,
+            as for run_analysis
+
+    Returns:
+        dict: {"runs": one record per category, "stats": batch totals}
+    """
+    from main_crewai import make_budget
+    from web_scraping_agent.tools.crawl4ai_tool import Crawl4AIScrapeWebsiteTool
+    from whois_lookup import enrich_products_with_whois
+
+    init_telemetry()
+    search_mode = search_mode or SEARCH_MODE
+    budget = make_budget(max_attempts, score_threshold, max_search_results, no_keywords)
+    requests_budget = RequestBudget(serper_budget, name="serper-batch")
+    started = time.time()
+
+    categories = list(dict.fromkeys(c.strip() for c in categories if c.strip()))
+    runs = [_CategoryRun(category, excluded_platforms_list, on_event) for category in categories]
+    prune_runs(keep={run.run_id for run in runs})
+    for run in runs:
+        run.ctx.emit(RUN_STARTED, product_category=run.product_category,
+                     excluded_platforms_list=list(excluded_platforms_list or []), batch=True)
+
+    union = _PageUnion()
+    extracted = {}
+    scraped = 0
+    lookups = {}
+
+    def deliver(run, url, product=None, error=None):
+        if product is None:
+            run.checkpoint.record_url(url, error=error)
+            run.ctx.emit(EXTRACTION_FAILED, url=url, error=error)
+            return
+        attributed = _attribute(product, run.found[normalize_url(url)])
+        run.checkpoint.record_url(url, product=attributed)
+        run.ctx.emit(PRODUCT_EXTRACTED, url=url, product=dict(attributed))
+
+    def record(url, product=None, error=None):
+        if product is not None:
+            extracted[normalize_url(url)] = product
+        for run in union.runs(url):
+            deliver(run, url, product, error)
+
+    def pruned(url, raw_tokens, input_tokens):
+        for run in union.runs(url):
+            run.page_tokens += raw_tokens
+            run.extraction_input_tokens += input_tokens
+            run.ctx.emit(PAGE_PRUNED, url=url, raw_tokens=raw_tokens, input_tokens=input_tokens)
+
+    try:
+        for attempt in range(1, budget["max_attempts"] + 1):
+            active = [run for run in runs if not any(key in extracted for key in run.found)]
+            if not active:
+                break
+            if attempt > 1:
+                print(f"Batch attempt {attempt}: retrying {len(active)} categories without products")
+
+            # Stage 1: queries and search, concurrently per category
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="batch-search") as executor:
+                for future in [executor.submit(_search_attempt, run, excluded_platforms_list, budget, search_mode,
+                                               requests_budget, attempt) for run in active]:
+                    future.result()
+
+            # Pages scraped by an earlier attempt or another category are attributed without a new crawl
+            to_scrape = {}
+            for run in active:
+                for key in union.add(run, run.ctx.search_results):
+                    if key in extracted:
+                        deliver(run, run.found[key].get("url", ""), product=extracted[key])
+                for key in run.found:
+                    if key not in extracted:
+                        to_scrape[key] = union.pages[key]["result"]
+            print(f"Batch search: {sum(len(run.found) for run in runs)} results over {len(runs)} categories, "
+                  f"{len(union.pages)} distinct pages, {len(to_scrape)} to scrape")
+
+            # Stage 2: scrape every distinct page not extracted yet, once
+            for run in active:
+                if run.found:
+                    run.ctx.emit(STAGE_STARTED, stage="scraping")
+            if to_scrape:
+                scraped += len(to_scrape)
+                Crawl4AIScrapeWebsiteTool().extract_many(list(to_scrape.values()), on_result=record,
+                                                         on_pruned=pruned)
+            for run in active:
+                if run.found and not any(key in extracted for key in run.found):
+                    run.error = "No product could be extracted from the search results"
+                    run.widen_search = True
+
+        # Stage 3: one WHOIS lookup per distinct seller domain of the whole batch
+        runs_by_domain = {}
+        for key, product in extracted.items():
+            domain = registrable_domain(product.get("business_website"))
+            for run in union.pages[key]["runs"]:
+                runs_by_domain.setdefault(domain, set()).add(run)
+        for run in runs:
+            if run.checkpoint.products():
+                run.ctx.emit(STAGE_STARTED, stage="whois")
+
+        def on_lookup(domain, info):
+            for run in runs_by_domain.get(domain, ()):
+                run.ctx.emit(WHOIS_COMPLETED, domain=domain, info=info)
+
+        try:
+            lookups = enrich_products_with_whois(list(extracted.values()), on_lookup=on_lookup)
+        except Exception as e:
+            logger.error(f"Error processing WHOIS information: {str(e)}")
+
+        # Fan the enriched products back out to their categories
+        for run in runs:
+            run.ctx.set_search_results(list(run.found.values()))
+            products = _category_products(run, extracted)
+            run.ctx.set_products(products)
+            if not run.found:
+                continue
+            run.ctx.emit(STAGE_COMPLETED, stage="scraping", products=len(products))
+            if not products:
+                logger.warning(f"Batch category {run.product_category!r} failed after {budget['max_attempts']} "
+                               f"attempts (batches do not use the fallback data): {run.error}")
+                continue
+            run.ctx.emit(STAGE_COMPLETED, stage="whois", domains=len(lookups))
+            run.ctx.persist("step_3_scraped_products.json", {"products": products})
+            run.checkpoint.mark_completed()
+            run.error = None
+            run.success = True
+    finally:
+        for run in runs:
+            run.ctx.emit(RUN_FINISHED, success=run.success, products=len(run.ctx.products))
+            run.ctx.close()
+
+    found = sum(len(run.found) for run in runs)
+    stats = {
+        "categories": len(runs),
+        "search_results": found,
+        "distinct_pages": len(union.pages),
+        "shared_pages": union.shared(),
+        "pages_scraped": scraped,
+        "scrapes_saved": found - len(union.pages),
+        "products": len(extracted),
+        "whois_domains": len(lookups),
+        "serper_requests": requests_budget.used,
+        "duration_s": round(time.time() - started, 2),
+    }
+    logger.info(f"Batch finished: {stats}")
+    return {
+        "runs": [{
+            "run_id": run.run_id,
+            "product_category": run.product_category,
+            "success": run.success,
+            "products_count": len(run.ctx.products),
+            "search_results": len(run.found),
+            "shared_pages": union.shared(run),
+            "page_tokens": run.page_tokens,
+            "extraction_input_tokens": run.extraction_input_tokens,
+            "error": None if run.success else run.error,
+        } for run in runs],
+        "stats": stats,
+    }
+
+
+def _category_products(run: _CategoryRun, extracted: dict) -> list:
+    """The run's products, one per page it found, in the order it found them."""
+    return [_attribute(extracted[key], result) for key, result in run.found.items() if key in extracted]
+
+
+def _attribute(product: dict, result: dict) -> dict:
+    """Copy of a product for one category, with the suspicion score from that category's search result."""
+    from web_scraping_agent.tools.crawl4ai_tool import score_to_suspicion
+
+    attributed = copy.deepcopy(product)
+    attributed["suspicion_score"] = score_to_suspicion(result.get("score", 0.0))
+    return attributed
@@ -0,0 +1,117 @@
+# Developed by Montassar Bellah Abdallah
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts) -> str:
+    """Stable SHA-256 key over JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """
+    Persistent JSON key/value cache backed by a SQLite file.
+
+    Entries carry their own expiry (None means never expires); expired rows
+    are purged from the write path at most once per PURGE_INTERVAL, so the
+    file stays bounded. Hit and miss counters are kept per process and
+    exposed through `stats()`.
+    """
+
+    PURGE_INTERVAL = 3600  # Seconds between purges of expired entries
+
+    def __init__(self, path: str, default_ttl: float = None):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str):
+        """Return the cached value, or None when missing or expired."""
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache read failed ({self.path}): {e}")
+            row = None
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            self._count(False)
+            return None
+        self._count(True)
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float = None):
+        """Store a JSON-serializable value. `ttl` overrides the cache default (seconds)."""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, expires_at),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache write failed ({self.path}): {e}")
+            return
+        with self._lock:
+            due = now - self._last_purge >= self.PURGE_INTERVAL
+            if due:
+                self._last_purge = now
+        if due:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries. Returns how many were removed."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                removed = conn.execute(
+                    "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+                ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Cache purge failed ({self.path}): {e}")
+            return 0
+        if removed:
+            logger.info(f"Purged {removed} expired entries from {self.path}")
+        return removed
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,139 @@
+# Developed by Montassar Bellah Abdallah
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from run_store import run_dir, write_json_atomic
+from url_utils import normalize_url
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+class RunCheckpoint:
+    """
+    Per-run record of completed stages and per-URL scrape outcomes.
+
+    Stage changes rewrite the JSON file in the run directory atomically; URL
+    outcomes are appended to a JSON Lines log beside it and folded into the
+    JSON on the next full save, so a long scrape does not rewrite the whole
+    checkpoint per page. A retry (or a restarted process given the same run
+    ID) resumes only the stage or the URLs that did not finish.
+    """
+
+    FILENAME = "checkpoint.json"
+    URLS_FILENAME = "checkpoint_urls.jsonl"
+
+    def __init__(self, run_id: str, product_category: str = None, excluded_platforms_list: list = None,
+                 directory: str = None):
+        self.run_id = run_id
+        self.path = os.path.join(directory or run_dir(run_id), self.FILENAME)
+        self.urls_path = os.path.join(os.path.dirname(self.path), self.URLS_FILENAME)
+        self._lock = threading.Lock()
+        self.state = {
+            "run_id": run_id,
+            "product_category": product_category,
+            "excluded_platforms_list": list(excluded_platforms_list or []),
+            "created_at": datetime.now().isoformat(),
+            "completed": False,
+            "stages": {},
+            "urls": {},
+        }
+
+    @classmethod
+    def load_or_create(cls, run_id: str, product_category: str, excluded_platforms_list: list,
+                       directory: str = None) -> "RunCheckpoint":
+        """Resume the checkpoint for `run_id` if it exists for the same inputs, else start a new one."""
+        checkpoint = cls(run_id, product_category, excluded_platforms_list, directory)
+        try:
+            with open(checkpoint.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            checkpoint._discard_url_log()
+            return checkpoint
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {checkpoint.path}: {e}")
+            checkpoint._discard_url_log()
+            return checkpoint
+        if state.get("product_category") == product_category and \
+                state.get("excluded_platforms_list") == list(excluded_platforms_list or []):
+            checkpoint.state = state
+            checkpoint._replay_url_log()
+        else:
+            checkpoint._discard_url_log()
+        return checkpoint
+
+    def stage(self, name: str):
+        """Output saved for a completed stage, or None."""
+        return self.state["stages"].get(name)
+
+    def complete_stage(self, name: str, data):
+        with self._lock:
+            self.state["stages"][name] = data
+            self._save()
+
+    def url_done(self, url: str) -> bool:
+        return self.state["urls"].get(normalize_url(url), {}).get("status") == "done"
+
+    def record_url(self, url: str, product: dict = None, error: str = None):
+        """Record one scraped URL: done with its product, or failed with an error."""
+        entry = {
+            "url": url,
+            "status": "done" if product is not None else "failed",
+            "product": product,
+            "error": error,
+        }
+        with self._lock:
+            self.state["urls"][normalize_url(url)] = entry
+            try:
+                os.makedirs(os.path.dirname(self.urls_path), exist_ok=True)
+                with open(self.urls_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.error(f"Failed to append to checkpoint log {self.urls_path}: {e}")
+
+    def products(self) -> list:
+        """Products of every URL scraped successfully so far."""
+        return [entry["product"] for entry in self.state["urls"].values() if entry.get("status") == "done"]
+
+    def mark_completed(self):
+        with self._lock:
+            self.state["completed"] = True
+            self.state["completed_at"] = datetime.now().isoformat()
+            self._save()
+
+    def _save(self):
+        try:
+            write_json_atomic(self.path, self.state, indent=None)
+        except OSError as e:
+            logger.error(f"Failed to save checkpoint {self.path}: {e}")
+            return
+        # The JSON now holds every URL outcome; replaying a log left by a crash here is harmless
+        self._discard_url_log()
+
+    def _replay_url_log(self):
+        """Fold the URL outcomes appended since the last full save into the state."""
+        try:
+            with open(self.urls_path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable checkpoint log {self.urls_path}: {e}")
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Line cut short by a crash
+            self.state["urls"][normalize_url(entry["url"])] = entry
+
+    def _discard_url_log(self):
+        try:
+            os.remove(self.urls_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Failed to remove checkpoint log {self.urls_path}: {e}")
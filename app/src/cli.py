@@ -0,0 +1,223 @@
+# Developed by Montassar Bellah Abdallah
+
+"""
+Headless entry point for scheduled and batch analyses.
+
+    python cli.py -c "parfums" -c "montres" --exclude jumia.com.tn --max-attempts 2 -o results.jsonl
+
+Writes one JSON line per category and exits with a non-zero status if any
+analysis failed. With --batch the categories run together (see batch_runner),
+followed by a line of batch totals. Only the analysis pipeline is imported
+(no Streamlit, no ReportLab).
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import sys
+import threading
+import time
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+
+def split_list(values: list) -> list:
+    """Flatten repeated and comma-separated option values ('a,b' 'c' -> ['a', 'b', 'c'])."""
+    return [item.strip() for value in values or [] for item in value.split(",") if item.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run product analyses without the dashboard and write JSON Lines results.")
+    parser.add_argument("-c", "--category", action="append", required=True, dest="categories",
+                        help="Product category to analyze (repeat for several categories)")
+    parser.add_argument("-x", "--exclude", action="append", default=[],
+                        help="Platform to exclude (repeatable, or comma-separated)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSON Lines output file, appended to ('-' for stdout, the default)")
+    parser.add_argument("--search-mode", choices=["deterministic", "agent"], default=None,
+                        help="Override SEARCH_MODE")
+    parser.add_argument("--run-id", default=None,
+                        help="Resume this run from its checkpoint (single category only)")
+
+    budget = parser.add_argument_group("budget")
+    budget.add_argument("--max-attempts", type=int, default=None, help="Attempts per category (default 3)")
+    budget.add_argument("--max-results", type=int, default=None, dest="max_search_results",
+                        help="Search results scraped per category on the first attempt, +1 per retry (default 1)")
+    budget.add_argument("--score-threshold", type=float, default=None, help="Minimum search result score (default 0.1)")
+    budget.add_argument("--queries", type=int, default=None, dest="no_keywords",
+                        help="Search queries generated per category (default 3)")
+    budget.add_argument("--serper-budget", type=int, default=None,
+                        help="Serper requests for the whole batch, with --batch (default BATCH_SERPER_BUDGET, 0 = unlimited)")
+
+    parser.add_argument("--batch", action="store_true",
+                        help="Search the categories concurrently and scrape pages found by several of them once")
+
+    parser.add_argument("--allow-fallback", action="store_true",
+                        help="Count a run that fell back to the bundled demo data as successful")
+    parser.add_argument("--include-products", action="store_true",
+                        help="Embed the extracted products in each result line")
+    parser.add_argument("--events", action="store_true",
+                        help="Also write every progress event as a JSON line")
+    return parser
+
+
+def analyze_category(args, product_category: str, excluded: list, write_line) -> dict:
+    """Run one analysis and return its result record."""
+    from main_crewai import run_analysis
+    from run_context import new_run_id, FALLBACK_USED, PAGE_PRUNED, RUN_FINISHED
+    from run_store import run_dir
+
+    run_id = args.run_id or new_run_id()
+    state = {"using_fallback": False, "products": 0, "page_tokens": 0, "extraction_input_tokens": 0}
+
+    def on_event(event):
+        if event["type"] == FALLBACK_USED:
+            state["using_fallback"] = True
+        elif event["type"] == PAGE_PRUNED:
+            state["page_tokens"] += event["raw_tokens"]
+            state["extraction_input_tokens"] += event["input_tokens"]
+        elif event["type"] == RUN_FINISHED:
+            state["products"] = event.get("products", 0)
+        if args.events:
+            write_line({"record": "event", **event})
+
+    started = time.time()
+    success, error = False, None
+    try:
+        # The pipeline prints its progress; keep stdout for the JSON lines
+        with contextlib.redirect_stdout(sys.stderr):
+            success = bool(run_analysis(
+                product_category,
+                excluded,
+                search_mode=args.search_mode,
+                run_id=run_id,
+                on_event=on_event,
+                max_attempts=args.max_attempts,
+                score_threshold=args.score_threshold,
+                max_search_results=args.max_search_results,
+                no_keywords=args.no_keywords,
+                use_fallback=args.allow_fallback,
+            ))
+    except Exception as e:
+        logger.exception(f"Analysis of {product_category!r} crashed")
+        error = f"{type(e).__name__}: {e}"
+
+    record = {
+        "record": "result",
+        "run_id": run_id,
+        "product_category": product_category,
+        "excluded_platforms_list": excluded,
+        "success": success,
+        "using_fallback": state["using_fallback"],
+        "products_count": state["products"],
+        "page_tokens": state["page_tokens"],
+        "extraction_input_tokens": state["extraction_input_tokens"],
+        "duration_s": round(time.time() - started, 2),
+        "run_dir": run_dir(run_id),
+        "error": error,
+    }
+    if args.include_products:
+        record["products"] = read_products(run_id)
+    return record
+
+
+def read_products(run_id: str) -> list:
+    """Products saved by a run (empty if it produced none)."""
+    from run_store import run_file
+    try:
+        with open(run_file(run_id, "step_3_scraped_products.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("products", [])
+    except (OSError, json.JSONDecodeError):
+        return []
+
+
+def analyze_batch(args, categories: list, excluded: list, write_line) -> list:
+    """Run the categories as one batch and return their result records, then the batch totals."""
+    from batch_runner import run_batch
+    from config import BATCH_SERPER_BUDGET
+    from run_store import run_dir
+
+    on_event = (lambda event: write_line({"record": "event", **event})) if args.events else None
+    with contextlib.redirect_stdout(sys.stderr):
+        batch = run_batch(
+            categories,
+            excluded,
+            search_mode=args.search_mode,
+            on_event=on_event,
+            serper_budget=BATCH_SERPER_BUDGET if args.serper_budget is None else args.serper_budget,
+            max_attempts=args.max_attempts,
+            score_threshold=args.score_threshold,
+            max_search_results=args.max_search_results,
+            no_keywords=args.no_keywords,
+        )
+    records = []
+    for run in batch["runs"]:
+        record = {"record": "result", "excluded_platforms_list": excluded, "using_fallback": False,
+                  "run_dir": run_dir(run["run_id"]), **run}
+        if args.include_products:
+            record["products"] = read_products(run["run_id"])
+        records.append(record)
+    return records + [{"record": "batch", **batch["stats"]}]
+
+
+def main(argv: list = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    categories = [category.strip() for category in args.categories if category.strip()]
+    if args.run_id is not None:
+        from run_store import run_dir
+        if len(categories) > 1 or args.batch:
+            parser.error("--run-id can only be used with a single category, without --batch")
+        try:
+            run_dir(args.run_id)
+        except ValueError as e:
+            parser.error(str(e))
+    excluded = split_list(args.exclude)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+
+    write_lock = threading.Lock()
+
+    def write_line(data: dict):
+        # Batch events arrive from several threads
+        with write_lock:
+            output.write(json.dumps(data, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+
+    exit_code = EXIT_OK
+    try:
+        if args.batch:
+            try:
+                records = analyze_batch(args, categories, excluded, write_line)
+            except Exception as e:
+                logger.exception("Batch crashed")
+                write_line({"record": "batch", "error": f"{type(e).__name__}: {e}"})
+                return EXIT_FAILED
+            for record in records:
+                write_line(record)
+                if record["record"] == "result" and not record["success"]:
+                    exit_code = EXIT_FAILED
+            return exit_code
+        for product_category in categories:
+            record = analyze_category(args, product_category, excluded, write_line)
+            write_line(record)
+            if not record["success"] or (record["using_fallback"] and not args.allow_fallback):
+                exit_code = EXIT_FAILED
+    except KeyboardInterrupt:
+        logger.warning("Interrupted")
+        exit_code = EXIT_INTERRUPTED
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    sys.exit(main())
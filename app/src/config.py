@@ -1,11 +1,11 @@
 # Developed by Montassar Bellah Abdallah
 
+import json
 import os
 import logging
-import agentops
+import threading
 from dotenv import load_dotenv
-from crewai import  LLM
-from crewai.knowledge.source.string_knowledge_source import StringKnowledgeSource
+from rate_limiter import TokenBucketRateLimiter, limit_llm_calls
 
 load_dotenv()
 
@@ -14,28 +14,147 @@ AGENTOPS_API_KEY=os.environ.get("AGENTOPS_API_KEY")
 SERPER_API_KEY=os.environ.get("SERPER_API_KEY")
 SCRAPFLY_API_KEY=os.environ.get("SCRAPFLY_API_KEY")
 
-agentops.init(
-    api_key=AGENTOPS_API_KEY,
-    skip_auto_end_session=True,
-    default_tags=['crewai']
-)
+# Agent stack (crewai, LLMs, AgentOps) is only loaded by the first analysis, not by importing config
+_lazy_lock = threading.RLock()
+_telemetry_initialized = False
+
 
-# Disable AgentOps INFO logging to avoid Unicode encoding issues on Windows
-logging.getLogger('agentops').setLevel(logging.WARNING)
+def init_telemetry():
+    """Start the AgentOps session once per process (a network call, so only when an analysis runs)."""
+    global _telemetry_initialized
+    with _lazy_lock:
+        if _telemetry_initialized:
+            return
+        import agentops
+        agentops.init(
+            api_key=AGENTOPS_API_KEY,
+            skip_auto_end_session=True,
+            default_tags=['crewai']
+        )
+
+        # Disable AgentOps INFO logging to avoid Unicode encoding issues on Windows
+        logging.getLogger('agentops').setLevel(logging.WARNING)
+        _telemetry_initialized = True
 
 output_dir = "./ai-agent-output"
 os.makedirs(output_dir, exist_ok=True)
 
+# Shared Chromium pool used by the Crawl4AI scraping tool
+CRAWLER_POOL_SIZE = int(os.environ.get("CRAWLER_POOL_SIZE", 1))
+CRAWLER_MAX_PAGES = int(os.environ.get("CRAWLER_MAX_PAGES", 50))  # Recycle a browser after this many pages
+CRAWLER_MAX_RSS_MB = int(os.environ.get("CRAWLER_MAX_RSS_MB", 1500))  # Recycle when the process tree exceeds this
 
-basic_llm = LLM(
-    model="gemini/gemini-2.5-flash",
-    temperature=0.7
-)
+# Scraping stage: "batch" crawls all search results concurrently, "agent" lets the scraping agent call the tool per URL
+SCRAPING_MODE = os.environ.get("SCRAPING_MODE", "batch")
+SCRAPE_CONCURRENCY = int(os.environ.get("SCRAPE_CONCURRENCY", 3))
 
-scraping_llm = LLM(
-    model="gemini/gemini-2.5-flash",
-    temperature=0.0
+# Pre-extraction pruning: menus, footers and review blocks are stripped before a page is sent to Gemini
+EXTRACTION_PRUNING = os.environ.get("EXTRACTION_PRUNING", "true").lower() == "true"
+EXTRACTION_PRUNING_THRESHOLD = float(os.environ.get("EXTRACTION_PRUNING_THRESHOLD", 0.45))  # Higher prunes more
+EXTRACTION_EXCLUDED_TAGS = [t for t in os.environ.get("EXTRACTION_EXCLUDED_TAGS", "nav,footer,aside,noscript,iframe,svg").split(",") if t]
+EXTRACTION_EXCLUDED_SELECTOR = os.environ.get(
+    "EXTRACTION_EXCLUDED_SELECTOR",
+    "[class*='review'], [id*='review'], [class*='comment'], [class*='related'], [class*='upsell'], "
+    "[class*='newsletter'], [class*='cookie'], [class*='breadcrumb'], [role='navigation']",
 )
+# Product-area CSS selectors (comma-separated) to extract from only; opt-in, since a page matching none comes out empty
+EXTRACTION_TARGET_SELECTORS = [s.strip() for s in os.environ.get("EXTRACTION_TARGET_SELECTORS", "").split(",") if s.strip()]
+EXTRACTION_MAX_INPUT_TOKENS = int(os.environ.get("EXTRACTION_MAX_INPUT_TOKENS", 6000))  # Per page, 0 = no cap
+
+# Rendered page snapshots, reused across runs and kept as evidence
+PAGE_CACHE_DIR = os.path.join(output_dir, "page_cache")
+PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", 6 * 3600))  # Seconds before a snapshot is revalidated
+PAGE_CACHE_MAX_MB = int(os.environ.get("PAGE_CACHE_MAX_MB", 500))
+
+# Persistent result caches (SQLite files)
+CACHE_DIR = os.path.join(output_dir, "cache")
+# Extraction results are keyed by page content, so they never go stale unless a TTL is set
+EXTRACTION_CACHE_TTL = int(os.environ["EXTRACTION_CACHE_TTL"]) if os.environ.get("EXTRACTION_CACHE_TTL") else None
+SERPER_CACHE_TTL = int(os.environ.get("SERPER_CACHE_TTL", 24 * 3600))
+SERPER_CACHE_BYPASS = os.environ.get("SERPER_CACHE_BYPASS", "false").lower() == "true"
+
+# Serper HTTP client
+SERPER_TIMEOUT = float(os.environ.get("SERPER_TIMEOUT", 15))
+SERPER_MAX_RETRIES = int(os.environ.get("SERPER_MAX_RETRIES", 3))
+SERPER_POOL_SIZE = int(os.environ.get("SERPER_POOL_SIZE", 8))
+SERPER_BATCH_SIZE = int(os.environ.get("SERPER_BATCH_SIZE", 20))  # Searches sent per batch request
+
+# Search stage: "deterministic" filters Serper results in code, "agent" lets the search agent do it
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "deterministic")
+SEARCH_TLD = ".tn"
+PRICE_COMPARATOR_DOMAINS = ["mega.tn"] + [d for d in os.environ.get("PRICE_COMPARATOR_DOMAINS", "").split(",") if d]
+
+# Each run writes its step files and checkpoint to RUNS_DIR/<run_id>/ (the dashboard reads these files)
+RUNS_DIR = os.path.join(output_dir, "runs")
+PERSIST_STAGE_OUTPUTS = os.environ.get("PERSIST_STAGE_OUTPUTS", "true").lower() == "true"
+# Retention: keep at most this many runs, none older than this (0 disables a limit)
+RUN_RETENTION_MAX_RUNS = int(os.environ.get("RUN_RETENTION_MAX_RUNS", 50))
+RUN_RETENTION_MAX_AGE_DAYS = float(os.environ.get("RUN_RETENTION_MAX_AGE_DAYS", 30))
+RUN_RETENTION_GRACE = 3600  # Seconds; runs written to more recently are considered in progress
+
+# Background analysis jobs started from the dashboard
+JOB_MAX_WORKERS = int(os.environ.get("JOB_MAX_WORKERS", 2))
+JOB_HISTORY_SIZE = int(os.environ.get("JOB_HISTORY_SIZE", 50))  # Finished jobs kept for status queries
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 2))  # Seconds between dashboard status refreshes
+RESULTS_CACHE_SIZE = int(os.environ.get("RESULTS_CACHE_SIZE", 16))  # Parsed result sets kept in memory by the dashboard
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", 1500))  # Dashboard module imports above this are logged as a warning
+# Generated PDF reports shared by every dashboard session, keyed by a hash of their inputs
+PDF_CACHE_MAX_ENTRIES = int(os.environ.get("PDF_CACHE_MAX_ENTRIES", 32))
+PDF_CACHE_MAX_MB = int(os.environ.get("PDF_CACHE_MAX_MB", 128))
+# Analysis reports with at least this many products use consolidated tables, built through a temp file
+PDF_LARGE_REPORT_THRESHOLD = int(os.environ.get("PDF_LARGE_REPORT_THRESHOLD", 50))
+PDF_TABLE_CHUNK_ROWS = int(os.environ.get("PDF_TABLE_CHUNK_ROWS", 100))  # Rows per table, keeps page splitting linear
+PDF_SPOOL_MAX_MB = int(os.environ.get("PDF_SPOOL_MAX_MB", 8))  # Larger PDFs are built on disk rather than in memory
+# Per-product dossier export: worker processes (0 = one per CPU) and dossiers rendered ahead of the ZIP writer
+DOSSIER_MAX_WORKERS = int(os.environ.get("DOSSIER_MAX_WORKERS", 0))
+DOSSIER_MAX_IN_FLIGHT = int(os.environ.get("DOSSIER_MAX_IN_FLIGHT", 0))  # 0 = twice the workers
+
+# Monitoring daemon: scheduled categories (JSON file), seen-URL store and default schedule
+MONITOR_CONFIG = os.environ.get("MONITOR_CONFIG", "monitor.json")
+MONITOR_DB = os.environ.get("MONITOR_DB", os.path.join(output_dir, "cache", "monitor.sqlite3"))
+MONITOR_INTERVAL_MINUTES = float(os.environ.get("MONITOR_INTERVAL_MINUTES", 360))
+MONITOR_RECHECK_HOURS = float(os.environ.get("MONITOR_RECHECK_HOURS", 72))  # Seen pages older than this are revalidated
+MONITOR_MAX_RESULTS = int(os.environ.get("MONITOR_MAX_RESULTS", 20))  # New or changed pages scraped per category and run
+
+# Multi-category batch runs: categories searched at once, and Serper requests per batch (0 = unlimited)
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", 4))
+BATCH_SERPER_BUDGET = int(os.environ.get("BATCH_SERPER_BUDGET", 0))
+
+# WHOIS enrichment
+WHOIS_MAX_WORKERS = int(os.environ.get("WHOIS_MAX_WORKERS", 8))
+WHOIS_TIMEOUT = float(os.environ.get("WHOIS_TIMEOUT", 15))  # Seconds per port-43 connection
+WHOIS_DOMAIN_DEADLINE = float(os.environ.get("WHOIS_DOMAIN_DEADLINE", 30))  # Seconds per domain, RDAP and WHOIS fallback included
+WHOIS_CACHE_TTL = int(os.environ.get("WHOIS_CACHE_TTL", 30 * 24 * 3600))  # Registration data rarely changes
+WHOIS_NEGATIVE_CACHE_TTL = int(os.environ.get("WHOIS_NEGATIVE_CACHE_TTL", 3600))  # Errors and rate limits
+
+# RDAP lookups are tried before port-43 WHOIS; TLDs without an RDAP service (e.g. .tn) fall back to WHOIS
+RDAP_ENABLED = os.environ.get("RDAP_ENABLED", "true").lower() == "true"
+RDAP_BOOTSTRAP_URL = os.environ.get("RDAP_BOOTSTRAP_URL", "https://data.iana.org/rdap/dns.json")
+# Per-TLD server overrides as JSON, e.g. '{"com": "http://localhost:8080/rdap"}' for a local stand-in
+RDAP_BASE_URLS = json.loads(os.environ.get("RDAP_BASE_URLS") or "{}")
+RDAP_TIMEOUT = float(os.environ.get("RDAP_TIMEOUT", 10))
+RDAP_POOL_SIZE = int(os.environ.get("RDAP_POOL_SIZE", 8))
+
+# Gemini quota shared by every agent and by the Crawl4AI extraction strategy
+GEMINI_RPM = int(os.environ.get("GEMINI_RPM", 10))
+GEMINI_TPM = int(os.environ.get("GEMINI_TPM", 250000))
+gemini_rate_limiter = TokenBucketRateLimiter(GEMINI_RPM, GEMINI_TPM, name="gemini")
+
+
+def _build_basic_llm():
+    from crewai import LLM
+    return limit_llm_calls(LLM(
+        model="gemini/gemini-2.5-flash",
+        temperature=0.7
+    ), gemini_rate_limiter)
+
+
+def _build_scraping_llm():
+    from crewai import LLM
+    return limit_llm_calls(LLM(
+        model="gemini/gemini-2.5-flash",
+        temperature=0.0
+    ), gemini_rate_limiter)
 
 # Knowledge Source - Context about the Tunisian Customs
 about_customs = """
@@ -46,6 +165,27 @@ The objective is to automatically identify suspicious sales to strengthen the fi
 against digital fraud and smuggling.
 """
 
-customs_context = StringKnowledgeSource(
-    content=about_customs
-)
+
+def _build_customs_context():
+    from crewai.knowledge.source.string_knowledge_source import StringKnowledgeSource
+    return StringKnowledgeSource(
+        content=about_customs
+    )
+
+
+_LAZY_ATTRIBUTES = {
+    "basic_llm": _build_basic_llm,
+    "scraping_llm": _build_scraping_llm,
+    "customs_context": _build_customs_context,
+}
+
+
+def __getattr__(name):
+    """Build basic_llm, scraping_llm and customs_context on first access (`from config import basic_llm` included)."""
+    builder = _LAZY_ATTRIBUTES.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lazy_lock:
+        if name not in globals():
+            globals()[name] = builder()
+        return globals()[name]
@@ -1,43 +1,38 @@
 # Developed by Montassar Bellah Abdallah
 
+import time
+_import_started = time.perf_counter()
+
 import streamlit as st
 import streamlit.components.v1 as components
-import json
 from typing import List, Dict
 from datetime import datetime
+import logging
 import os
 import sys
+import threading
 
 
 # Add the parent directory of main_crewai.py to the path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
-from main_crewai import run_analysis # Import the refactored function
-from pdf_generation import generate_whois_pdf, generate_analysis_pdf # Import PDF generation module
+from config import JOB_POLL_INTERVAL, IMPORT_TIME_BUDGET_MS
+from job_runner import JobRunner, ACTIVE_STATUSES, QUEUED # Analyses run in background worker threads
+from run_store import run_exists, run_file # Each job writes its outputs to its own run directory
+from run_context import QUERIES_GENERATED, SEARCH_RESULT, PRODUCT_EXTRACTED, WHOIS_COMPLETED # Progress events
+from url_utils import registrable_domain
+from results_loader import load_results, decode_unicode_escapes, ResultsUnavailable # Cached, read-only result loading
+from pdf_generation import pdf_cache, whois_pdf_key, analysis_pdf_key, get_whois_pdf, get_analysis_pdf # PDFs built on demand, cached by content
 
-# Add the parent directory of main_crewai.py to the path
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__))))
-from main_crewai import run_analysis # Import the refactored function
+# The agent stack (crewai, LLMs, AgentOps), Crawl4AI and ReportLab are imported on first use, not here
+IMPORT_TIME_MS = (time.perf_counter() - _import_started) * 1000
 
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+if IMPORT_TIME_MS > IMPORT_TIME_BUDGET_MS:
+    logger.warning(f"Dashboard imports took {IMPORT_TIME_MS:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)")
+else:
+    logger.info(f"Dashboard imports took {IMPORT_TIME_MS:.0f} ms")
 
-def decode_unicode_escapes(text: str) -> str:
-    """Decode Unicode escape sequences in a string."""
-    if isinstance(text, str):
-        try:
-            # First try to decode unicode escapes
-            decoded = text.encode("utf-8").decode("unicode_escape")
-            # Then ensure proper UTF-8 encoding for display
-            return decoded.encode("utf-8").decode("utf-8")
-        except (UnicodeDecodeError, UnicodeEncodeError):
-            try:
-                # Fallback: try direct UTF-8 decoding
-                return text.encode("latin1").decode("utf-8")
-            except:
-                try:
-                    # Additional fallback for double-encoded UTF-8
-                    return text.encode("utf-8").decode("utf-8", errors="ignore")
-                except:
-                    return text
-    return text
 
 # Page configuration
 st.set_page_config(
@@ -47,6 +42,83 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+def _start_crawler_pool():
+    from web_scraping_agent.tools.crawler_pool import get_crawler_pool
+    get_crawler_pool().start()
+
+# Start the shared Chromium pool once per server process so the first analysis
+# does not pay the browser startup cost; Crawl4AI is imported by the background thread
+@st.cache_resource(show_spinner=False)
+def warm_crawler_pool():
+    thread = threading.Thread(target=_start_crawler_pool, name="crawler-pool-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# One job runner per server process, so every session sees the same jobs
+@st.cache_resource(show_spinner=False)
+def get_job_runner():
+    return JobRunner()
+
+STAGE_LABELS = {
+    "search": "Recherche des annonces",
+    "scraping": "Extraction des produits",
+    "whois": "Recherche WHOIS des vendeurs",
+}
+
+def fetch_job_events(job_id: str) -> list:
+    """Progress events of the job, fetching only the ones not yet seen by this session."""
+    if st.session_state.get('job_events_id') != job_id:
+        st.session_state['job_events_id'] = job_id
+        st.session_state['job_events'] = []
+    events = st.session_state['job_events']
+    events.extend(get_job_runner().get_events(job_id, since=len(events)))
+    return events
+
+def build_live_view(events: list) -> dict:
+    """Queries, search results and products received so far, with WHOIS results applied to their products."""
+    queries, results, products, whois_by_domain = [], {}, {}, {}
+    for event in events:
+        if event['type'] == QUERIES_GENERATED:
+            queries = event['queries']
+        elif event['type'] == SEARCH_RESULT:
+            results[event['result'].get('url')] = event['result']
+        elif event['type'] == PRODUCT_EXTRACTED:
+            product = dict(event['product'])
+            # Same display adjustments as the saved results: 0-100 scale, decoded reasons
+            product['suspicion_score'] = (product.get('suspicion_score') or 0) * 10
+            product['suspicion_reasons'] = [decode_unicode_escapes(r) for r in product.get('suspicion_reasons') or []]
+            products[event['url']] = product
+        elif event['type'] == WHOIS_COMPLETED:
+            whois_by_domain[event['domain']] = event['info']
+    for product in products.values():
+        domain = registrable_domain(product.get('business_website'))
+        if domain in whois_by_domain:
+            product['whois_info'] = whois_by_domain[domain]
+    return {"queries": queries, "results": list(results.values()), "products": list(products.values())}
+
+# Poll the job without rerunning the whole page; a full rerun shows the final results once it finishes
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_job_status(job_id: str):
+    job = get_job_runner().get_job(job_id)
+    if job is None or job['status'] not in ACTIVE_STATUSES:
+        st.rerun()
+    if job['status'] == QUEUED:
+        st.info("Analyse en attente... Une autre analyse est en cours.")
+        return
+
+    elapsed = int(datetime.now().timestamp() - job['started_at'])
+    stage = STAGE_LABELS.get(job['stage'], "Préparation")
+    st.info(f"Analyse en cours : {stage}... ({elapsed // 60} min {elapsed % 60:02d} s)")
+
+    live = build_live_view(fetch_job_events(job_id))
+    st.caption(f"{len(live['queries'])} requête(s) · {len(live['results'])} annonce(s) trouvée(s) · {len(live['products'])} produit(s) analysé(s)")
+    if live['products']:
+        st.markdown("## Produits Détectés")
+        for i, product in enumerate(live['products']):
+            render_product_card(product)
+            if i < len(live['products']) - 1:
+                st.divider()
+
 # Custom CSS for premium styling
 def load_css():
     css_file_path = os.path.join(os.path.dirname(__file__), "..", "styles", "style.css")
@@ -173,7 +245,7 @@ def render_product_card(product: Dict):
             value = product.get(field)
             if value:
                 if isinstance(value, dict):
-                    filtered_items = [(k, v) for k, v in value.items() if v is not None]
+                    filtered_items = [(k, v) for k, v in value.items() if v]  # Skip empty fields (None, "", [] status or name servers)
                     if filtered_items:
                         info = f"<strong>{label}:</strong><br>"
                         for k, v in filtered_items:
@@ -266,15 +338,14 @@ def main():
         )
         if st.button("Rechercher WHOIS"):
             if domain_input:
-                import whois # Import whois here to avoid global import issues if not needed
+                from whois_lookup import lookup_whois # Import here to avoid global import issues if not needed
                 with st.spinner(f"Recherche WHOIS pour {domain_input}..."):
-                    try:
-                        w = whois.whois(domain_input)
-                        # Convert datetime objects to strings for display
-                        whois_info = {k: str(v) if isinstance(v, datetime) else v for k, v in dict(w).items()}
+                    # Cached lookup shared with the analysis pipeline
+                    whois_info = lookup_whois(domain_input)
+                    if "error" in whois_info:
+                        st.session_state['whois_result'] = {"domain": domain_input, "error": whois_info["error"]}
+                    else:
                         st.session_state['whois_result'] = {"domain": domain_input, "info": whois_info}
-                    except Exception as e:
-                        st.session_state['whois_result'] = {"domain": domain_input, "error": str(e)}
             else:
                 st.sidebar.warning("Veuillez entrer un nom de domaine.")
 
@@ -296,8 +367,25 @@ def main():
     )
     excluded_platforms_list = [p.strip() for p in excluded_platforms_input.split('\n') if p.strip()]
 
+    # Reattach to a job after a page refresh, or to a job shared through the page URL
+    if 'job_id' not in st.session_state and st.query_params.get('job'):
+        st.session_state['job_id'] = st.query_params['job']
+
+    job_id = st.session_state.get('job_id')
+    job = get_job_runner().get_job(job_id) if job_id else None
+    if job_id and job is None:
+        if run_exists(job_id) and os.path.exists(run_file(job_id, 'step_3_scraped_products.json')):
+            # Finished before this server process started: show its results from disk
+            st.session_state['results_available'] = True
+        else:
+            # Unknown job (e.g. the server restarted mid-run): forget it
+            st.session_state.pop('job_id', None)
+            st.query_params.pop('job', None)
+            st.session_state['results_available'] = False
+    job_running = job is not None and job['status'] in ACTIVE_STATUSES
+
         # Display WHOIS results if available and not currently running analysis
-    if st.session_state['whois_result'] and not st.session_state.get('analysis_started', False):
+    if st.session_state['whois_result'] and not job_running:
         st.markdown("## Informations WHOIS")
         result = st.session_state['whois_result']
         if "error" in result:
@@ -305,142 +393,71 @@ def main():
         else:
             st.json(result['info'])
             
-            # PDF Download Button
+            # PDF Download Button (the PDF is only built once asked for)
             try:
-                pdf_bytes = generate_whois_pdf(result['domain'], result['info'])
-                st.download_button(
-                    label="📄 Télécharger en PDF",
-                    data=pdf_bytes,
-                    file_name=f"whois_{result['domain']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf",
-                    help="Télécharger les informations WHOIS au format PDF"
-                )
+                pdf_key = whois_pdf_key(result['domain'], result['info'])
+                pdf_bytes = pdf_cache.get(pdf_key)
+                if pdf_bytes is None and st.button("📄 Générer le PDF", key=f"build_whois_pdf_{pdf_key}"):
+                    with st.spinner("Génération du PDF..."):
+                        pdf_bytes = get_whois_pdf(result['domain'], result['info'])
+                if pdf_bytes is not None:
+                    st.download_button(
+                        label="📄 Télécharger en PDF",
+                        data=pdf_bytes,
+                        file_name=f"whois_{result['domain']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                        mime="application/pdf",
+                        help="Télécharger les informations WHOIS au format PDF"
+                    )
             except Exception as e:
                 st.error(f"Erreur lors de la génération du PDF: {str(e)}")
         
         st.divider()
 
-    if st.sidebar.button("Démarrer l'Analyse 🚀") or st.session_state.get('analysis_started', False):
-        st.session_state['analysis_started'] = True
-        st.session_state['product_category'] = product_category_input
-        st.session_state['excluded_platforms_list'] = excluded_platforms_list
+    if st.sidebar.button("Démarrer l'Analyse 🚀", disabled=job_running):
+        # Returns the job already running for the same inputs instead of starting a duplicate
+        job_id = get_job_runner().submit_analysis(product_category_input, excluded_platforms_list)
+        st.session_state['job_id'] = job_id
+        st.query_params['job'] = job_id
+        st.session_state['results_available'] = False
+        job = get_job_runner().get_job(job_id)
+        job_running = True
     st.sidebar.markdown("Developpé par **Montassar Bellah Abdallah**")
-    if st.session_state.get('analysis_started'):
-        product_category_to_analyze = st.session_state['product_category']
-        excluded_platforms_to_analyze = st.session_state['excluded_platforms_list']
-        
-        st.info(f"Lancement de l'analyse pour '{product_category_to_analyze}' (exclusion: {', '.join(excluded_platforms_to_analyze) if excluded_platforms_to_analyze else 'Aucune'}) ")
-        
-        with st.spinner("Analyse en cours... Cela peut prendre quelques minutes."):
-            analysis_success = run_analysis(
-                product_category=product_category_to_analyze,
-                excluded_platforms_list=excluded_platforms_to_analyze
-            )
-        
-        if analysis_success:
+    if job is not None:
+        st.session_state['product_category'] = job['product_category']
+        st.session_state['excluded_platforms_list'] = job['excluded_platforms_list']
+        excluded_platforms_to_analyze = job['excluded_platforms_list']
+
+        if job_running:
+            st.info(f"Lancement de l'analyse pour '{job['product_category']}' (exclusion: {', '.join(excluded_platforms_to_analyze) if excluded_platforms_to_analyze else 'Aucune'}) ")
+            render_job_status(job['job_id'])
+        elif job['success']:
             st.success("Analyse terminée avec succès!")
             st.session_state['results_available'] = True
         else:
             st.error("L'analyse n'a pas pu détecter de produits suspects après plusieurs tentatives.")
             st.session_state['results_available'] = False
-        
-        # Clear analysis_started state to allow rerunning
-        st.session_state['analysis_started'] = False
-        st.rerun() # Rerun to display results without spinner
 
-    if st.session_state.get('results_available'):
-        # Load scraped products data with error handling
-        scraped_products_path = os.path.join(os.path.dirname(__file__), 'ai-agent-output', 'step_3_scraped_products.json')
-        search_results_path = os.path.join(os.path.dirname(__file__), 'ai-agent-output', 'step_2_search_results.json')
+    if st.session_state.get('results_available') and st.session_state.get('job_id'):
+        # Load this session's run outputs with error handling
+        scraped_products_path = run_file(st.session_state['job_id'], 'step_3_scraped_products.json')
+        search_results_path = run_file(st.session_state['job_id'], 'step_2_search_results.json')
 
         try:
-            # Try to load scraped products data
-            if os.path.exists(scraped_products_path):
-                with open(scraped_products_path, 'r', encoding='utf-8') as f:
-                    scraped_data = json.load(f)
-                scraped_products = scraped_data.get('products', [])
-                # Adjust suspicion_score from 1-10 scale to 0-100 scale
-                for product in scraped_products:
-                    product['suspicion_score'] *= 10
-                    # Decode Unicode escapes in suspicion_reasons
-                    if 'suspicion_reasons' in product and product['suspicion_reasons']:
-                        product['suspicion_reasons'] = [decode_unicode_escapes(reason) for reason in product['suspicion_reasons']]
-            else:
-                # Try to load from fallback
-                fallback_path = os.path.join(os.path.dirname(__file__), '..', 'fallback', 'step_3_scraped_products.json')
-                if os.path.exists(fallback_path):
-                    with open(fallback_path, 'r', encoding='utf-8') as f:
-                        scraped_data = json.load(f)
-                    scraped_products = scraped_data.get('products', [])
-                    # Adjust suspicion_score from 1-10 scale to 0-100 scale
-                    for product in scraped_products:
-                        product['suspicion_score'] *= 10
-                        # Decode Unicode escapes in suspicion_reasons
-                        if 'suspicion_reasons' in product and product['suspicion_reasons']:
-                            product['suspicion_reasons'] = [decode_unicode_escapes(reason) for reason in product['suspicion_reasons']]
-                    st.info("Données de secours utilisées pour les produits scrapés.")
-                else:
-                    st.warning("Les fichiers de résultats n'ont pas été trouvés.")
-                    st.session_state['results_available'] = False
-                    return
-
-            # Try to load search results data
-            if os.path.exists(search_results_path):
-                with open(search_results_path, 'r', encoding='utf-8') as f:
-                    search_data = json.load(f)
-            else:
-                # Try to load from fallback
-                fallback_search_path = os.path.join(os.path.dirname(__file__), '..', 'fallback', 'step_2_search_results.json')
-                if os.path.exists(fallback_search_path):
-                    with open(fallback_search_path, 'r', encoding='utf-8') as f:
-                        search_data = json.load(f)
-                    st.info("Données de secours utilisées pour les résultats de recherche.")
-                else:
-                    search_data = {"results": []}
-
-            search_results = search_data.get('results', [])
-        except json.JSONDecodeError as e:
-            st.error("Erreur de lecture des fichiers de résultats. Données de secours utilisées.")
-            # Load fallback data
-            fallback_path = os.path.join(os.path.dirname(__file__), '..', 'fallback', 'step_3_scraped_products.json')
-            fallback_search_path = os.path.join(os.path.dirname(__file__), '..', 'fallback', 'step_2_search_results.json')
-            
-            try:
-                if os.path.exists(fallback_path):
-                    with open(fallback_path, 'r', encoding='utf-8') as f:
-                        scraped_data = json.load(f)
-                    scraped_products = scraped_data.get('products', [])
-                    for product in scraped_products:
-                        product['suspicion_score'] *= 10
-                        if 'suspicion_reasons' in product and product['suspicion_reasons']:
-                            product['suspicion_reasons'] = [decode_unicode_escapes(reason) for reason in product['suspicion_reasons']]
-                
-                if os.path.exists(fallback_search_path):
-                    with open(fallback_search_path, 'r', encoding='utf-8') as f:
-                        search_data = json.load(f)
-                    search_results = search_data.get('results', [])
-                else:
-                    search_results = []
-            except Exception:
-                st.error("Impossible de charger les données de secours.")
-                st.session_state['results_available'] = False
-                return
+            # Parsed once per file version and shared across reruns and sessions
+            results = load_results(scraped_products_path, search_results_path)
+        except ResultsUnavailable as e:
+            getattr(st, e.level)(str(e))
+            st.session_state['results_available'] = False
+            return
         except Exception as e:
             st.error(f"Erreur inattendue lors du chargement des résultats: {str(e)}")
             st.session_state['results_available'] = False
             return
+        for level, message in results.notices:
+            getattr(st, level)(message)
 
-        # Get URLs of scraped products
-        scraped_urls = {product['page_url'] for product in scraped_products}
-
-        # Filter search results to exclude scraped ones
-        unscraped_results = [result for result in search_results if result['url'] not in scraped_urls]
-
-        # Convert search scores to display scale (0-100)
-        for result in unscraped_results:
-            result['display_score'] = round(result['score'] * 100)
-
-        products = scraped_products
+        products = results.products
+        unscraped_results = results.unscraped_results
         
         # Sidebar
         min_score, max_score = render_sidebar()
@@ -453,28 +470,67 @@ def main():
         st.markdown("### 📄 Télécharger le Rapport d'Analyse")
         
         # Determine if fallback data is being used
-        using_fallback = not os.path.exists(os.path.join(os.path.dirname(__file__), 'ai-agent-output', 'step_3_scraped_products.json'))
+        using_fallback = results.using_fallback
         
         # Get the product category from session state
         product_category_to_analyze = st.session_state.get('product_category', 'analyse')
         
         try:
-            pdf_bytes = generate_analysis_pdf(
-                product_category_to_analyze, 
-                products, 
-                unscraped_results, 
-                using_fallback
-            )
-            st.download_button(
-                label="📥 Télécharger le Rapport PDF",
-                data=pdf_bytes,
-                file_name=f"analyse_produits_{product_category_to_analyze.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                mime="application/pdf",
-                help="Télécharger le rapport d'analyse complet au format PDF"
-            )
+            # Built on the first click, then reused by every rerun and session until the results change
+            pdf_key = analysis_pdf_key(product_category_to_analyze, products, unscraped_results, using_fallback)
+            pdf_bytes = pdf_cache.get(pdf_key)
+            if pdf_bytes is None and st.button("🛠️ Générer le Rapport PDF", key=f"build_analysis_pdf_{pdf_key}"):
+                with st.spinner("Génération du rapport PDF..."):
+                    pdf_bytes = get_analysis_pdf(
+                        product_category_to_analyze, 
+                        products, 
+                        unscraped_results, 
+                        using_fallback
+                    )
+            if pdf_bytes is not None:
+                st.download_button(
+                    label="📥 Télécharger le Rapport PDF",
+                    data=pdf_bytes,
+                    file_name=f"analyse_produits_{product_category_to_analyze.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                    mime="application/pdf",
+                    help="Télécharger le rapport d'analyse complet au format PDF"
+                )
         except Exception as e:
             st.error(f"Erreur lors de la génération du PDF d'analyse: {str(e)}")
 
+        # One dossier PDF per product, rendered in worker processes into a ZIP kept in the run directory
+        if products:
+            try:
+                dossiers_path = run_file(st.session_state['job_id'], 'dossiers.zip')
+                dossiers_ready = (os.path.exists(dossiers_path) and os.path.exists(scraped_products_path)
+                                  and os.path.getmtime(dossiers_path) >= os.path.getmtime(scraped_products_path))
+                if not dossiers_ready and st.button("🗂️ Générer les Dossiers par Produit (ZIP)"):
+                    progress = st.progress(0.0, text="Génération des dossiers...")
+                    tmp_path = dossiers_path + ".tmp"
+                    try:
+                        from pdf_generation import export_dossiers_zip # Loads ReportLab on first use
+                        export_dossiers_zip(
+                            product_category_to_analyze, products, tmp_path,
+                            on_progress=lambda done, total: progress.progress(done / total, text=f"Dossiers générés: {done}/{total}")
+                        )
+                        os.replace(tmp_path, dossiers_path)
+                        dossiers_ready = True
+                    finally:
+                        progress.empty()
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                if dossiers_ready:
+                    with open(dossiers_path, 'rb') as f:
+                        st.download_button(
+                            label="📥 Télécharger les Dossiers (ZIP)",
+                            data=f,
+                            file_name=f"dossiers_{product_category_to_analyze.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                            mime="application/zip",
+                            help="Un dossier PDF par produit (détails, WHOIS, indicateurs de risque)"
+                        )
+            except Exception as e:
+                st.error(f"Erreur lors de la génération des dossiers: {str(e)}")
+
         # Filter Products
         filtered_products = filter_products(products, min_score, max_score)
         
@@ -502,3 +558,5 @@ def main():
 
 if __name__ == "__main__":
     main()
+    # After the first page is sent, so browser startup never delays it
+    warm_crawler_pool()
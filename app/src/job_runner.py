@@ -0,0 +1,156 @@
+# Developed by Montassar Bellah Abdallah
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import JOB_MAX_WORKERS, JOB_HISTORY_SIZE
+from run_context import new_run_id, STAGE_STARTED
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+def job_key(product_category: str, excluded_platforms_list: list) -> tuple:
+    """Identity of an analysis request, used to attach duplicate submissions to one job."""
+    excluded = sorted({p.strip().lower() for p in excluded_platforms_list or [] if p.strip()})
+    return (product_category.strip().lower(), tuple(excluded))
+
+
+class Job:
+    """One submitted analysis and its status."""
+
+    def __init__(self, job_id: str, product_category: str, excluded_platforms_list: list):
+        self.job_id = job_id
+        self.product_category = product_category
+        self.excluded_platforms_list = list(excluded_platforms_list or [])
+        self.status = QUEUED
+        self.success = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.stage = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "product_category": self.product_category,
+            "excluded_platforms_list": list(self.excluded_platforms_list),
+            "status": self.status,
+            "success": self.success,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stage": self.stage,
+            "event_count": len(self.events),
+        }
+
+
+class JobRunner:
+    """
+    Runs analyses in background worker threads.
+
+    `submit_analysis` returns a job ID immediately. Submitting the same
+    category and exclusions while a matching job is queued or running returns
+    that job's ID, so several dashboard sessions share one analysis. Status
+    reads only take a lock and copy a small dict, so they are cheap to poll.
+    The job ID doubles as the run ID of the analysis. Progress events of the
+    run are kept on the job and read incrementally with `get_events`.
+    The agent stack (main_crewai.run_analysis) is imported by the first job.
+    """
+
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS, history_size: int = JOB_HISTORY_SIZE,
+                 target=None):
+        self.history_size = max(1, history_size)
+        self.target = target
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="analysis-job")
+        self._jobs = OrderedDict()
+        self._active_by_key = {}
+        self._lock = threading.Lock()
+
+    def submit_analysis(self, product_category: str, excluded_platforms_list: list) -> str:
+        """Queue an analysis (or attach to the identical one in progress) and return its job ID."""
+        key = job_key(product_category, excluded_platforms_list)
+        with self._lock:
+            job_id = self._active_by_key.get(key)
+            if job_id is not None:
+                logger.info(f"Attaching to analysis job {job_id} already in progress")
+                return job_id
+            job = Job(new_run_id(), product_category, excluded_platforms_list)
+            self._jobs[job.job_id] = job
+            self._active_by_key[key] = job.job_id
+            self._prune()
+        self._executor.submit(self._execute, job, key)
+        return job.job_id
+
+    def get_job(self, job_id: str):
+        """Status snapshot of a job as a dict, or None if the job is unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def get_events(self, job_id: str, since: int = 0) -> list:
+        """Progress events of a job from index `since` on (empty if the job is unknown)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.events[since:] if job else []
+
+    def active_jobs(self) -> list:
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values() if job.active]
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _execute(self, job: Job, key: tuple):
+        with self._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        success, error = False, None
+        try:
+            if self.target is None:
+                from main_crewai import run_analysis
+                self.target = run_analysis
+            success = bool(self.target(
+                product_category=job.product_category,
+                excluded_platforms_list=job.excluded_platforms_list,
+                run_id=job.job_id,
+                on_event=lambda event: self._record_event(job, event),
+            ))
+        except Exception as e:
+            logger.exception(f"Analysis job {job.job_id} crashed")
+            error = str(e)
+        with self._lock:
+            job.success = success
+            job.error = error
+            job.status = SUCCEEDED if success else FAILED
+            job.finished_at = time.time()
+            if self._active_by_key.get(key) == job.job_id:
+                del self._active_by_key[key]
+
+    def _record_event(self, job: Job, event: dict):
+        # Called from the pipeline's threads (crawler loop, WHOIS workers)
+        with self._lock:
+            job.events.append(event)
+            if event["type"] == STAGE_STARTED:
+                job.stage = event.get("stage")
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the history size (caller holds the lock)."""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
@@ -2,24 +2,30 @@
 
 import json
 import os
-import time
 import shutil
 import logging
-from datetime import datetime
-from urllib.parse import urlparse
-import whois
-from config import output_dir
+from config import output_dir, SCRAPING_MODE, SEARCH_MODE, init_telemetry
 from crewai import Crew, Process
 from queries_agent.queries_agent import search_queries_recommendation_agent, search_queries_recommendation_task
 from search_agent.search_agent import search_engine_agent, search_engine_task
+from search_agent.search_stage import run_search_stage
 from web_scraping_agent.web_scraping_agent import scraping_agent, scraping_task
+from web_scraping_agent.tools.crawl4ai_tool import Crawl4AIScrapeWebsiteTool
+from web_scraping_agent.tools.extraction_strategy import extraction_cache
+from run_context import (RunContext, new_run_id, RUN_STARTED, ATTEMPT_STARTED, STAGE_STARTED, STAGE_COMPLETED,
+                         QUERIES_GENERATED, SEARCH_RESULT, RESULTS_FILTERED, PRODUCT_EXTRACTED, EXTRACTION_FAILED,
+                         WHOIS_COMPLETED, FALLBACK_USED, RUN_FINISHED)
+from run_store import prune_runs
+from checkpoint import RunCheckpoint
+from url_utils import normalize_url
+from whois_lookup import enrich_products_with_whois
 
 # Setup logging for error tracking (internal only, not shown to user)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def copy_fallback_data():
-    """Copy fallback data from ./fallback to ./ai-agent-output directory"""
+def copy_fallback_data(destination_dir: str = output_dir):
+    """Copy fallback data from ./fallback to the run directory (./ai-agent-output by default)"""
     # Get the project root directory (2 levels up from this script's location)
     script_dir = os.path.dirname(os.path.abspath(__file__))  # app/src/
     project_root = os.path.dirname(os.path.dirname(script_dir))  # diwena_detect/
@@ -34,7 +40,7 @@ def copy_fallback_data():
         for filename in os.listdir(fallback_dir):
             if filename.endswith('.json'):
                 src = os.path.join(fallback_dir, filename)
-                dst = os.path.join(output_dir, filename)
+                dst = os.path.join(destination_dir, filename)
                 shutil.copy2(src, dst)
                 logger.info(f"Copied fallback file: {filename}")
         return True
@@ -61,41 +67,117 @@ def load_fallback_if_needed(file_path, fallback_filename):
             logger.error(f"Failed to load fallback data for {fallback_filename}: {e}")
     return None
 
-def convert_datetimes_to_strings(obj):
-    """Recursively convert datetime objects to strings in a dict/list structure."""
-    if isinstance(obj, dict):
-        return {k: convert_datetimes_to_strings(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_datetimes_to_strings(item) for item in obj]
-    elif isinstance(obj, datetime):
-        return str(obj)
-    else:
-        return obj
-
 # Configuration
 MAX_ATTEMPTS = 3
 base_score_th = 0.1
 base_max_search_results = 1
 
-def run_analysis(product_category: str, excluded_platforms_list: list) -> bool:
+def _task_json(crew_output, task_index: int, step_name: str) -> dict:
+    """JSON output of one crew task, parsed from its raw text if crewai did not parse it."""
+    try:
+        task_output = crew_output.tasks_output[task_index]
+    except (AttributeError, IndexError):
+        logger.error(f"No output for {step_name}")
+        return {}
+    if task_output.json_dict:
+        return task_output.json_dict
+    try:
+        return json.loads(task_output.raw)
+    except (TypeError, json.JSONDecodeError) as e:
+        logger.error(f"Failed to parse {step_name}: {str(e)}")
+        return {}
+
+def _new_crew(agents: list, tasks: list) -> Crew:
+    """
+    Crew over private copies of the shared agents and tasks.
+
+    kickoff() interpolates its inputs into the agents and tasks in place, so
+    concurrent runs (dashboard jobs, batch categories) must not share them.
+    """
+    return Crew(agents=agents, tasks=tasks, process=Process.sequential).copy()
+
+def make_budget(max_attempts: int = None, score_threshold: float = None, max_search_results: int = None,
+                no_keywords: int = None) -> dict:
+    """Per-run search budget, with the module defaults for unset values."""
+    return {
+        "max_attempts": max_attempts or MAX_ATTEMPTS,
+        "score_th": base_score_th if score_threshold is None else score_threshold,
+        "max_search_results": max_search_results or base_max_search_results,
+        "no_keywords": no_keywords or 3,
+    }
+
+def run_analysis(product_category: str, excluded_platforms_list: list, search_mode: str = None, run_id: str = None,
+                 on_event=None, max_attempts: int = None, score_threshold: float = None,
+                 max_search_results: int = None, no_keywords: int = None, use_fallback: bool = True,
+                 url_filter=None, serper_budget=None) -> bool:
     """
     Run the complete analysis workflow with comprehensive error handling.
-    Returns True if successful, False if fallback was used or all attempts failed.
+    search_mode overrides config.SEARCH_MODE ("deterministic" or "agent").
+    Passing the run_id of an interrupted run resumes it from its checkpoint.
+    on_event(event) receives progress events (see run_context) as each stage or item completes.
+    max_attempts, score_threshold, max_search_results (best-ranked results kept over all queries on
+    the first attempt, one more per retry) and no_keywords bound the work of a run; None keeps the
+    module defaults.
+    use_fallback=False reports a run that found nothing as failed instead of copying the fallback data.
+    url_filter(results) -> results drops search results before they are ranked and scraped
+    (the monitor uses it to skip pages it has already seen).
+    serper_budget (rate_limiter.RequestBudget) caps the Serper requests of the run.
+    Returns True if successful (or the fallback data was used), False if all attempts failed.
     """
-    # Retry loop
-    for attempt in range(1, MAX_ATTEMPTS + 1):
-        print(f"\n=== Attempt {attempt}/{MAX_ATTEMPTS} ===")
+    init_telemetry()
+    search_mode = search_mode or SEARCH_MODE
+    run_id = run_id or new_run_id()
+    print(f"Run ID: {run_id}")
 
-        # Adjust parameters for retry attempts
-        current_score_th = base_score_th * (0.9 ** (attempt - 1))  # Lower threshold each attempt
-        current_max_results = base_max_search_results + (attempt - 1)  # Increase max results each attempt
+    # Bound disk usage before this run adds its own directory
+    prune_runs(keep={run_id})
 
-        print(f"Using score_threshold: {current_score_th:.2f}, max_search_results: {current_max_results}")
+    # Stage data stays in memory; the step JSON files are written to the run directory in the background
+    ctx = RunContext(product_category, excluded_platforms_list, run_id=run_id, on_event=on_event)
+    checkpoint = RunCheckpoint.load_or_create(run_id, product_category, excluded_platforms_list)
+    token = ctx.activate()
+    ctx.emit(RUN_STARTED, product_category=product_category, excluded_platforms_list=list(excluded_platforms_list or []))
+    success = False
+    try:
+        budget = make_budget(max_attempts, score_threshold, max_search_results, no_keywords)
+        success = _run_attempts(ctx, checkpoint, product_category, excluded_platforms_list, search_mode,
+                                budget, use_fallback, _reporting_filter(ctx, url_filter), serper_budget)
+        return success
+    finally:
+        ctx.emit(RUN_FINISHED, success=success, products=len(ctx.products))
+        ctx.close()
+        ctx.deactivate(token)
 
-        try:
+def _reporting_filter(ctx: RunContext, url_filter):
+    """Wrap url_filter so that each use emits how many candidates it kept."""
+    if url_filter is None:
+        return None
+
+    def apply(results: list) -> list:
+        kept = list(url_filter(results))
+        ctx.emit(RESULTS_FILTERED, candidates=len(results), kept=len(kept))
+        return kept
+    return apply
+
+def queries_and_search_stage(ctx: RunContext, checkpoint: RunCheckpoint, inputs: dict, search_mode: str,
+                             widen_search: bool, pages: int, url_filter=None, serper_budget=None):
+    """
+    Generate queries (once per run) and search; a retry widens the search instead of regenerating queries.
+
+    In agent mode only the first search of a run uses the search agent: once the queries come from the
+    checkpoint, they are searched by the deterministic search stage instead (logged as a warning).
+    """
+    ctx.emit(STAGE_STARTED, stage="search")
+    saved_queries = checkpoint.stage("queries")
+    if saved_queries is not None:
+        print("Reusing the suggested queries from the checkpoint.")
+        ctx.set_queries(saved_queries.get("queries", []))
+        ctx.emit(QUERIES_GENERATED, queries=ctx.queries)
+    else:
+        if search_mode == "agent":
             # Run first two agents with error handling
             print("Running queries and search agents...")
-            crew1 = Crew(
+            crew1 = _new_crew(
                 agents=[
                     search_queries_recommendation_agent,
                     search_engine_agent,
@@ -104,135 +186,239 @@ def run_analysis(product_category: str, excluded_platforms_list: list) -> bool:
                     search_queries_recommendation_task,
                     search_engine_task,
                 ],
-                process=Process.sequential,
             )
+        else:
+            # Only query generation needs the LLM, search filtering is done in code
+            print("Running queries agent...")
+            crew1 = _new_crew(
+                agents=[
+                    search_queries_recommendation_agent,
+                ],
+                tasks=[
+                    search_queries_recommendation_task,
+                ],
+            )
+
+        results1 = crew1.kickoff(inputs=inputs)
+        ctx.set_queries(_task_json(results1, 0, "step_1_suggested_search_queries").get("queries", []))
+        checkpoint.complete_stage("queries", {"queries": ctx.queries})
+        ctx.persist("step_1_suggested_search_queries.json", {"queries": ctx.queries})
+        ctx.emit(QUERIES_GENERATED, queries=ctx.queries)
+
+        if search_mode == "agent":
+            ctx.set_search_results(_task_json(results1, 1, "step_2_search_results"))
+            if url_filter:
+                ctx.set_search_results(url_filter(ctx.search_results))
+            checkpoint.complete_stage("search", {"results": ctx.search_results})
+            ctx.persist("step_2_search_results.json", {"results": ctx.search_results})
+            _emit_search_results(ctx)
+            return
+
+    saved_search = checkpoint.stage("search")
+    if saved_search is not None and not widen_search:
+        print("Reusing the search results from the checkpoint.")
+        ctx.set_search_results(saved_search)
+        _emit_search_results(ctx)
+        return
 
-            # Inputs for first two agents (with adjusted parameters)
-            inputs_1_2 = {
-                "product_category": product_category,
-                #"platforms_list": [],
-                "excluded_platforms_list": excluded_platforms_list,
-                "no_keywords": 3,
-                "language": "french",
-                "score_th": current_score_th,
-                "max_search_results": current_max_results,
-            }
+    if search_mode == "agent":
+        # The search agent reads its queries from the queries task of the same crew, so saved queries
+        # (a resumed run, or a retry) are searched in code rather than by regenerating them
+        logger.warning(f"Search mode 'agent': searching the {len(ctx.queries)} checkpointed queries "
+                       f"with the deterministic search stage")
 
-            results1 = crew1.kickoff(inputs=inputs_1_2)
-            print("Queries and search agents completed successfully.")
+    # Widening re-reads deeper result pages of the same queries (page 1 is served from the Serper cache)
+    print(f"Running search stage for {len(ctx.queries)} queries ({pages} page(s) each)...")
+    ctx.set_search_results(run_search_stage(
+        ctx.queries,
+        inputs["excluded_platforms_list"],
+        inputs["score_th"],
+        inputs["max_search_results"],
+        pages=pages,
+        url_filter=url_filter,
+        serper_budget=serper_budget,
+    ))
+    checkpoint.complete_stage("search", {"results": ctx.search_results})
+    ctx.persist("step_2_search_results.json", {"results": ctx.search_results})
+    _emit_search_results(ctx)
+
+def _emit_search_results(ctx: RunContext):
+    for result in ctx.search_results:
+        ctx.emit(SEARCH_RESULT, result=result)
+    ctx.emit(STAGE_COMPLETED, stage="search", results=len(ctx.search_results))
+
+def _scraping_stage(ctx: RunContext, checkpoint: RunCheckpoint):
+    """Extract the search result pages not already done in this run. Raises if no product is available."""
+    ctx.emit(STAGE_STARTED, stage="scraping")
+    pending = [result for result in ctx.search_results if not checkpoint.url_done(result.get("url", ""))]
+    if len(pending) < len(ctx.search_results):
+        print(f"{len(ctx.search_results) - len(pending)} pages already extracted in this run, scraping the remaining {len(pending)}.")
+        for product in checkpoint.products():
+            ctx.emit(PRODUCT_EXTRACTED, url=product.get("page_url"), product=dict(product), resumed=True)
+
+    def record(url, product=None, error=None):
+        checkpoint.record_url(url, product=product, error=error)
+        if product is not None:
+            ctx.emit(PRODUCT_EXTRACTED, url=url, product=dict(product))
+        else:
+            ctx.emit(EXTRACTION_FAILED, url=url, error=error)
+
+    if pending and SCRAPING_MODE == "batch":
+        # Fetch and extract all result pages concurrently, without the agent loop
+        print("Search results found! Extracting product pages concurrently...")
+        extracted = Crawl4AIScrapeWebsiteTool().extract_many(pending, on_result=record)
+        for error in extracted.errors:
+            logger.error(f"Extraction failed for {error.url}: {error.error}")
+        print(f"Extracted {len(extracted.products)} products ({len(extracted.errors)} pages failed).")
+        print(f"Extraction cache: {extraction_cache.stats()}")
+    elif pending:
+        # Run scraping agent with error handling
+        print("Search results found! Running web scraping agent...")
+        crew2 = _new_crew(
+            agents=[
+                scraping_agent
+            ],
+            tasks=[
+                scraping_task
+            ],
+        )
+
+        inputs_3 = {
+            "search_results": json.dumps({"results": pending}),
+        }
+
+        results2 = crew2.kickoff(inputs=inputs_3)
+        print("Web scraping agent completed successfully.")
+
+        # Attribute the agent's products back to the pending URLs
+        remaining = {normalize_url(result["url"]): result["url"] for result in pending}
+        for product in _task_json(results2, 0, "step_3_scraped_products").get("products", []):
+            result = ctx.search_result_for(product.get("page_url") or "")
+            url = result["url"] if result else product.get("page_url")
+            if url:
+                remaining.pop(normalize_url(url), None)
+                record(url, product=product)
+        for url in remaining.values():
+            record(url, error="No product extracted by the scraping agent")
+
+    ctx.set_products(checkpoint.products())
+    ctx.emit(STAGE_COMPLETED, stage="scraping", products=len(ctx.products))
+    if not ctx.products:
+        raise RuntimeError("No product could be extracted from the search results")
+
+def _whois_stage(ctx: RunContext):
+    """Post-process: Add WHOIS information with error handling"""
+    ctx.emit(STAGE_STARTED, stage="whois")
+    try:
+        # One concurrent lookup per distinct seller domain, fanned back out to the products
+        lookups = enrich_products_with_whois(
+            ctx.products,
+            on_lookup=lambda domain, info: ctx.emit(WHOIS_COMPLETED, domain=domain, info=info),
+        )
+        print(f"WHOIS information added to scraped products ({len(lookups)} distinct domains).")
+        ctx.emit(STAGE_COMPLETED, stage="whois", domains=len(lookups))
+    except Exception as e:
+        logger.error(f"Error processing WHOIS information: {str(e)}")
+        print(f"Error processing WHOIS: {e}")
+
+def _fall_back(ctx: RunContext, use_fallback: bool) -> bool:
+    """Last attempt failed: copy the fallback data to the run directory, if allowed."""
+    if not use_fallback:
+        print("Fallback data disabled, the analysis failed.")
+        return False
+    print("Using fallback data...")
+    ctx.flush()  # Pending stage writes must land before the fallback files
+    ctx.emit(FALLBACK_USED)
+    if copy_fallback_data(ctx.output_dir):
+        print("Fallback data successfully loaded.")
+        return True  # Indicate success with fallback data
+    else:
+        print("Failed to load fallback data.")
+        return False
+
+def attempt_inputs(product_category: str, excluded_platforms_list: list, budget: dict, attempt: int) -> dict:
+    """Inputs of the queries and search stage, widened on each retry attempt."""
+    # Adjust parameters for retry attempts
+    current_score_th = budget["score_th"] * (0.9 ** (attempt - 1))  # Lower threshold each attempt
+    current_max_results = budget["max_search_results"] + (attempt - 1)  # Increase max results each attempt
+
+    print(f"Using score_threshold: {current_score_th:.2f}, max_search_results: {current_max_results}")
+
+    # Inputs for first two agents (with adjusted parameters)
+    return {
+        "product_category": product_category,
+        #"platforms_list": [],
+        "excluded_platforms_list": excluded_platforms_list,
+        "no_keywords": budget["no_keywords"],
+        "language": "french",
+        "score_th": current_score_th,
+        "max_search_results": current_max_results,
+    }
+
+def _run_attempts(ctx: RunContext, checkpoint: RunCheckpoint, product_category: str, excluded_platforms_list: list,
+                  search_mode: str, budget: dict, use_fallback: bool = True, url_filter=None,
+                  serper_budget=None) -> bool:
+    # Set when the previous attempt found nothing usable, so the next one searches deeper
+    widen_search = False
+    max_attempts = budget["max_attempts"]
+
+    # Retry loop
+    for attempt in range(1, max_attempts + 1):
+        print(f"\n=== Attempt {attempt}/{max_attempts} ===")
+        ctx.emit(ATTEMPT_STARTED, attempt=attempt, max_attempts=max_attempts)
+
+        inputs_1_2 = attempt_inputs(product_category, excluded_platforms_list, budget, attempt)
+
+        try:
+            queries_and_search_stage(ctx, checkpoint, inputs_1_2, search_mode, widen_search, pages=attempt,
+                                     url_filter=url_filter, serper_budget=serper_budget)
+            print("Queries and search stages completed successfully.")
 
         except Exception as e:
             logger.error(f"Agent execution failed on attempt {attempt}: {str(e)}")
             print(f"Agent execution error (attempt {attempt}): {type(e).__name__}")
             
             # Check if this is the last attempt
-            if attempt == MAX_ATTEMPTS:
-                print("All attempts failed. Using fallback data...")
-                if copy_fallback_data():
-                    print("Fallback data successfully loaded.")
-                    return True  # Indicate success with fallback data
-                else:
-                    print("Failed to load fallback data.")
-                    return False
+            if attempt == max_attempts:
+                print("All attempts failed.")
+                return _fall_back(ctx, use_fallback)
             else:
-                print(f"Retrying... ({attempt}/{MAX_ATTEMPTS})")
+                print(f"Retrying... ({attempt}/{max_attempts})")
                 continue
 
-        # Wait 60 seconds to respect Gemini API rate limit (5 RPM)
-        print("Waiting 60 seconds to respect API rate limits...")
-        time.sleep(60)
-        
+        # No fixed pause here: every Gemini call acquires from config.gemini_rate_limiter
 
-        # Load search results with error handling
-        search_results_path = os.path.join(output_dir, "step_2_search_results.json")
-        try:
-            with open(search_results_path, "r") as f:
-                search_data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.error(f"Failed to load search results: {str(e)}")
-            print(f"Error loading search results: {e}")
-            search_data = {"results": []}
-
-        results_list = search_data.get("results", [])
+        results_list = ctx.search_results
         print(f"Found {len(results_list)} search results")
 
         # Check if there are any search results
         if results_list:
             try:
-                # Run scraping agent with error handling
-                print("Search results found! Running web scraping agent...")
-                crew2 = Crew(
-                    agents=[
-                        scraping_agent
-                    ],
-                    tasks=[
-                        scraping_task
-                    ],
-                    process=Process.sequential,
-                )
-
-                inputs_3 = {
-                    "search_results": json.dumps(search_data),
-                }
-
-                results2 = crew2.kickoff(inputs=inputs_3)
-                print("Web scraping agent completed successfully.")
-
-                # Post-process: Add WHOIS information with error handling
-                scraped_products_path = os.path.join(output_dir, "step_3_scraped_products.json")
-                try:
-                    with open(scraped_products_path, "r", encoding="utf-8") as f:
-                        scraped_data = json.load(f)
-                    products = scraped_data.get("products", [])
-                    for product in products:
-                        website = product.get("business_website")
-                        if website:
-                            try:
-                                parsed = urlparse(website)
-                                domain = parsed.netloc or parsed.path
-                                if domain.startswith("www."):
-                                    domain = domain[4:]
-                                w = whois.whois(domain)
-                                product["whois_info"] = convert_datetimes_to_strings(dict(w))
-                            except Exception as e:                        
-                                product["whois_info"] = {"error": str(e)}
-                        else:
-                            product["whois_info"] = None
-                    with open(scraped_products_path, "w", encoding="utf-8") as f:
-                        json.dump(scraped_data, f, indent=2, ensure_ascii=False)
-                    print("WHOIS information added to scraped products.")
-                except Exception as e:
-                    logger.error(f"Error processing WHOIS information: {str(e)}")
-                    print(f"Error processing WHOIS: {e}")
-                
+                _scraping_stage(ctx, checkpoint)
+                _whois_stage(ctx)
+
+                ctx.persist("step_3_scraped_products.json", {"products": ctx.products})
+                checkpoint.mark_completed()
                 return True  # Exit the retry loop and indicate success
             except Exception as e:
                 logger.error(f"Web scraping agent failed: {str(e)}")
                 print(f"Web scraping error: {type(e).__name__}")
+                # Failed URLs are retried next attempt, alongside a wider search
+                widen_search = True
                 
                 # Check if this is the last attempt
-                if attempt == MAX_ATTEMPTS:
-                    print("All attempts failed. Using fallback data...")
-                    if copy_fallback_data():
-                        print("Fallback data successfully loaded.")
-                        return True  # Indicate success with fallback data
-                    else:
-                        print("Failed to load fallback data.")
-                        return False
+                if attempt == max_attempts:
+                    print("All attempts failed.")
+                    return _fall_back(ctx, use_fallback)
                 else:
-                    print(f"Retrying... ({attempt}/{MAX_ATTEMPTS})")
+                    print(f"Retrying... ({attempt}/{max_attempts})")
                     continue
         else:
-            if attempt < MAX_ATTEMPTS:
-                print(f"No search results found. Retrying with adjusted parameters...")
+            widen_search = True
+            if attempt < max_attempts:
+                print("No search results found. Retrying with a wider search...")
             else:
                 print("Maximum attempts reached. No suspicious products detected.")
-                print("Using fallback data...")
-                if copy_fallback_data():
-                    print("Fallback data successfully loaded.")
-                    return True  # Indicate success with fallback data
-                else:
-                    print("Failed to load fallback data.")
-                    return False
+                return _fall_back(ctx, use_fallback)
     
     return False  # Indicate failure if max attempts reached and no results
@@ -0,0 +1,289 @@
+# Developed by Montassar Bellah Abdallah
+
+"""
+Long-running monitor that re-runs configured categories on a schedule.
+
+    python monitor.py --config monitor.json -o monitor.jsonl
+
+Each run only scrapes listings that are new, whose search title changed, or
+whose page changed since it was last checked, so the steady-state cost follows
+new activity rather than catalogue size. Writes one JSON line per run; SIGTERM
+or Ctrl+C stops after the analysis in progress.
+
+Example monitor.json:
+
+    {
+        "interval_minutes": 360,
+        "exclude": ["jumia.com.tn"],
+        "categories": [
+            "parfums",
+            {"category": "montres", "interval_minutes": 720, "max_results": 10}
+        ]
+    }
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import signal
+import sys
+import threading
+import time
+from config import MONITOR_CONFIG, MONITOR_INTERVAL_MINUTES, MONITOR_RECHECK_HOURS, MONITOR_MAX_RESULTS
+from monitor_store import MonitorStore, NEW, CHANGED, FAILED
+from url_utils import normalize_url
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_INTERRUPTED = 130
+
+# Per-category settings accepted in the config file, and the run_analysis parameter they map to
+BUDGET_KEYS = {
+    "max_attempts": "max_attempts",
+    "max_results": "max_search_results",
+    "score_threshold": "score_threshold",
+    "queries": "no_keywords",
+}
+
+
+def load_schedule(path: str) -> list:
+    """Read the monitor config file into a list of category entries with their interval and budget."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    default_interval = float(data.get("interval_minutes", MONITOR_INTERVAL_MINUTES))
+    default_exclude = list(data.get("exclude", []))
+    schedule = []
+    for item in data.get("categories", []):
+        if isinstance(item, str):
+            item = {"category": item}
+        category = (item.get("category") or "").strip()
+        if not category:
+            raise ValueError(f"Monitor config entry without a category: {item!r}")
+        entry = {
+            "category": category,
+            "exclude": list(item.get("exclude", default_exclude)),
+            "interval_minutes": float(item.get("interval_minutes", default_interval)),
+            "budget": {"max_attempts": 1, "max_search_results": MONITOR_MAX_RESULTS},
+        }
+        for key, parameter in BUDGET_KEYS.items():
+            if key in data:
+                entry["budget"][parameter] = data[key]
+            if key in item:
+                entry["budget"][parameter] = item[key]
+        schedule.append(entry)
+    if not schedule:
+        raise ValueError(f"No categories configured in {path}")
+    return schedule
+
+
+class Monitor:
+    """
+    Runs the scheduled categories and keeps the seen-URL store up to date.
+
+    A search result is scraped when its page is unknown, its last scrape
+    failed, its title changed, or it was last checked more than
+    `recheck_hours` ago and its page cache snapshot cannot be revalidated
+    (ETag / Last-Modified) as unchanged.
+    """
+
+    def __init__(self, schedule: list, store: MonitorStore = None, write_line=None,
+                 recheck_hours: float = MONITOR_RECHECK_HOURS):
+        self.schedule = schedule
+        self.store = store or MonitorStore()
+        self.write_line = write_line or (lambda data: None)
+        self.recheck_seconds = recheck_hours * 3600
+        self.stop_event = threading.Event()
+
+    def next_due(self, entry: dict) -> float:
+        last = self.store.last_run(entry["category"])
+        return last[0] + entry["interval_minutes"] * 60 if last else 0.0
+
+    def url_filter(self, category: str):
+        """Search result filter for run_analysis that drops pages already seen and unchanged."""
+
+        def apply(results: list) -> list:
+            from web_scraping_agent.tools.page_cache import page_cache
+            now = time.time()
+            rows = self.store.seen(category, [result.get("url", "") for result in results])
+            keep, still_listed, revalidated = [], [], []
+            for result in results:
+                url = result.get("url", "")
+                row = rows.get(normalize_url(url))
+                if row is None or row["status"] == FAILED:
+                    # Retried every run: the crawl of a failed page is cached, so revalidation would skip it
+                    keep.append(result)
+                elif row["title"] != result.get("title"):
+                    keep.append(result)
+                elif now - row["last_checked"] < self.recheck_seconds:
+                    still_listed.append(url)
+                else:
+                    snapshot = page_cache.get(url)
+                    if snapshot and page_cache.revalidate(url, snapshot):
+                        revalidated.append(url)
+                    else:
+                        keep.append(result)
+            self.store.touch(category, still_listed)
+            self.store.touch(category, revalidated, checked=True)
+            logger.info(f"Monitor {category!r}: {len(keep)} new or changed of {len(results)} search results "
+                        f"({len(revalidated)} revalidated unchanged)")
+            return keep
+
+        return apply
+
+    def run_category(self, entry: dict) -> dict:
+        """Analyze one category, record the pages it scraped and return the run record."""
+        from main_crewai import run_analysis
+        from run_context import (new_run_id, SEARCH_RESULT, RESULTS_FILTERED, PRODUCT_EXTRACTED,
+                                 EXTRACTION_FAILED, FALLBACK_USED)
+        from web_scraping_agent.tools.page_cache import page_cache
+
+        category = entry["category"]
+        run_id = new_run_id()
+        titles, extracted, failed = {}, {}, []
+        state = {"candidates": None, "kept": None, "using_fallback": False}
+
+        def on_event(event):
+            # Called from the pipeline's threads; only collects, the store is updated afterwards
+            if event["type"] == SEARCH_RESULT:
+                titles[event["result"].get("url")] = event["result"].get("title")
+            elif event["type"] == RESULTS_FILTERED:
+                state["candidates"], state["kept"] = event["candidates"], event["kept"]
+            elif event["type"] == PRODUCT_EXTRACTED and not event.get("resumed"):
+                extracted[event["url"]] = event["product"]
+            elif event["type"] == EXTRACTION_FAILED:
+                failed.append(event["url"])
+            elif event["type"] == FALLBACK_USED:
+                state["using_fallback"] = True
+
+        started = time.time()
+        success, error = False, None
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                success = bool(run_analysis(
+                    category,
+                    entry["exclude"],
+                    run_id=run_id,
+                    on_event=on_event,
+                    use_fallback=False,
+                    url_filter=self.url_filter(category),
+                    **entry["budget"],
+                ))
+        except Exception as e:
+            logger.exception(f"Monitor run of {category!r} crashed")
+            error = f"{type(e).__name__}: {e}"
+
+        listings = []
+        for url, product in extracted.items():
+            snapshot = page_cache.get(url) or {}
+            listing_state = self.store.record(category, url, titles.get(url), snapshot.get("content_sha256"))
+            if listing_state in (NEW, CHANGED):
+                listings.append({
+                    "state": listing_state,
+                    "url": url,
+                    "product_title": product.get("product_title"),
+                    "suspicion_score": product.get("suspicion_score"),
+                    "business_website": product.get("business_website"),
+                })
+        for url in failed:
+            self.store.record(category, url, titles.get(url), failed=True)
+
+        if error is None and not success and state["kept"] == 0:
+            status = "no_new_listings"
+        elif success and not state["using_fallback"]:
+            status = "ok"
+        else:
+            status = "failed"
+        self.store.record_run(category, run_id, status, started_at=started)
+
+        return {
+            "record": "monitor_run",
+            "run_id": run_id,
+            "product_category": category,
+            "status": status,
+            "search_candidates": state["candidates"],
+            "scraped": len(extracted) + len(failed),
+            "new_or_changed": listings,
+            "failed_urls": len(failed),
+            "known_urls": self.store.stats(category),
+            "duration_s": round(time.time() - started, 2),
+            "error": error,
+        }
+
+    def run_due(self) -> list:
+        """Run every category whose interval has elapsed; returns their records."""
+        records = []
+        for entry in self.schedule:
+            if self.stop_event.is_set():
+                break
+            if time.time() >= self.next_due(entry):
+                record = self.run_category(entry)
+                self.write_line(record)
+                records.append(record)
+        return records
+
+    def run_forever(self):
+        """Run due categories, then sleep until the next one is due, until stop() is called."""
+        logger.info(f"Monitoring {len(self.schedule)} categories")
+        while not self.stop_event.is_set():
+            self.run_due()
+            wait = min(self.next_due(entry) for entry in self.schedule) - time.time()
+            if wait > 0:
+                logger.info(f"Next monitor run in {wait / 60:.0f} min")
+                self.stop_event.wait(wait)
+        logger.info("Monitor stopped")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-run configured categories on a schedule, scraping only new or changed listings.")
+    parser.add_argument("--config", default=MONITOR_CONFIG, help=f"Monitor config file (default {MONITOR_CONFIG})")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSON Lines output file, appended to ('-' for stdout, the default)")
+    parser.add_argument("--once", action="store_true",
+                        help="Run the categories that are due once and exit (for cron)")
+    args = parser.parse_args(argv)
+
+    try:
+        schedule = load_schedule(args.config)
+    except (OSError, ValueError) as e:
+        parser.error(f"Cannot load {args.config}: {e}")
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+
+    def write_line(data: dict):
+        output.write(json.dumps(data, ensure_ascii=False, default=str) + "\n")
+        output.flush()
+
+    monitor = Monitor(schedule, write_line=write_line)
+
+    def handle_signal(signum, frame):
+        if monitor.stop_event.is_set():
+            raise KeyboardInterrupt
+        logger.warning(f"Received signal {signum}, stopping after the analysis in progress")
+        monitor.stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    try:
+        if args.once:
+            records = monitor.run_due()
+            return EXIT_FAILED if any(record["status"] == "failed" for record in records) else EXIT_OK
+        monitor.run_forever()
+        return EXIT_OK
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# Developed by Montassar Bellah Abdallah
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from config import MONITOR_DB
+from url_utils import normalize_url
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+# Listing states after a monitor run
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+
+class MonitorStore:
+    """
+    SQLite state of the monitoring daemon.
+
+    `seen_urls` remembers every listing page scraped per category, with the
+    search title it was found under and the SHA-256 of its rendered HTML, so
+    later runs can skip pages that have not changed. `schedule` keeps the last
+    run of each category, so a restarted daemon does not rerun everything.
+    """
+
+    def __init__(self, path: str = MONITOR_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen_urls ("
+                "category TEXT NOT NULL, url_key TEXT NOT NULL, url TEXT NOT NULL, title TEXT, "
+                "content_sha256 TEXT, status TEXT, first_seen REAL NOT NULL, last_seen REAL NOT NULL, "
+                "last_checked REAL NOT NULL, PRIMARY KEY (category, url_key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS schedule ("
+                "category TEXT PRIMARY KEY, last_run REAL NOT NULL, run_id TEXT, status TEXT)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _category_key(category: str) -> str:
+        return category.strip().lower()
+
+    def seen(self, category: str, urls: list) -> dict:
+        """Stored rows of the given URLs, keyed by normalized URL."""
+        keys = list({normalize_url(url) for url in urls})
+        rows = {}
+        with closing(self._connect()) as conn:
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                for row in conn.execute(
+                    "SELECT url_key, url, title, content_sha256, status, first_seen, last_seen, last_checked "
+                    f"FROM seen_urls WHERE category = ? AND url_key IN ({','.join('?' * len(chunk))})",
+                    [self._category_key(category)] + chunk,
+                ):
+                    rows[row[0]] = {
+                        "url": row[1], "title": row[2], "content_sha256": row[3], "status": row[4],
+                        "first_seen": row[5], "last_seen": row[6], "last_checked": row[7],
+                    }
+        return rows
+
+    def touch(self, category: str, urls: list, checked: bool = False):
+        """Record that seen pages showed up again in the search (and were revalidated, if `checked`)."""
+        now = time.time()
+        column = "last_seen = ?, last_checked = ?" if checked else "last_seen = ?"
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"UPDATE seen_urls SET {column} WHERE category = ? AND url_key = ?",
+                [((now, now) if checked else (now,)) + (self._category_key(category), normalize_url(url))
+                 for url in urls],
+            )
+
+    def record(self, category: str, url: str, title: str = None, content_sha256: str = None,
+               failed: bool = False) -> str:
+        """Store the outcome of scraping a page and return its state (NEW, CHANGED, UNCHANGED or FAILED)."""
+        now = time.time()
+        key = normalize_url(url)
+        previous = self.seen(category, [url]).get(key)
+        if failed:
+            status = FAILED
+        elif previous is None or previous["status"] == FAILED:
+            status = NEW
+        elif content_sha256 and previous["content_sha256"] and content_sha256 != previous["content_sha256"]:
+            status = CHANGED
+        elif title and previous["title"] != title:
+            status = CHANGED
+        else:
+            status = UNCHANGED
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO seen_urls (category, url_key, url, title, content_sha256, status, first_seen, last_seen, last_checked) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (category, url_key) DO UPDATE SET url = excluded.url, "
+                "title = COALESCE(excluded.title, title), "
+                "content_sha256 = COALESCE(excluded.content_sha256, content_sha256), "
+                "status = excluded.status, last_seen = excluded.last_seen, last_checked = excluded.last_checked",
+                (self._category_key(category), key, url, title, content_sha256, status, now, now, now),
+            )
+        return status
+
+    def last_run(self, category: str):
+        """(timestamp, run_id, status) of the category's last run, or None."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT last_run, run_id, status FROM schedule WHERE category = ?", (self._category_key(category),)
+            ).fetchone()
+
+    def record_run(self, category: str, run_id: str, status: str, started_at: float = None):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO schedule (category, last_run, run_id, status) VALUES (?, ?, ?, ?)",
+                (self._category_key(category), started_at or time.time(), run_id, status),
+            )
+
+    def stats(self, category: str) -> dict:
+        """Number of known pages per state for a category."""
+        with closing(self._connect()) as conn:
+            return dict(conn.execute(
+                "SELECT status, COUNT(*) FROM seen_urls WHERE category = ? GROUP BY status",
+                (self._category_key(category),),
+            ).fetchall())
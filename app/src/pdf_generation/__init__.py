@@ -1,6 +1,32 @@
 # PDF Generation Module for Douane Illicit Product Detector
 # Developed by Montassar Bellah Abdallah
 
-from .pdf_generator import generate_whois_pdf, generate_analysis_pdf
+import importlib
 
-__all__ = ['generate_whois_pdf', 'generate_analysis_pdf']
+# Public names and their submodules; loaded on first access so that importing
+# the package (e.g. for pdf_cache) does not import ReportLab
+_EXPORTS = {
+    'generate_whois_pdf': 'pdf_generator',
+    'generate_analysis_pdf': 'pdf_generator',
+    'export_dossiers_zip': 'dossier_export',
+    'dossier_filename': 'dossier_export',
+    'pdf_cache': 'pdf_cache',
+    'whois_pdf_key': 'pdf_cache',
+    'analysis_pdf_key': 'pdf_cache',
+    'get_whois_pdf': 'pdf_cache',
+    'get_analysis_pdf': 'pdf_cache',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+    # Bind every export of that submodule (this also replaces the `pdf_cache` submodule
+    # attribute set by the import with the cache instance)
+    for export, module_name in _EXPORTS.items():
+        if module_name == _EXPORTS[name]:
+            globals()[export] = getattr(module, export)
+    return globals()[name]
@@ -0,0 +1,114 @@
+# Developed by Montassar Bellah Abdallah
+
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from config import DOSSIER_MAX_WORKERS, DOSSIER_MAX_IN_FLIGHT
+from url_utils import registrable_domain
+from .pdf_generator import get_pdf_generator
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+
+def dossier_filename(index: int, product: dict) -> str:
+    """ZIP entry name of a product dossier, e.g. '007_example.tn_iphone-15-pro.pdf'."""
+    seller = registrable_domain(product.get('page_url') or '') or product.get('business_website') or 'vendeur'
+    title = product.get('product_title') or 'produit'
+    slug = re.sub(r'[^A-Za-z0-9.]+', '-', f"{seller}_{title}").strip('-.')[:80]
+    return f"{index + 1:03d}_{slug or 'produit'}.pdf"
+
+
+def _plain(value):
+    """Plain dict/list copy of a product, so read-only result views can be pickled to the workers."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _render_dossier(product_category: str, product: dict, index: int, directory: str) -> tuple:
+    """Worker process: render one dossier to a temp file and return (index, path)."""
+    path = os.path.join(directory, f"{index:05d}.pdf")
+    get_pdf_generator().generate_dossier_pdf(product_category, product, index, output_path=path)
+    return index, path
+
+
+def _mp_context():
+    # The dashboard forks from a process running threads; forkserver avoids copying their locks
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def export_dossiers_zip(product_category: str, products: list, output, max_workers: int = None,
+                        max_in_flight: int = None, on_progress=None):
+    """
+    Render one dossier PDF per product in worker processes and stream them into a ZIP.
+
+    Each worker writes its PDF to a temp file; the parent adds finished files
+    to the archive as they complete and deletes them, and never has more than
+    `max_in_flight` dossiers pending, so memory does not grow with the number
+    of products. A dossier that fails to render is left out and listed in an
+    ERREURS.txt entry instead of aborting the archive.
+
+    Args:
+        product_category: The product category that was analyzed
+        products: Analyzed products (plain dicts, they are pickled to the workers)
+        output: Path or writable binary file object for the ZIP
+        max_workers: Worker processes (default DOSSIER_MAX_WORKERS, 0 = one per CPU)
+        max_in_flight: Dossiers submitted ahead of the writer (default DOSSIER_MAX_IN_FLIGHT, 0 = twice the workers)
+        on_progress: Optional callback(done, total) after each dossier
+
+    Returns:
+        The `output` argument.
+    """
+    workers = max_workers if max_workers is not None else DOSSIER_MAX_WORKERS
+    workers = max(1, min(workers or os.cpu_count() or 1, len(products) or 1))
+    in_flight = max_in_flight if max_in_flight is not None else DOSSIER_MAX_IN_FLIGHT
+    in_flight = max(workers, in_flight or 2 * workers)
+
+    total = len(products)
+    work_dir = tempfile.mkdtemp(prefix="dossiers-")
+    try:
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+                ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context()) as executor:
+            queue = iter(enumerate(products))
+            pending = {}
+            done = 0
+            failures = []
+            while True:
+                # Keep the window full
+                for index, product in queue:
+                    future = executor.submit(_render_dossier, product_category, _plain(product), index, work_dir)
+                    pending[future] = index
+                    if len(pending) >= in_flight:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = pending.pop(future)
+                    name = dossier_filename(index, products[index])
+                    try:
+                        _, path = future.result()
+                        archive.write(path, name)
+                        os.remove(path)
+                    except Exception as e:
+                        logger.error(f"Dossier {name} failed: {e}")
+                        failures.append(f"{name}: {type(e).__name__}: {e}")
+                    done += 1
+                    if on_progress:
+                        on_progress(done, total)
+            if failures:
+                archive.writestr("ERREURS.txt", "Dossiers non générés:\n" + "\n".join(sorted(failures)) + "\n")
+        logger.info(f"Exported {total - len(failures)} of {total} product dossiers with {workers} workers")
+        return output
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,96 @@
+# Developed by Montassar Bellah Abdallah
+
+import logging
+import threading
+from collections import OrderedDict
+from cache_store import make_cache_key
+from config import PDF_CACHE_MAX_ENTRIES, PDF_CACHE_MAX_MB
+
+# Setup logging for error tracking
+logger = logging.getLogger(__name__)
+
+
+class PDFCache:
+    """
+    Process-wide LRU of generated PDFs, bounded by entry count and total size.
+
+    `get_or_build` builds a missing PDF once even when several sessions ask
+    for it at the same time; the others wait for that build.
+    """
+
+    def __init__(self, max_entries: int = PDF_CACHE_MAX_ENTRIES, max_mb: int = PDF_CACHE_MAX_MB):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_mb * 1024 * 1024
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._building = {}
+
+    def get(self, key: str):
+        """Cached PDF bytes for `key`, or None (never builds)."""
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is not None:
+                self._entries.move_to_end(key)
+            return pdf_bytes
+
+    def get_or_build(self, key: str, build) -> bytes:
+        """Cached PDF bytes for `key`, calling build() to produce them on a miss."""
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                event = self._building.get(key)
+                if event is None:
+                    event = self._building[key] = threading.Event()
+                    break
+            # Another session is building the same PDF
+            event.wait()
+        try:
+            pdf_bytes = build()
+            self._put(key, pdf_bytes)
+            return pdf_bytes
+        finally:
+            with self._lock:
+                del self._building[key]
+            event.set()
+
+    def _put(self, key: str, pdf_bytes: bytes):
+        with self._lock:
+            self._entries[key] = pdf_bytes
+            self._size += len(pdf_bytes)
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+pdf_cache = PDFCache()
+
+
+def whois_pdf_key(domain: str, whois_info: dict = None, error: str = None) -> str:
+    return make_cache_key("whois-pdf", domain, whois_info or {}, error)
+
+
+def analysis_pdf_key(product_category: str, products: list, search_results: list = None,
+                     using_fallback: bool = False) -> str:
+    return make_cache_key("analysis-pdf", product_category, products, search_results or [], bool(using_fallback))
+
+
+def get_whois_pdf(domain: str, whois_info: dict = None, error: str = None) -> bytes:
+    """generate_whois_pdf, built once per distinct input (the generation date is that of the first build)."""
+    from .pdf_generator import generate_whois_pdf  # ReportLab is only loaded once a PDF is built
+    return pdf_cache.get_or_build(
+        whois_pdf_key(domain, whois_info, error),
+        lambda: generate_whois_pdf(domain, whois_info, error),
+    )
+
+
+def get_analysis_pdf(product_category: str, products: list, search_results: list = None,
+                     using_fallback: bool = False) -> bytes:
+    """generate_analysis_pdf, built once per distinct input (the generation date is that of the first build)."""
+    from .pdf_generator import generate_analysis_pdf
+    return pdf_cache.get_or_build(
+        analysis_pdf_key(product_category, products, search_results, using_fallback),
+        lambda: generate_analysis_pdf(product_category, products, search_results, using_fallback),
+    )
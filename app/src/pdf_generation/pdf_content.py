@@ -5,8 +5,9 @@ Handles all content generation logic for both WHOIS and analysis PDFs.
 
 import logging
 from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
 from reportlab.platypus import Paragraph, Spacer, Table, PageBreak
-from reportlab.lib import colors
+from config import PDF_LARGE_REPORT_THRESHOLD, PDF_TABLE_CHUNK_ROWS
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -57,34 +58,44 @@ class PDFContent:
             # Technical Information
             'dnssec': 'Informations Techniques',
             'status': 'Informations Techniques',
-            'statuses': 'Informations Techniques'
+            'statuses': 'Informations Techniques',
+            'source': 'Informations Techniques'
         }
     
     def organize_whois_data(self, whois_info: dict):
-        """Organize WHOIS data into logical sections"""
+        """Organize a normalized domain record (see whois_lookup.rdap_client) into logical sections"""
         sections = {
             "Informations Générales": {},
             "Coordonnées du Propriétaire": {},
+            "Contacts Administratif et Technique": {},
             "Serveurs de Noms (DNS)": {},
             "Dates Importantes": {},
             "Informations Techniques": {}
         }
+        contact_labels = {'admin': 'Admin', 'tech': 'Technique'}
         
         for field, value in whois_info.items():
             field_lower = field.lower()
-            section = None
+            prefix, _, contact_field = field_lower.partition('_')
             
-            # Find the appropriate section for this field
-            for key, sec in self.field_mappings.items():
-                if key in field_lower or field_lower in key:
-                    section = sec
-                    break
-            
-            if section is None:
+            if field_lower in self.field_mappings:
+                section = self.field_mappings[field_lower]
+                display_name = self.format_field_name(field)
+            elif prefix == 'registrant' and contact_field in self.field_mappings:
+                section = 'Coordonnées du Propriétaire'
+                display_name = self.format_field_name(contact_field)
+            elif prefix in contact_labels and contact_field in self.field_mappings:
+                # Administrative and technical contacts are often redacted, only list what is known
+                if not value:
+                    continue
+                section = 'Contacts Administratif et Technique'
+                display_name = f"{self.format_field_name(contact_field)} ({contact_labels[prefix]})"
+            else:
                 section = 'Informations Techniques'
+                display_name = self.format_field_name(field)
             
-            # Format field name for display
-            display_name = self.format_field_name(field)
+            if isinstance(value, list) and not value:
+                value = None
             sections[section][display_name] = value
         
         return sections
@@ -120,7 +131,8 @@ class PDFContent:
             'last_updated': 'Dernière mise à jour',
             'dnssec': 'DNSSEC',
             'status': 'Statut',
-            'statuses': 'Statuts'
+            'statuses': 'Statuts',
+            'source': 'Source (RDAP/WHOIS)'
         }
         
         field_lower = field_name.lower()
@@ -133,31 +145,31 @@ class PDFContent:
             return formatted
 
     def analyze_suspicious_patterns(self, whois_info: dict):
-        """Analyze WHOIS data for suspicious patterns"""
+        """Analyze a normalized domain record for suspicious patterns"""
         suspicious_patterns = []
         
+        def text(field):
+            value = whois_info.get(field)
+            if isinstance(value, list):
+                value = " ".join(str(v) for v in value)
+            return str(value).lower() if value else ''
+        
         try:
-            # Check for recent domain registration (less than 1 year old)
+            # Check for recent domain registration (less than 1 year old); dates are ISO 8601
             creation_date = whois_info.get('creation_date')
             if creation_date:
-                if isinstance(creation_date, str):
-                    try:
-                        # Parse date string
-                        if 'T' in creation_date:
-                            creation_date = datetime.fromisoformat(creation_date.replace('Z', '+00:00'))
-                        else:
-                            creation_date = datetime.strptime(creation_date.split()[0], '%Y-%m-%d')
-                        
-                        # Check if domain is less than 1 year old
-                        if datetime.now() - creation_date < timedelta(days=365):
-                            suspicious_patterns.append("Domaine récemment enregistré (moins d'un an)")
-                    except:
-                        pass
+                try:
+                    creation_date = datetime.fromisoformat(creation_date)
+                    now = datetime.now(creation_date.tzinfo) if creation_date.tzinfo else datetime.now()
+                    if now - creation_date < timedelta(days=365):
+                        suspicious_patterns.append("Domaine récemment enregistré (moins d'un an)")
+                except (TypeError, ValueError):
+                    pass
             
             # Check for privacy protection (often used by suspicious domains)
-            registrant_name = whois_info.get('registrant_name', '').lower()
-            registrant_organization = whois_info.get('registrant_organization', '').lower()
-            registrant_email = whois_info.get('registrant_email', '').lower()
+            registrant_name = text('registrant_name')
+            registrant_organization = text('registrant_organization')
+            registrant_email = text('registrant_email')
             
             privacy_indicators = [
                 'privacy', 'whois', 'protected', 'redacted', 'anonymous', 'proxy'
@@ -172,7 +184,7 @@ class PDFContent:
             
             # Check for suspicious email domains
             if registrant_email:
-                email_domain = registrant_email.split('@')[-1].lower()
+                email_domain = registrant_email.split('@')[-1]
                 suspicious_email_domains = [
                     'tempmail', '10minutemail', 'guerrillamail', 'throwaway',
                     'temp-mail', 'mailtemp', 'disposable'
@@ -185,33 +197,29 @@ class PDFContent:
             
             # Check for missing or incomplete contact information
             required_fields = ['registrant_name', 'registrant_email', 'registrant_country']
-            missing_fields = []
-            
-            for field in required_fields:
-                value = whois_info.get(field)
-                if not value or value.lower() in ['n/a', 'not provided', '']:
-                    missing_fields.append(field)
+            missing_fields = [field for field in required_fields
+                              if text(field) in ['', 'n/a', 'not provided']]
             
             if missing_fields:
                 suspicious_patterns.append(f"Informations de contact incomplètes: {', '.join(missing_fields)}")
             
             # Check for suspicious registrar
-            registrar = whois_info.get('registrar', '').lower()
+            registrar = text('registrar')
             if registrar:
                 suspicious_registrars = ['unknown', 'unavailable', 'not specified']
                 if any(susp_reg in registrar for susp_reg in suspicious_registrars):
                     suspicious_patterns.append("Registrar non spécifié ou inconnu")
             
-            # Check for domain status issues
-            status = whois_info.get('status', '').lower()
-            if status:
-                problematic_statuses = ['suspended', 'inactive', 'pending', 'locked']
-                if any(prob_status in status for prob_status in problematic_statuses):
-                    suspicious_patterns.append(f"Statut de domaine problématique: {status}")
+            # Check for domain status issues (status is a list of EPP/RDAP status values)
+            problematic_statuses = ['suspended', 'inactive', 'pending', 'locked']
+            flagged = [str(status) for status in whois_info.get('status') or []
+                       if any(prob_status in str(status).lower() for prob_status in problematic_statuses)]
+            if flagged:
+                suspicious_patterns.append(f"Statut de domaine problématique: {', '.join(flagged)}")
             
             # Check for short domain name (often used for phishing)
-            domain_name = whois_info.get('domain_name', '')
-            if domain_name and len(domain_name.replace('.tn', '').replace('.com', '').replace('.net', '')) < 5:
+            domain_label = text('domain_name').split('.')[0]
+            if domain_label and len(domain_label) < 5:
                 suspicious_patterns.append("Nom de domaine très court (souvent utilisé pour le phishing)")
             
         except Exception as e:
@@ -256,19 +264,17 @@ class PDFContent:
                     story.append(Paragraph(f"<b>{section_title}</b>", self.styles.get_field_label_style()))
                     story.append(Spacer(1, 5))
                     
-                    for field_name, field_value in section_data.items():
-                        formatted_value = self.styles.format_field_value(field_value)
-                        
-                        # Create table for better alignment
-                        data = [
-                            [Paragraph(f"<b>{field_name}:</b>", self.styles.get_field_label_style()),
-                             Paragraph(formatted_value, self.styles.get_field_value_style())]
-                        ]
-                        
-                        table = Table(data, colWidths=[150, 350])
-                        table.setStyle(self.styles.get_table_style('general'))
-                        
-                        story.append(table)
+                    # One table per section, one row per field
+                    data = [
+                        [Paragraph(f"<b>{field_name}:</b>", self.styles.get_field_label_style()),
+                         Paragraph(escape(self.styles.format_field_value(field_value)), self.styles.get_field_value_style())]
+                        for field_name, field_value in section_data.items()
+                    ]
+                    
+                    table = Table(data, colWidths=[150, 350])
+                    table.setStyle(self.styles.get_table_style('general'))
+                    
+                    story.append(table)
                     
                     story.append(Spacer(1, 10))
         
@@ -298,8 +304,21 @@ class PDFContent:
         
         return story
 
-    def build_analysis_content(self, product_category: str, products: list, search_results: list = None, using_fallback: bool = False):
-        """Build analysis PDF content"""
+    def is_large_report(self, products: list) -> bool:
+        """Whether an analysis report is big enough for consolidated tables"""
+        return len(products) >= PDF_LARGE_REPORT_THRESHOLD
+
+    def build_analysis_content(self, product_category: str, products: list, search_results: list = None, using_fallback: bool = False,
+                               large_report: bool = None):
+        """
+        Build analysis PDF content
+        
+        In large-report mode (automatic from PDF_LARGE_REPORT_THRESHOLD products), products,
+        seller domains and other results are each listed in one consolidated table per
+        section instead of one table and page per product.
+        """
+        if large_report is None:
+            large_report = self.is_large_report(products)
         story = []
         
         # Title section
@@ -344,161 +363,14 @@ class PDFContent:
         story.append(Spacer(1, 20))
         
         # Products Analysis Section
-        if products:
+        if products and large_report:
+            story.extend(self.build_products_tables(products))
+        elif products:
             story.append(Paragraph("🔍 ANALYSE DÉTAILLÉE DES PRODUITS", self.styles.get_field_label_style()))
             story.append(Spacer(1, 15))
             
             for i, product in enumerate(products):
-                story.append(Paragraph(f"Produit {i+1}: {product.get('product_title', 'Non spécifié')}", self.styles.get_field_label_style()))
-                story.append(Spacer(1, 5))
-                
-                # Product details table
-                product_details = []
-                
-                # Price information
-                price_info = "Non disponible"
-                if product.get('product_current_price') is not None:
-                    current_price = product['product_current_price']
-                    original_price = product.get('product_original_price')
-                    discount = product.get('product_discount_percentage')
-                    
-                    if original_price and original_price > current_price:
-                        price_info = f"{current_price:.2f} DT (au lieu de {original_price:.2f} DT) -{-discount:.0f}%"
-                    else:
-                        price_info = f"{current_price:.2f} DT"
-                
-                product_details.extend([
-                    ["Titre du produit:", product.get('product_title', 'Non spécifié')],
-                    ["Prix:", price_info],
-                    ["Score de suspicion:", f"{product.get('suspicion_score', 0)}/100"],
-                    ["URL du produit:", product.get('page_url', 'Non disponible')],
-                    ["Site vendeur:", product.get('business_website', 'Non spécifié')]
-                ])
-                
-                # WHOIS information
-                whois_info = product.get('whois_info')
-                if whois_info and not isinstance(whois_info, dict):
-                    whois_info = {}
-                
-                if whois_info and 'error' not in whois_info:
-                    # Add basic WHOIS info to product details
-                    domain_name = whois_info.get('domain_name', 'Non disponible')
-                    registrar = whois_info.get('registrar', 'Non disponible')
-                    creation_date = whois_info.get('creation_date', 'Non disponible')
-                    
-                    product_details.extend([
-                        ["Domaine enregistré:", domain_name],
-                        ["Registrar:", registrar],
-                        ["Date de création:", str(creation_date)]
-                    ])
-                    
-                    
-                    # Add product details to suspicious patterns section
-                    product_table = Table(product_details, colWidths=[150, 350])
-                    product_table.setStyle(self.styles.get_table_style('suspicious'))
-                    story.append(product_table)
-                    
-                    story.append(Spacer(1, 10))
-                    
-                    # Add suspicion reasons to suspicious patterns section
-                    suspicion_reasons = product.get('suspicion_reasons', [])
-                    if suspicion_reasons:
-                        story.append(Paragraph("Raisons de suspicion:", self.styles.get_field_label_style()))
-                        for reason in suspicion_reasons:
-                            story.append(Paragraph(f"• {reason}", self.styles.get_field_value_style()))
-                    else:
-                        story.append(Paragraph("Raisons de suspicion: Aucune raison spécifique identifiée", self.styles.get_field_value_style()))
-                    
-                    story.append(Spacer(1, 15))
-                    
-                    # Add comprehensive WHOIS analysis section
-                    story.append(Paragraph("📋 INFORMATIONS WHOIS DÉTAILLÉES", self.styles.get_field_label_style()))
-                    story.append(Spacer(1, 5))
-                    
-                    # Domain Registration Section
-                    story.append(Paragraph("Domaine et Enregistrement:", self.styles.get_field_label_style()))
-                    domain_data = []
-                    
-                    # Basic domain info
-                    domain_fields = [
-                        ('domain_name', 'Nom de domaine'),
-                        ('registrar', 'Registrar'),
-                        ('registrar_url', 'URL du Registrar'),
-                        ('registrar_iana_id', 'ID IANA du Registrar'),
-                        ('whois_server', 'Serveur WHOIS'),
-                        ('creation_date', 'Date de création'),
-                        ('updated_date', 'Date de mise à jour'),
-                        ('expiration_date', 'Date d\'expiration'),
-                        ('status', 'Statut'),
-                        ('dnssec', 'DNSSEC')
-                    ]
-                    
-                    for field, label in domain_fields:
-                        value = whois_info.get(field)
-                        if value is not None:
-                            domain_data.append([label, self.styles.safe_str(value)])
-                    
-                    if domain_data:
-                        domain_table = Table(domain_data, colWidths=[150, 350])
-                        domain_table.setStyle(self.styles.get_table_style('domain'))
-                        story.append(domain_table)
-                    
-                    # Contact Information Section
-                    contact_sections = [
-                        ('registrant', 'Contact Registrant'),
-                        ('admin', 'Contact Administratif'),
-                        ('tech', 'Contact Technique')
-                    ]
-                    
-                    for contact_type, section_title in contact_sections:
-                        contact_data = []
-                        
-                        # Check if this contact type exists
-                        contact_prefix = contact_type + '_'
-                        contact_fields = [
-                            (contact_prefix + 'name', 'Nom'),
-                            (contact_prefix + 'first_name', 'Prénom'),
-                            (contact_prefix + 'organization', 'Organisation'),
-                            (contact_prefix + 'address', 'Adresse'),
-                            (contact_prefix + 'address2', 'Adresse (suite)'),
-                            (contact_prefix + 'city', 'Ville'),
-                            (contact_prefix + 'state', 'État/Région'),
-                            (contact_prefix + 'zipcode', 'Code postal'),
-                            (contact_prefix + 'country', 'Pays'),
-                            (contact_prefix + 'phone', 'Téléphone'),
-                            (contact_prefix + 'fax', 'Fax'),
-                            (contact_prefix + 'email', 'Email')
-                        ]
-                        
-                        for field, label in contact_fields:
-                            value = whois_info.get(field)
-                            if value is not None:
-                                contact_data.append([label, self.styles.safe_str(value)])
-                        
-                        if contact_data:
-                            story.append(Paragraph(section_title + ":", self.styles.get_field_label_style()))
-                            contact_table = Table(contact_data, colWidths=[150, 350])
-                            contact_table.setStyle(self.styles.get_table_style('contact'))
-                            story.append(contact_table)
-                    
-                    # Name Servers Section
-                    name_servers = whois_info.get('name_servers') or whois_info.get('nameservers')
-                    if name_servers:
-                        story.append(Paragraph("Serveurs de Noms:", self.styles.get_field_label_style()))
-                        ns_data = [["Serveurs de noms:", ", ".join(self.styles.safe_str(ns) for ns in name_servers)]]
-                        ns_table = Table(ns_data, colWidths=[150, 350])
-                        ns_table.setStyle(self.styles.get_table_style('nameserver'))
-                        story.append(ns_table)
-                    
-                    story.append(Spacer(1, 15))
-                elif whois_info and 'error' in whois_info:
-                    product_details.append(["Informations WHOIS:", f"Erreur: {whois_info['error']}"])
-                else:
-                    product_details.append(["Informations WHOIS:", "Non disponibles"])
-                
-                
-                
-                story.append(Spacer(1, 15))
+                story.extend(self.build_product_section(product, i))
                 
                 # Add page break if not the last product
                 if i < len(products) - 1:
@@ -509,7 +381,9 @@ class PDFContent:
             story.append(Spacer(1, 20))
         
         # Other potential products section
-        if search_results and not using_fallback:
+        if search_results and not using_fallback and large_report:
+            story.extend(self.build_search_results_tables(search_results))
+        elif search_results and not using_fallback:
             story.append(Paragraph("🔎 AUTRES PRODUITS POTENTIELS", self.styles.get_field_label_style()))
             story.append(Spacer(1, 10))
             
@@ -552,4 +426,290 @@ class PDFContent:
             self.styles.get_footer_style()
         ))
         
-        return story
\ No newline at end of file
+        return story
+
+    def _cell(self, text, markup: str = None):
+        """Wrapping table cell; `markup` is trusted ReportLab markup used instead of the escaped text"""
+        return Paragraph(markup if markup is not None else escape(self.styles.safe_str(text)), self.styles.get_table_cell_style())
+
+    def _chunked_tables(self, header: list, rows: list, col_widths: list):
+        """Tables of at most PDF_TABLE_CHUNK_ROWS rows, each repeating the header row"""
+        tables = []
+        for start in range(0, len(rows), PDF_TABLE_CHUNK_ROWS):
+            table = Table([header] + rows[start:start + PDF_TABLE_CHUNK_ROWS], colWidths=col_widths, repeatRows=1)
+            table.setStyle(self.styles.get_table_style('listing'))
+            tables.append(table)
+        return tables
+
+    def _price_text(self, product: dict) -> str:
+        current_price = product.get('product_current_price')
+        if current_price is None:
+            return "Non disponible"
+        original_price = product.get('product_original_price')
+        discount = product.get('product_discount_percentage')
+        if original_price and original_price > current_price:
+            text = f"{current_price:.2f} DT (au lieu de {original_price:.2f} DT)"
+            return f"{text} -{abs(discount):.0f}%" if discount else text
+        return f"{current_price:.2f} DT"
+
+    def build_products_tables(self, products: list):
+        """Large-report sections: all products in one table, then one row per distinct seller domain"""
+        story = [Paragraph("🔍 ANALYSE DÉTAILLÉE DES PRODUITS", self.styles.get_field_label_style()), Spacer(1, 10)]
+        
+        header = ["N°", "Produit", "Prix", "Score", "Vendeur", "Raisons de suspicion"]
+        rows = []
+        domains = {}
+        for i, product in enumerate(products):
+            title = escape(self.styles.safe_str(product.get('product_title') or 'Non spécifié'))
+            url = escape(self.styles.safe_str(product.get('page_url') or ''))
+            reasons = product.get('suspicion_reasons') or []
+            
+            seller = escape(self.styles.safe_str(product.get('business_website') or 'Non spécifié'))
+            whois_info = product.get('whois_info')
+            if isinstance(whois_info, dict) and 'error' not in whois_info:
+                domain = whois_info.get('domain_name') or product.get('business_website')
+                entry = domains.setdefault(domain, {"whois_info": whois_info, "products": 0})
+                entry["products"] += 1
+                seller += f"<br/>Registrar: {escape(self.styles.safe_str(whois_info.get('registrar') or 'Non disponible'))}"
+            elif isinstance(whois_info, dict):
+                seller += "<br/>WHOIS: erreur"
+            
+            rows.append([
+                str(i + 1),
+                self._cell(None, f"{title}<br/><font size=6 color='#6b7280'>{url}</font>"),
+                self._cell(self._price_text(product)),
+                f"{product.get('suspicion_score', 0)}/100",
+                self._cell(None, seller),
+                self._cell(None, "<br/>".join(f"• {escape(self.styles.safe_str(r))}" for r in reasons) or "Aucune"),
+            ])
+        story.extend(self._chunked_tables(header, rows, [24, 150, 70, 40, 111, 140]))
+        story.append(Spacer(1, 20))
+        
+        if domains:
+            story.append(Paragraph("🌐 DOMAINES VENDEURS (WHOIS)", self.styles.get_field_label_style()))
+            story.append(Spacer(1, 10))
+            header = ["Domaine", "Registrar", "Création", "Expiration", "Pays", "Produits"]
+            rows = []
+            for domain, entry in domains.items():
+                whois_info = entry["whois_info"]
+                rows.append([
+                    self._cell(domain),
+                    self._cell(whois_info.get('registrar') or 'Non disponible'),
+                    str(whois_info.get('creation_date') or '')[:10] or 'Non disponible',
+                    str(whois_info.get('expiration_date') or '')[:10] or 'Non disponible',
+                    self.styles.safe_str(whois_info.get('registrant_country') or '-'),
+                    str(entry["products"]),
+                ])
+            story.extend(self._chunked_tables(header, rows, [130, 140, 70, 70, 60, 65]))
+            story.append(Spacer(1, 20))
+        return story
+
+    def build_search_results_tables(self, search_results: list):
+        """Large-report section: other potential products in one table"""
+        story = [Paragraph("🔎 AUTRES PRODUITS POTENTIELS", self.styles.get_field_label_style()), Spacer(1, 10)]
+        rows = [
+            [self._cell(result.get('title', 'Non spécifié')),
+             f"{result.get('score', 0) * 100:.0f}/100",
+             self._cell(result.get('url', 'Non disponible'))]
+            for result in search_results
+        ]
+        story.extend(self._chunked_tables(["Titre", "Score", "URL"], rows, [220, 45, 270]))
+        story.append(Spacer(1, 20))
+        return story
+
+    def build_dossier_content(self, product_category: str, product: dict, index: int):
+        """Build the dossier PDF content of one product"""
+        story = []
+        
+        # Title section
+        story.append(Spacer(1, 12))
+        story.append(Paragraph("Dossier Produit Suspect", self.styles.get_subheader_style()))
+        story.append(Spacer(1, 20))
+        
+        story.append(Paragraph(f"Catégorie analysée: {escape(self.styles.safe_str(product_category))}", self.styles.get_domain_style()))
+        story.append(Spacer(1, 20))
+        
+        # Current date and time
+        current_time = datetime.now().strftime('%d/%m/%Y à %H:%M:%S')
+        story.append(Paragraph(f"Date de génération: {current_time}", self.styles.get_field_value_style()))
+        story.append(Spacer(1, 20))
+        
+        story.extend(self.build_product_section(product, index))
+        
+        # Suspicious patterns of the seller domain
+        whois_info = product.get('whois_info')
+        if isinstance(whois_info, dict) and whois_info and 'error' not in whois_info:
+            story.append(Paragraph("⚠️ INDICATEURS DE RISQUE DU DOMAINE", self.styles.get_field_label_style()))
+            story.append(Spacer(1, 5))
+            patterns = self.analyze_suspicious_patterns(whois_info)
+            for pattern in patterns or ["Aucun indicateur de risque détecté"]:
+                story.append(Paragraph(f"• {pattern}", self.styles.get_field_value_style()))
+            story.append(Spacer(1, 20))
+        
+        # Signature section
+        story.append(Paragraph("📝 SIGNATURE ET VALIDATION", self.styles.get_field_label_style()))
+        story.append(Spacer(1, 20))
+        
+        signature_data = [
+            ["Agent Douanier:", "__________________________"],
+            ["Date d'analyse:", current_time],
+            ["Catégorie analysée:", product_category],
+            ["Validité du document:", "30 jours à compter de la génération"]
+        ]
+        
+        signature_table = Table(signature_data, colWidths=[200, 300])
+        signature_table.setStyle(self.styles.get_table_style('summary'))
+        
+        story.append(signature_table)
+        story.append(Spacer(1, 20))
+        
+        # Footer note
+        story.append(Paragraph(
+            "Ce document est généré automatiquement par le système de détection de produits illicites de la Douane Tunisienne. "
+            "Il contient des informations officielles d'analyse et doit être traité avec confidentialité.",
+            self.styles.get_footer_style()
+        ))
+        
+        return story
+
+    def build_product_section(self, product: dict, index: int):
+        """Details, suspicion reasons and WHOIS record of one product (shared by reports and dossiers)"""
+        story = []
+        
+        title = escape(self.styles.safe_str(product.get('product_title') or 'Non spécifié'))
+        story.append(Paragraph(f"Produit {index+1}: {title}", self.styles.get_field_label_style()))
+        story.append(Spacer(1, 5))
+        
+        # Product details table
+        product_details = []
+        
+        product_details.extend([
+            ["Titre du produit:", product.get('product_title', 'Non spécifié')],
+            ["Prix:", self._price_text(product)],
+            ["Score de suspicion:", f"{product.get('suspicion_score', 0)}/100"],
+            ["URL du produit:", product.get('page_url', 'Non disponible')],
+            ["Site vendeur:", product.get('business_website', 'Non spécifié')]
+        ])
+        
+        # WHOIS information
+        whois_info = product.get('whois_info')
+        if whois_info and not isinstance(whois_info, dict):
+            whois_info = {}
+        
+        if whois_info and 'error' not in whois_info:
+            # Add basic WHOIS info to product details
+            domain_name = whois_info.get('domain_name', 'Non disponible')
+            registrar = whois_info.get('registrar', 'Non disponible')
+            creation_date = whois_info.get('creation_date', 'Non disponible')
+        
+            product_details.extend([
+                ["Domaine enregistré:", domain_name],
+                ["Registrar:", registrar],
+                ["Date de création:", str(creation_date)]
+            ])
+        elif whois_info and 'error' in whois_info:
+            product_details.append(["Informations WHOIS:", f"Erreur: {whois_info['error']}"])
+        else:
+            product_details.append(["Informations WHOIS:", "Non disponibles"])
+        
+        # Product details table
+        product_table = Table(product_details, colWidths=[150, 350])
+        product_table.setStyle(self.styles.get_table_style('suspicious'))
+        story.append(product_table)
+        
+        story.append(Spacer(1, 10))
+        
+        # Suspicion reasons
+        suspicion_reasons = product.get('suspicion_reasons', [])
+        if suspicion_reasons:
+            story.append(Paragraph("Raisons de suspicion:", self.styles.get_field_label_style()))
+            for reason in suspicion_reasons:
+                story.append(Paragraph(f"• {escape(self.styles.safe_str(reason))}", self.styles.get_field_value_style()))
+        else:
+            story.append(Paragraph("Raisons de suspicion: Aucune raison spécifique identifiée", self.styles.get_field_value_style()))
+        
+        story.append(Spacer(1, 15))
+        
+        if whois_info and 'error' not in whois_info:
+            # Add comprehensive WHOIS analysis section
+            story.append(Paragraph("📋 INFORMATIONS WHOIS DÉTAILLÉES", self.styles.get_field_label_style()))
+            story.append(Spacer(1, 5))
+        
+            # Domain Registration Section
+            story.append(Paragraph("Domaine et Enregistrement:", self.styles.get_field_label_style()))
+            domain_data = []
+        
+            # Basic domain info
+            domain_fields = [
+                ('domain_name', 'Nom de domaine'),
+                ('registrar', 'Registrar'),
+                ('registrar_url', 'URL du Registrar'),
+                ('registrar_iana_id', 'ID IANA du Registrar'),
+                ('whois_server', 'Serveur WHOIS'),
+                ('creation_date', 'Date de création'),
+                ('updated_date', 'Date de mise à jour'),
+                ('expiration_date', 'Date d\'expiration'),
+                ('status', 'Statut'),
+                ('dnssec', 'DNSSEC')
+            ]
+        
+            for field, label in domain_fields:
+                value = whois_info.get(field)
+                if value not in (None, [], ''):
+                    domain_data.append([label, self.styles.format_field_value(value)])
+        
+            if domain_data:
+                domain_table = Table(domain_data, colWidths=[150, 350])
+                domain_table.setStyle(self.styles.get_table_style('domain'))
+                story.append(domain_table)
+        
+            # Contact Information Section
+            contact_sections = [
+                ('registrant', 'Contact Registrant'),
+                ('admin', 'Contact Administratif'),
+                ('tech', 'Contact Technique')
+            ]
+        
+            for contact_type, section_title in contact_sections:
+                contact_data = []
+        
+                # Check if this contact type exists
+                contact_prefix = contact_type + '_'
+                contact_fields = [
+                    (contact_prefix + 'name', 'Nom'),
+                    (contact_prefix + 'first_name', 'Prénom'),
+                    (contact_prefix + 'organization', 'Organisation'),
+                    (contact_prefix + 'address', 'Adresse'),
+                    (contact_prefix + 'address2', 'Adresse (suite)'),
+                    (contact_prefix + 'city', 'Ville'),
+                    (contact_prefix + 'state', 'État/Région'),
+                    (contact_prefix + 'zipcode', 'Code postal'),
+                    (contact_prefix + 'country', 'Pays'),
+                    (contact_prefix + 'phone', 'Téléphone'),
+                    (contact_prefix + 'fax', 'Fax'),
+                    (contact_prefix + 'email', 'Email')
+                ]
+        
+                for field, label in contact_fields:
+                    value = whois_info.get(field)
+                    if value not in (None, [], ''):
+                        contact_data.append([label, self.styles.format_field_value(value)])
+        
+                if contact_data:
+                    story.append(Paragraph(section_title + ":", self.styles.get_field_label_style()))
+                    contact_table = Table(contact_data, colWidths=[150, 350])
+                    contact_table.setStyle(self.styles.get_table_style('contact'))
+                    story.append(contact_table)
+        
+            # Name Servers Section
+            name_servers = whois_info.get('name_servers')
+            if name_servers:
+                story.append(Paragraph("Serveurs de Noms:", self.styles.get_field_label_style()))
+                ns_data = [["Serveurs de noms:", ", ".join(self.styles.safe_str(ns) for ns in name_servers)]]
+                ns_table = Table(ns_data, colWidths=[150, 350])
+                ns_table.setStyle(self.styles.get_table_style('nameserver'))
+                story.append(ns_table)
+        
+            story.append(Spacer(1, 15))
+        
+        return story
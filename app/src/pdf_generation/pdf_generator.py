@@ -2,11 +2,12 @@
 
 import os
 import logging
-from datetime import datetime
+import tempfile
+import threading
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import (
-    SimpleDocTemplate, Frame, PageTemplate, PageBreak
+    SimpleDocTemplate, Frame, PageTemplate
 )
 
 # Setup logging for error tracking
@@ -17,6 +18,8 @@ logger = logging.getLogger(__name__)
 pdf_output_dir = "./pdf-output"
 os.makedirs(pdf_output_dir, exist_ok=True)
 
+from config import PDF_SPOOL_MAX_MB
+
 # Import our modular components
 from .pdf_styles import PDFStyles
 from .pdf_content import PDFContent
@@ -86,7 +89,8 @@ class PDFGenerator:
             logger.error(f"Error generating WHOIS PDF for domain {domain}: {str(e)}")
             raise Exception(f"Erreur lors de la génération du PDF WHOIS: {str(e)}")
 
-    def generate_analysis_pdf(self, product_category: str, products: list, search_results: list = None, using_fallback: bool = False):
+    def generate_analysis_pdf(self, product_category: str, products: list, search_results: list = None, using_fallback: bool = False,
+                              large_report: bool = None, output_path: str = None):
         """
         Generate a professional PDF with analysis results
         
@@ -95,13 +99,23 @@ class PDFGenerator:
             products (list): List of analyzed products with their details
             search_results (list, optional): List of search results that weren't fully analyzed
             using_fallback (bool): Whether fallback data is being used
+            large_report (bool, optional): Consolidated tables instead of one page per product;
+                None decides from the number of products
+            output_path (str, optional): Write the PDF to this file instead of returning bytes
         
         Returns:
-            bytes: PDF content as bytes
+            bytes: PDF content as bytes, or output_path when given
         """
+        if large_report is None:
+            large_report = self.content.is_large_report(products)
         try:
-            # Create buffer for PDF
-            buffer = BytesIO()
+            # Large reports are written through a file-backed stream instead of growing a BytesIO
+            if output_path:
+                buffer = open(output_path, 'wb')
+            elif large_report:
+                buffer = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_MB * 1024 * 1024)
+            else:
+                buffer = BytesIO()
             
             # Create document
             doc = SimpleDocTemplate(
@@ -130,23 +144,93 @@ class PDFGenerator:
             
             # Build PDF content using our content module
             story = self.content.build_analysis_content(
-                product_category, products, search_results, using_fallback
+                product_category, products, search_results, using_fallback, large_report=large_report
             )
             
             # Build PDF
-            doc.build(story)
+            with buffer:
+                doc.build(story)
+                
+                # Get PDF content
+                if output_path:
+                    pdf_content = output_path
+                else:
+                    buffer.seek(0)
+                    pdf_content = buffer.read()
             
-            # Get PDF content
-            pdf_content = buffer.getvalue()
-            buffer.close()
-            
-            logger.info(f"Analysis PDF generated successfully for category: {product_category}")
+            logger.info(f"Analysis PDF generated successfully for category: {product_category} "
+                        f"({len(products)} products{', large report' if large_report else ''})")
             return pdf_content
             
         except Exception as e:
             logger.error(f"Error generating analysis PDF for category {product_category}: {str(e)}")
             raise Exception(f"Erreur lors de la génération du PDF d'analyse: {str(e)}")
 
+    def generate_dossier_pdf(self, product_category: str, product: dict, index: int = 0, output_path: str = None):
+        """
+        Generate the dossier PDF of one product (details, WHOIS record, risk indicators)
+        
+        Args:
+            product_category (str): The product category that was analyzed
+            product (dict): The analyzed product
+            index (int): Position of the product in the analysis, used for its title
+            output_path (str, optional): Write the PDF to this file instead of returning bytes
+        
+        Returns:
+            bytes: PDF content as bytes, or output_path when given
+        """
+        try:
+            buffer = open(output_path, 'wb') if output_path else BytesIO()
+            
+            # Create document
+            doc = SimpleDocTemplate(
+                buffer,
+                pagesize=A4,
+                rightMargin=30,
+                leftMargin=30,
+                topMargin=60,
+                bottomMargin=60
+            )
+            
+            # Create page template with header and footer
+            frame = Frame(
+                doc.leftMargin, doc.bottomMargin, doc.width, doc.height,
+                id='normal'
+            )
+            
+            template = PageTemplate(
+                id='dossier_template',
+                frames=frame,
+                onPage=self.styles.create_header,
+                onPageEnd=self.styles.create_footer
+            )
+            
+            doc.addPageTemplates([template])
+            
+            story = self.content.build_dossier_content(product_category, product, index)
+            
+            with buffer:
+                doc.build(story)
+                pdf_content = output_path or buffer.getvalue()
+            
+            return pdf_content
+            
+        except Exception as e:
+            logger.error(f"Error generating dossier PDF for product {index + 1}: {str(e)}")
+            raise Exception(f"Erreur lors de la génération du dossier PDF: {str(e)}")
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_pdf_generator() -> PDFGenerator:
+    """Shared generator, so styles are built once per process"""
+    global _generator
+    with _generator_lock:
+        if _generator is None:
+            _generator = PDFGenerator()
+        return _generator
+
 def generate_whois_pdf(domain: str, whois_info: dict = None, error: str = None):
     """
     Convenience function to generate WHOIS PDF
@@ -159,10 +243,10 @@ def generate_whois_pdf(domain: str, whois_info: dict = None, error: str = None):
     Returns:
         bytes: PDF content as bytes
     """
-    generator = PDFGenerator()
-    return generator.generate_whois_pdf(domain, whois_info or {}, error)
+    return get_pdf_generator().generate_whois_pdf(domain, whois_info or {}, error)
 
-def generate_analysis_pdf(product_category: str, products: list, search_results: list = None, using_fallback: bool = False):
+def generate_analysis_pdf(product_category: str, products: list, search_results: list = None, using_fallback: bool = False,
+                          large_report: bool = None, output_path: str = None):
     """
     Convenience function to generate analysis PDF
     
@@ -171,9 +255,12 @@ def generate_analysis_pdf(product_category: str, products: list, search_results:
         products (list): List of analyzed products with their details
         search_results (list, optional): List of search results that weren't fully analyzed
         using_fallback (bool): Whether fallback data is being used
+        large_report (bool, optional): Force or disable large-report mode (default: by product count)
+        output_path (str, optional): Write the PDF to this file instead of returning bytes
     
     Returns:
-        bytes: PDF content as bytes
+        bytes: PDF content as bytes, or output_path when given
     """
-    generator = PDFGenerator()
-    return generator.generate_analysis_pdf(product_category, products, search_results or [], using_fallback)
\ No newline at end of file
+    return get_pdf_generator().generate_analysis_pdf(
+        product_category, products, search_results or [], using_fallback, large_report, output_path
+    )
\ No newline at end of file
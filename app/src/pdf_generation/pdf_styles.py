@@ -37,6 +37,8 @@ class PDFStyles:
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        # TableStyle objects are immutable once built, so every table of a section type shares one
+        self._table_styles = {}
     
     def _setup_custom_styles(self):
         """Setup custom styles for the PDF"""
@@ -89,6 +91,15 @@ class PDFStyles:
             spaceAfter=8
         ))
         
+        # Compact cell style for the consolidated tables of large reports
+        self.styles.add(ParagraphStyle(
+            name='TableCell',
+            parent=self.styles['Normal'],
+            fontSize=8,
+            leading=10,
+            textColor=COLORS['FIELD_VALUE']
+        ))
+        
         # Footer style
         self.styles.add(ParagraphStyle(
             name='Footer',
@@ -167,7 +178,13 @@ class PDFStyles:
         return str(text)
 
     def get_table_style(self, section_type='general'):
-        """Get appropriate table style based on section type"""
+        """Get appropriate table style based on section type (built once per type)"""
+        table_style = self._table_styles.get(section_type)
+        if table_style is None:
+            table_style = self._table_styles[section_type] = self._build_table_style(section_type)
+        return table_style
+    
+    def _build_table_style(self, section_type):
         base_style = [
             ('GRID', (0, 0), (-1, -1), 1, COLORS['GRID_LINES']),
             ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
@@ -212,6 +229,17 @@ class PDFStyles:
             base_style.extend([
                 ('BACKGROUND', (0, 0), (0, -1), COLORS['SUSPICIOUS_SECTION']),
             ])
+        elif section_type == 'listing':
+            # Multi-column tables with a header row (large reports)
+            base_style.extend([
+                ('BACKGROUND', (0, 0), (-1, 0), COLORS['TABLE_HEADER']),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 8),
+                ('LEFTPADDING', (0, 0), (-1, -1), 4),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+                ('TOPPADDING', (0, 0), (-1, -1), 3),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ])
         
         return TableStyle(base_style)
 
@@ -223,6 +251,10 @@ class PDFStyles:
         """Get field value style"""
         return self.styles['FieldValue']
     
+    def get_table_cell_style(self):
+        """Get compact table cell style"""
+        return self.styles['TableCell']
+    
     def get_header_style(self):
         """Get header style"""
         return self.styles['Header']
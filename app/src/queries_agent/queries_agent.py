@@ -1,8 +1,7 @@
 # Developed by Montassar Bellah Abdallah
 
-import os
 import logging
-from config import basic_llm, output_dir
+from config import basic_llm
 from typing import List
 from pydantic import BaseModel, Field
 from crewai import Agent, Task
@@ -52,7 +51,6 @@ search_queries_recommendation_task = Task(
     ]),
     expected_output="A JSON object containing a list of suggested search queries for detecting illicit products.",
     output_json=SuggestedSearchQueries,
-    output_file=os.path.join(output_dir, "step_1_suggested_search_queries.json"),
     agent=search_queries_recommendation_agent,
     async_execution=False,  # Run synchronously to better handle errors
 )
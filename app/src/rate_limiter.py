@@ -0,0 +1,112 @@
+# Developed by Montassar Bellah Abdallah
+
+import functools
+import logging
+import threading
+import time
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text) -> int:
+    """Rough token count for quota accounting (about 4 characters per token)."""
+    if not text:
+        return 0
+    if isinstance(text, list):
+        # Chat messages: [{"role": ..., "content": ...}, ...]
+        return sum(estimate_tokens(m.get("content") if isinstance(m, dict) else m) for m in text)
+    return len(str(text)) // 4
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket limiting requests and tokens per minute.
+
+    Callers only wait when the budget is actually exhausted; below the limit,
+    `acquire` returns immediately.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int = 0, name: str = "rate-limiter"):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60.0)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60.0)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until one request (and `tokens` tokens) fits the budget. Returns the seconds waited."""
+        if self.requests_per_minute <= 0:
+            return 0.0  # Limiting disabled
+        # A single call larger than the whole bucket only has to wait for a full bucket
+        tokens = min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                missing_requests = 1 - self._requests
+                missing_tokens = tokens - self._tokens if self.tokens_per_minute else 0
+                if missing_requests <= 0 and missing_tokens <= 0:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    if waited:
+                        logger.info(f"{self.name}: waited {waited:.1f}s for quota")
+                    return waited
+                delay = missing_requests * 60.0 / self.requests_per_minute
+                if missing_tokens > 0:
+                    delay = max(delay, missing_tokens * 60.0 / self.tokens_per_minute)
+            time.sleep(delay)
+            waited += delay
+
+
+class RequestBudget:
+    """
+    Fixed number of requests shared by several threads, e.g. the Serper calls of a batch.
+
+    Unlike the rate limiter it never refills: `take` grants what is left and
+    callers skip the rest. A total of 0 means unlimited.
+    """
+
+    def __init__(self, total: int = 0, name: str = "budget"):
+        self.name = name
+        self.total = total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        """Requests left, or None when unlimited."""
+        with self._lock:
+            return max(0, self.total - self.used) if self.total else None
+
+    def take(self, count: int) -> int:
+        """Reserve up to `count` requests and return how many were granted."""
+        with self._lock:
+            granted = count if not self.total else max(0, min(count, self.total - self.used))
+            self.used += granted
+        if granted < count:
+            logger.warning(f"{self.name}: budget of {self.total} requests exhausted, skipping {count - granted}")
+        return granted
+
+
+def limit_llm_calls(llm, limiter: TokenBucketRateLimiter):
+    """Make every `llm.call(messages, ...)` acquire from `limiter` first. Returns the same LLM."""
+    original_call = llm.call
+
+    @functools.wraps(original_call)
+    def call(messages, *args, **kwargs):
+        limiter.acquire(estimate_tokens(messages))
+        return original_call(messages, *args, **kwargs)
+
+    # Bypass pydantic attribute validation on crewai LLM objects
+    object.__setattr__(llm, "call", call)
+    return llm
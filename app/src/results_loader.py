@@ -0,0 +1,167 @@
+# Developed by Montassar Bellah Abdallah
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from config import RESULTS_CACHE_SIZE
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+# Fallback results shipped with the dashboard
+FALLBACK_DIR = os.path.join(os.path.dirname(__file__), '..', 'fallback')
+
+
+def decode_unicode_escapes(text: str) -> str:
+    """Decode Unicode escape sequences in a string."""
+    if isinstance(text, str):
+        try:
+            # First try to decode unicode escapes
+            decoded = text.encode("utf-8").decode("unicode_escape")
+            # Then ensure proper UTF-8 encoding for display
+            return decoded.encode("utf-8").decode("utf-8")
+        except (UnicodeDecodeError, UnicodeEncodeError):
+            try:
+                # Fallback: try direct UTF-8 decoding
+                return text.encode("latin1").decode("utf-8")
+            except:
+                try:
+                    # Additional fallback for double-encoded UTF-8
+                    return text.encode("utf-8").decode("utf-8", errors="ignore")
+                except:
+                    return text
+    return text
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError("Loaded results are shared between sessions and cannot be modified")
+
+
+class FrozenDict(dict):
+    """dict that refuses modification (still a dict for isinstance checks and JSON)."""
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+
+class FrozenList(list):
+    """list that refuses modification (still a list for isinstance checks and JSON)."""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+
+def freeze(value):
+    """Recursively freeze parsed JSON."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+class ResultsUnavailable(Exception):
+    """No results could be loaded; `level` is the Streamlit message kind to show."""
+
+    def __init__(self, message: str, level: str = "error"):
+        super().__init__(message)
+        self.level = level
+
+
+@dataclass(frozen=True)
+class ResultsView:
+    """Normalized, read-only results of one run, ready for display."""
+    products: FrozenList  # suspicion_score on the 0-100 scale, reasons decoded
+    search_results: FrozenList
+    unscraped_results: FrozenList  # Search results without a product, with display_score (0-100)
+    scraped_urls: frozenset
+    using_fallback: bool
+    notices: tuple  # (level, message) pairs to show the user
+
+
+def file_signature(path: str):
+    """(path, mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _read_json(signature) -> dict:
+    with open(signature[0], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _normalize_product(product: dict) -> dict:
+    product = dict(product)
+    # Adjust suspicion_score from 1-10 scale to 0-100 scale
+    product['suspicion_score'] = (product.get('suspicion_score') or 0) * 10
+    # Decode Unicode escapes in suspicion_reasons
+    if product.get('suspicion_reasons'):
+        product['suspicion_reasons'] = [decode_unicode_escapes(reason) for reason in product['suspicion_reasons']]
+    return product
+
+
+@lru_cache(maxsize=RESULTS_CACHE_SIZE)
+def _load(products_sig, search_sig, fallback_products_sig, fallback_search_sig) -> ResultsView:
+    notices = []
+    using_fallback = products_sig is None
+    try:
+        if products_sig is not None:
+            scraped_data = _read_json(products_sig)
+        elif fallback_products_sig is not None:
+            scraped_data = _read_json(fallback_products_sig)
+            notices.append(("info", "Données de secours utilisées pour les produits scrapés."))
+        else:
+            raise ResultsUnavailable("Les fichiers de résultats n'ont pas été trouvés.", level="warning")
+
+        if search_sig is not None:
+            search_data = _read_json(search_sig)
+        elif fallback_search_sig is not None:
+            search_data = _read_json(fallback_search_sig)
+            notices.append(("info", "Données de secours utilisées pour les résultats de recherche."))
+        else:
+            search_data = {"results": []}
+    except json.JSONDecodeError as e:
+        logger.error(f"Unreadable results file: {e}")
+        notices = [("error", "Erreur de lecture des fichiers de résultats. Données de secours utilisées.")]
+        using_fallback = True
+        try:
+            scraped_data = _read_json(fallback_products_sig) if fallback_products_sig else {"products": []}
+            search_data = _read_json(fallback_search_sig) if fallback_search_sig else {"results": []}
+        except Exception:
+            raise ResultsUnavailable("Impossible de charger les données de secours.")
+
+    products = [_normalize_product(product) for product in scraped_data.get('products', [])]
+    search_results = search_data.get('results', [])
+
+    # Search results that were not scraped, with their score on the display scale (0-100)
+    scraped_urls = frozenset(product.get('page_url') for product in products)
+    unscraped_results = [dict(result, display_score=round(result['score'] * 100))
+                         for result in search_results if result['url'] not in scraped_urls]
+
+    return ResultsView(
+        products=freeze(products),
+        search_results=freeze(search_results),
+        unscraped_results=freeze(unscraped_results),
+        scraped_urls=scraped_urls,
+        using_fallback=using_fallback,
+        notices=tuple(notices),
+    )
+
+
+def load_results(scraped_products_path: str, search_results_path: str) -> ResultsView:
+    """
+    Load a run's products and search results, falling back to the bundled data.
+
+    The view is cached on the (path, mtime, size) of every input file, so
+    reruns of the dashboard reuse it until a file actually changes. Raises
+    ResultsUnavailable when there is nothing to show.
+    """
+    return _load(
+        file_signature(scraped_products_path),
+        file_signature(search_results_path),
+        file_signature(os.path.join(FALLBACK_DIR, 'step_3_scraped_products.json')),
+        file_signature(os.path.join(FALLBACK_DIR, 'step_2_search_results.json')),
+    )
@@ -0,0 +1,164 @@
+# Developed by Montassar Bellah Abdallah
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+from config import PERSIST_STAGE_OUTPUTS
+from run_store import run_dir, write_text_atomic
+from url_utils import normalize_url
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+# Progress events sent to RunContext.on_event, in the order a run emits them
+RUN_STARTED = "run_started"
+ATTEMPT_STARTED = "attempt_started"
+STAGE_STARTED = "stage_started"
+STAGE_COMPLETED = "stage_completed"
+QUERIES_GENERATED = "queries_generated"
+SEARCH_RESULT = "search_result"
+RESULTS_FILTERED = "results_filtered"  # Search candidates dropped by run_analysis(url_filter=...)
+PAGE_PRUNED = "page_pruned"  # Page tokens before pruning and as sent to the extraction model
+PRODUCT_EXTRACTED = "product_extracted"
+EXTRACTION_FAILED = "extraction_failed"
+WHOIS_COMPLETED = "whois_completed"
+FALLBACK_USED = "fallback_used"
+RUN_FINISHED = "run_finished"
+
+_active_context = contextvars.ContextVar("active_run_context", default=None)
+# Every active run in the process, for threads that do not inherit the context variable
+_active_runs = []
+_active_runs_lock = threading.Lock()
+
+
+def _base_url(url: str) -> str:
+    """URL without query parameters and fragment, for lenient matching."""
+    parsed = urlparse(normalize_url(url))
+    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+
+
+def new_run_id() -> str:
+    """Sortable unique identifier for one analysis run."""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def get_active_run_context():
+    """
+    The RunContext of the analysis running in this context, or None.
+
+    Worker threads started by a library do not inherit the context variable;
+    they get the process's only active run when there is exactly one.
+    """
+    ctx = _active_context.get()
+    if ctx is None:
+        with _active_runs_lock:
+            if len(_active_runs) == 1:
+                ctx = _active_runs[0]
+    return ctx
+
+
+class RunContext:
+    """
+    In-memory state passed between the stages of one analysis run.
+
+    Holds the suggested queries, the search results indexed by normalized URL
+    and the extracted products. Writing the step JSON files to the run
+    directory is a background side effect (see `persist`), not the way stages
+    hand data to each other. Progress is reported as it happens through
+    `emit`, to the optional `on_event` listener.
+    """
+
+    def __init__(self, product_category: str, excluded_platforms_list: list, run_id: str = None,
+                 output_dir: str = None, persist: bool = PERSIST_STAGE_OUTPUTS, on_event=None):
+        self.run_id = run_id or new_run_id()
+        self.on_event = on_event
+        self.product_category = product_category
+        self.excluded_platforms_list = list(excluded_platforms_list or [])
+        self.output_dir = output_dir or run_dir(self.run_id, create=True)
+        self.queries = []
+        self.search_results = []
+        self.products = []
+        self._results_by_url = {}
+        self._results_by_base_url = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="run-persist") if persist else None
+        self._pending_writes = []
+
+    def activate(self):
+        """Make this context visible to tools running in the current context."""
+        with _active_runs_lock:
+            _active_runs.append(self)
+        return _active_context.set(self)
+
+    def deactivate(self, token):
+        _active_context.reset(token)
+        with _active_runs_lock:
+            _active_runs.remove(self)
+
+    def emit(self, event_type: str, **data):
+        """
+        Send a progress event {"type", "run_id", "timestamp", **data} to the listener.
+
+        May be called from any thread (crawler loop, WHOIS workers); a failing
+        listener is logged and never interrupts the run.
+        """
+        if self.on_event is None:
+            return
+        event = {"type": event_type, "run_id": self.run_id, "timestamp": time.time(), **data}
+        try:
+            self.on_event(event)
+        except Exception as e:
+            logger.error(f"Progress listener failed on {event_type}: {e}")
+
+    def set_queries(self, queries: list):
+        self.queries = list(queries or [])
+
+    def set_search_results(self, results):
+        """Accepts AllSearchResults, its dict form, or a list of result dicts."""
+        if hasattr(results, "model_dump"):
+            results = results.model_dump()
+        if isinstance(results, dict):
+            results = results.get("results", [])
+        self.search_results = list(results or [])
+        self._results_by_url = {}
+        self._results_by_base_url = {}
+        for result in self.search_results:
+            url = result.get("url", "")
+            self._results_by_url.setdefault(normalize_url(url), result)
+            self._results_by_base_url.setdefault(_base_url(url), result)
+
+    def search_result_for(self, url: str):
+        """The search result for `url`, matched on the normalized URL then ignoring the query string."""
+        return self._results_by_url.get(normalize_url(url)) or self._results_by_base_url.get(_base_url(url))
+
+    def set_products(self, products: list):
+        self.products = list(products or [])
+
+    def persist(self, filename: str, data):
+        """Write `data` as JSON to the run directory in the background (no-op when persistence is off)."""
+        if self._writer is None:
+            return
+        path = os.path.join(self.output_dir, filename)
+        # Serialize now so later in-memory changes cannot leak into this snapshot
+        payload = json.dumps(data, indent=2, ensure_ascii=False)
+        self._pending_writes.append(self._writer.submit(write_text_atomic, path, payload))
+
+    def flush(self):
+        """Wait until every pending write has reached the disk."""
+        pending, self._pending_writes = self._pending_writes, []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Failed to persist stage output: {e}")
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
@@ -0,0 +1,85 @@
+# Developed by Montassar Bellah Abdallah
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from config import RUNS_DIR, RUN_RETENTION_MAX_RUNS, RUN_RETENTION_MAX_AGE_DAYS, RUN_RETENTION_GRACE
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+def run_dir(run_id: str, create: bool = False) -> str:
+    """Directory holding every output file of one run."""
+    if not run_id or os.path.basename(run_id) != run_id or run_id.startswith("."):
+        raise ValueError(f"Invalid run ID: {run_id!r}")
+    path = os.path.join(RUNS_DIR, run_id)
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def run_file(run_id: str, filename: str) -> str:
+    return os.path.join(run_dir(run_id), filename)
+
+
+def run_exists(run_id: str) -> bool:
+    try:
+        return os.path.isdir(run_dir(run_id))
+    except ValueError:
+        return False
+
+
+def write_text_atomic(path: str, text: str):
+    """Write a file through a temp file and rename, so readers never see it half-written."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path: str, data, indent: int = 2):
+    write_text_atomic(path, json.dumps(data, indent=indent, ensure_ascii=False))
+
+
+def prune_runs(max_runs: int = RUN_RETENTION_MAX_RUNS, max_age_days: float = RUN_RETENTION_MAX_AGE_DAYS,
+               keep=(), grace: float = RUN_RETENTION_GRACE) -> list:
+    """
+    Delete old run directories and return the removed run IDs.
+
+    Runs older than `max_age_days` are removed, then the oldest ones beyond
+    `max_runs`. A limit of 0 disables it. Runs in `keep` and runs whose
+    directory changed within the last `grace` seconds (still in progress)
+    are never removed.
+    """
+    try:
+        entries = [entry for entry in os.scandir(RUNS_DIR) if entry.is_dir() and not entry.name.startswith(".")]
+    except FileNotFoundError:
+        return []
+    now = time.time()
+    runs = sorted(((entry.stat().st_mtime, entry.name) for entry in entries), reverse=True)  # Newest first
+
+    expired = []
+    for index, (mtime, name) in enumerate(runs):
+        too_many = max_runs and index >= max_runs
+        too_old = max_age_days and now - mtime > max_age_days * 86400
+        if (too_many or too_old) and name not in keep and now - mtime > grace:
+            expired.append(name)
+
+    for name in expired:
+        shutil.rmtree(os.path.join(RUNS_DIR, name), ignore_errors=True)
+    if expired:
+        logger.info(f"Pruned {len(expired)} old runs")
+    return expired
@@ -0,0 +1,15 @@
+# Developed by Montassar Bellah Abdallah
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class SingleSearchResult(BaseModel):
+    title: str
+    url: str = Field(..., title="the product page url")
+    score: float
+    search_query: str
+
+
+class AllSearchResults(BaseModel):
+    results: List[SingleSearchResult]
@@ -2,33 +2,22 @@
 # Developed by Montassar Bellah Abdallah
 
 import logging
-from pydantic import BaseModel, Field
-from typing import List
-import os
 from crewai import Agent, Task
-from config import basic_llm, output_dir
-from .tools.custom_serper_tool import CustomSerperTool
+from config import basic_llm
+from .schema import AllSearchResults
+from .tools.custom_serper_tool import CustomSerperTool, CustomSerperBatchTool
 
 # Setup logging for error tracking (internal only, not shown to user)
 logger = logging.getLogger(__name__)
 
 #Agent 2 - Search Engine Agent
-class SingleSearchResult(BaseModel):
-    title: str
-    url: str = Field(..., title="the product page url")
-    score: float
-    search_query: str
-
-class AllSearchResults(BaseModel):
-    results: List[SingleSearchResult]
-
 search_engine_agent = Agent(
     role="Search Engine Agent",
     goal="To search for suspicious products based on the suggested search queries",
     backstory="The agent is designed to help Tunisian Customs identify illicit products by searching for products based on the suggested search queries from online marketplaces.",
     llm=basic_llm,
     verbose=True,
-    tools=[CustomSerperTool()],
+    tools=[CustomSerperBatchTool(), CustomSerperTool()],
     allow_delegation=False,  # Prevent delegation to avoid additional error points
     max_iter=10,  # Limit iterations to prevent infinite loops
 )
@@ -37,6 +26,7 @@ search_engine_task = Task(
     description="\n".join([
         "The task is to search for suspicious products based on the suggested search queries.",
         "You have to collect results from multiple search queries.",
+        "Prefer the batch search tool to run all the suggested queries in a single call.",
         "Only consider URLs that end with '.tn' to ensure searches are limited to Tunisian domains. Ignore any results from other domains.",
         "Ignore any products that are 'En rupture de stock' (out of stock).",
         "Ignore any suspicious links or links that are not e-commerce product pages.",
@@ -49,7 +39,6 @@ search_engine_task = Task(
     ]),
     expected_output="A JSON object containing the search results for suspicious products.",
     output_json=AllSearchResults,
-    output_file=os.path.join(output_dir, "step_2_search_results.json"),
     agent=search_engine_agent,
     async_execution=False,  # Run synchronously to better handle errors
     timeout=300,  # 5 minute timeout to prevent hanging
@@ -0,0 +1,84 @@
+# Developed by Montassar Bellah Abdallah
+
+import logging
+import re
+from urllib.parse import urlparse
+from config import PRICE_COMPARATOR_DOMAINS, SEARCH_TLD
+from url_utils import normalize_url
+from .schema import SingleSearchResult, AllSearchResults
+from .tools.serper_client import get_serper_client, parse_organic
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+def _platform_host(platform: str) -> str:
+    """Reduce 'https://www.site.tn/path' or 'www.site.tn' to 'site.tn'."""
+    platform = platform.strip().lower()
+    host = urlparse(platform if "://" in platform else f"//{platform}").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class SearchResultFilter:
+    """
+    Code version of the search task's rules: keep only `.tn` pages, drop price
+    comparators and excluded platforms, and apply the score threshold.
+    """
+
+    def __init__(self, excluded_platforms: list = None, score_th: float = 0.0,
+                 tld: str = SEARCH_TLD, comparator_domains: list = PRICE_COMPARATOR_DOMAINS):
+        self.score_th = score_th
+        self.tld = tld.lower()
+        blocked = {_platform_host(p) for p in list(comparator_domains) + list(excluded_platforms or [])}
+        blocked.discard("")
+        # Matches a blocked domain and any of its subdomains
+        self._blocked = re.compile(
+            r"(^|\.)(" + "|".join(re.escape(d) for d in sorted(blocked)) + r")$"
+        ) if blocked else None
+
+    def accepts(self, result: dict) -> bool:
+        host = (urlparse(result.get("url", "")).hostname or "").lower()
+        if not host or not host.endswith(self.tld):
+            return False
+        if self._blocked and self._blocked.search(host):
+            return False
+        return result.get("score", 0.0) >= self.score_th
+
+
+def run_search_stage(queries: list, excluded_platforms_list: list, score_th: float, max_search_results: int,
+                     pages: int = 1, url_filter=None, serper_budget=None) -> AllSearchResults:
+    """
+    Search every query without the LLM agent and filter the results in code.
+
+    Args:
+        queries (list): Suggested search queries from step 1
+        excluded_platforms_list (list): Domains to drop
+        score_th (float): Minimum position score to keep
+        max_search_results (int): Maximum number of results kept
+        pages (int): Result pages fetched per query
+        url_filter (callable, optional): Takes and returns a list of result dicts; applied
+            before the results are ranked and capped (e.g. to drop already seen pages)
+        serper_budget (RequestBudget, optional): Serper requests shared with other searches
+
+    Returns:
+        AllSearchResults: The best-scored distinct pages
+    """
+    searches = [(query, page) for query in queries for page in range(1, max(1, pages) + 1)]
+    # All queries go out together as batch requests
+    responses = get_serper_client().search_many(searches, budget=serper_budget)
+
+    result_filter = SearchResultFilter(excluded_platforms_list, score_th)
+    best = {}
+    for (query, page), data in zip(searches, responses):
+        for result in parse_organic(data, query, page):
+            if not result_filter.accepts(result):
+                continue
+            key = normalize_url(result["url"])
+            if key not in best or result["score"] > best[key]["score"]:
+                best[key] = result
+
+    candidates = url_filter(list(best.values())) if url_filter else best.values()
+    ranked = sorted(candidates, key=lambda r: r["score"], reverse=True)[:max(0, max_search_results)]
+    search_results = AllSearchResults(results=[SingleSearchResult(**r) for r in ranked])
+    logger.info(f"Search stage kept {len(ranked)} of {sum(len(d.get('organic', [])) for d in responses)} results")
+    return search_results
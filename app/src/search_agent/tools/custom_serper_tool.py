@@ -1,42 +1,31 @@
 # Developed by Montassar Bellah Abdallah
 
-import requests
 import json
+from typing import List, Optional
 from crewai.tools import BaseTool
-from config import SERPER_API_KEY
+from config import SERPER_CACHE_BYPASS
+from .serper_client import get_serper_client, parse_organic
+
 
 class CustomSerperTool(BaseTool):
     name: str = "Custom Serper Search"
-    description: str = "Search the web using Serper API with Tunisian location settings"
+    description: str = "Search the web using Serper API with Tunisian location settings. Optional time_range: day, week, month or year."
+    bypass_cache: bool = SERPER_CACHE_BYPASS
 
-    def _run(self, query: str) -> str:
-        url = "https://google.serper.dev/search"
+    def _run(self, query: str, page: int = 1, time_range: Optional[str] = None) -> str:
+        data = get_serper_client().search(query, page or 1, time_range, self.bypass_cache)
+        return json.dumps({"results": parse_organic(data, query, page or 1)})
 
-        payload = json.dumps({
-            "q": query,
-            "location": "Tunisia",
-            "gl": "tn",
-            "hl": "fr"
-        })
-        headers = {
-            'X-API-KEY': SERPER_API_KEY,
-            'Content-Type': 'application/json'
-        }
 
-        response = requests.post(url, headers=headers, data=payload)
-        data = response.json()
+class CustomSerperBatchTool(BaseTool):
+    name: str = "Custom Serper Batch Search"
+    description: str = "Run several search queries at once with the Serper API (Tunisian location settings). Set pages above 1 to fetch deeper result pages. Optional time_range: day, week, month or year."
+    bypass_cache: bool = SERPER_CACHE_BYPASS
 
-        # Parse organic results
+    def _run(self, queries: List[str], pages: int = 1, time_range: Optional[str] = None) -> str:
+        searches = [(query, page) for query in queries for page in range(1, max(1, pages) + 1)]
+        responses = get_serper_client().search_many(searches, time_range, self.bypass_cache)
         results = []
-        if 'organic' in data:
-            for i, result in enumerate(data['organic']):
-                score = max(0.1, 1.0 - (i / 10.0))  # Decreasing score based on position
-                results.append({
-                    "title": result.get("title", ""),
-                    "url": result.get("link", ""),
-                    "score": score,
-                    "search_query": query
-                })
-
+        for (query, page), data in zip(searches, responses):
+            results.extend(parse_organic(data, query, page))
         return json.dumps({"results": results})
-#TODO: Add time range filter to the search query (day, week, month, year)
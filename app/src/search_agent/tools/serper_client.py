@@ -0,0 +1,149 @@
+# Developed by Montassar Bellah Abdallah
+
+import json
+import logging
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (
+    SERPER_API_KEY, CACHE_DIR, SERPER_CACHE_TTL, SERPER_TIMEOUT, SERPER_MAX_RETRIES,
+    SERPER_POOL_SIZE, SERPER_BATCH_SIZE,
+)
+from cache_store import SQLiteCache, make_cache_key
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+SERPER_SEARCH_URL = "https://google.serper.dev/search"
+
+# Google "tbs" values for the supported time range filters
+TIME_RANGES = {
+    "day": "qdr:d",
+    "week": "qdr:w",
+    "month": "qdr:m",
+    "year": "qdr:y",
+}
+
+# Raw Serper responses keyed by (query, location, gl, hl, page, time range)
+serper_cache = SQLiteCache(os.path.join(CACHE_DIR, "serper_cache.sqlite3"), default_ttl=SERPER_CACHE_TTL)
+
+
+def parse_organic(data: dict, query: str, page: int = 1) -> list:
+    """Convert a Serper response to search results scored by overall position."""
+    results = []
+    offset = ((page or 1) - 1) * 10
+    for i, result in enumerate(data.get('organic', [])):
+        score = max(0.1, 1.0 - ((offset + i) / 10.0))  # Decreasing score based on position
+        results.append({
+            "title": result.get("title", ""),
+            "url": result.get("link", ""),
+            "score": score,
+            "search_query": query
+        })
+    return results
+
+
+class SerperClient:
+    """
+    Serper search client with keep-alive pooling, timeouts and retries.
+
+    Several (query, page) searches are sent as one batch request, and every
+    response goes through the shared Serper cache.
+    """
+
+    def __init__(self, api_key: str = SERPER_API_KEY, timeout: float = SERPER_TIMEOUT,
+                 max_retries: int = SERPER_MAX_RETRIES, pool_size: int = SERPER_POOL_SIZE,
+                 batch_size: int = SERPER_BATCH_SIZE, cache: SQLiteCache = serper_cache):
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self.session = requests.Session()
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["POST"]),
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            'X-API-KEY': api_key or "",
+            'Content-Type': 'application/json'
+        })
+
+    @staticmethod
+    def build_params(query: str, page: int = 1, time_range: str = None) -> dict:
+        params = {
+            "q": query,
+            "location": "Tunisia",
+            "gl": "tn",
+            "hl": "fr"
+        }
+        if page and page > 1:
+            params["page"] = page
+        if time_range in TIME_RANGES:
+            params["tbs"] = TIME_RANGES[time_range]
+        return params
+
+    @staticmethod
+    def _cache_key(params: dict, time_range: str = None) -> str:
+        return make_cache_key(params["q"], params["location"], params["gl"], params["hl"], params.get("page", 1), time_range)
+
+    def search(self, query: str, page: int = 1, time_range: str = None, bypass_cache: bool = False) -> dict:
+        """Raw Serper response for one query page."""
+        return self.search_many([(query, page)], time_range, bypass_cache)[0]
+
+    def search_many(self, searches: list, time_range: str = None, bypass_cache: bool = False, budget=None) -> list:
+        """
+        Run several searches in as few round trips as possible.
+
+        Args:
+            searches (list): (query, page) tuples
+            time_range (str, optional): day, week, month or year
+            bypass_cache (bool): Ignore cached responses
+            budget (RequestBudget, optional): Shared request budget; cached answers are free,
+                searches beyond the budget get an empty response
+
+        Returns:
+            list: Raw Serper responses, in the same order as `searches`
+        """
+        params_list = [self.build_params(query, page, time_range) for query, page in searches]
+        keys = [self._cache_key(params, time_range) for params in params_list]
+        responses = [None if bypass_cache else self.cache.get(key) for key in keys]
+
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if budget is not None:
+            granted = budget.take(len(missing))
+            for i in missing[granted:]:
+                responses[i] = {}
+            missing = missing[:granted]
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            for i, data in zip(chunk, self._post([params_list[i] for i in chunk])):
+                responses[i] = data
+                # Only successful answers are cached, errors are retried next time
+                if 'organic' in data:
+                    self.cache.set(keys[i], data)
+        return responses
+
+    def _post(self, params_list: list) -> list:
+        payload = params_list[0] if len(params_list) == 1 else params_list
+        response = self.session.post(SERPER_SEARCH_URL, data=json.dumps(payload), timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        return data if isinstance(data, list) else [data]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_serper_client() -> SerperClient:
+    """Return the process-wide Serper client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SerperClient()
+        return _client
@@ -0,0 +1,65 @@
+# Developed by Montassar Bellah Abdallah
+
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "srsltid", "_ga", "ref"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys and lookups.
+
+    Lowercases scheme and host, drops default and invalid ports, fragments and
+    tracking parameters, sorts the remaining query string and strips a trailing slash.
+    """
+    if not url:
+        return ""
+    parsed = urlparse(url.strip())
+    scheme = (parsed.scheme or "http").lower()
+    host = (parsed.hostname or "").lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        # Out-of-range or non-numeric port: keep the host alone rather than fail the lookup
+        port = None
+    netloc = host
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        netloc = f"{host}:{port}"
+    path = parsed.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    return urlunparse((scheme, netloc, path, "", urlencode(query), ""))
+
+
+def website_domain(website: str) -> str:
+    """Bare host of a business website ('https://www.Shop.tn/x' -> 'shop.tn'), or '' if there is none."""
+    if not website:
+        return ""
+    website = website.strip()
+    parsed = urlparse(website if "://" in website else f"//{website}")
+    host = (parsed.hostname or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+# Second-level registries under which the registrable domain has three labels
+MULTI_LABEL_SUFFIXES = {
+    "com.tn", "net.tn", "org.tn", "ens.tn", "fin.tn", "gov.tn", "ind.tn", "info.tn", "intl.tn",
+    "nat.tn", "perso.tn", "tourism.tn", "edunet.tn", "rnrt.tn", "rns.tn", "rnu.tn", "mincom.tn",
+    "agrinet.tn", "defense.tn", "turen.tn",
+    "co.uk", "org.uk", "com.au", "com.br", "co.za", "com.cn", "com.tr", "co.ma", "com.eg", "com.dz",
+}
+
+
+def registrable_domain(host: str) -> str:
+    """Domain that is actually registered for a host ('shop.vendor.com.tn' -> 'vendor.com.tn')."""
+    host = website_domain(host)
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
@@ -18,8 +18,14 @@ class SingleExtractedProduct(BaseModel):
     suspicion_reasons: List[str] = Field(title="Reasons why this product is flagged as potentially illicit or counterfeit", default_factory=list)
 
 
+class ExtractionError(BaseModel):
+    url: str = Field(title="The page url that could not be extracted")
+    error: str = Field(title="Why the extraction failed")
+
+
 class AllExtractedProducts(BaseModel):
     products: List[SingleExtractedProduct]
+    errors: List[ExtractionError] = Field(title="Per-URL extraction failures", default_factory=list)
 
 
 def generate_schema_string(model):
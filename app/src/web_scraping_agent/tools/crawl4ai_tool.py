@@ -2,108 +2,262 @@
 
 import asyncio
 import json
-import os
-import time
+import logging
 import traceback
-from crawl4ai import AsyncWebCrawler, LLMExtractionStrategy, LLMConfig, CrawlerRunConfig
+from concurrent.futures import ThreadPoolExecutor
+from crawl4ai import LLMConfig, CrawlerRunConfig, SemaphoreDispatcher, DefaultMarkdownGenerator, PruningContentFilter
 from crewai.tools import BaseTool
-from ..schema import SingleExtractedProduct, generate_schema_string
-from config import GOOGLE_API_KEY, output_dir
+from ..schema import SingleExtractedProduct, AllExtractedProducts, ExtractionError, generate_schema_string
+from .crawler_pool import get_crawler_pool
+from .extraction_strategy import ProductExtractionStrategy, cap_sections
+from .page_cache import page_cache
+from config import (GOOGLE_API_KEY, SCRAPE_CONCURRENCY, EXTRACTION_PRUNING, EXTRACTION_PRUNING_THRESHOLD,
+                    EXTRACTION_EXCLUDED_TAGS, EXTRACTION_EXCLUDED_SELECTOR, EXTRACTION_TARGET_SELECTORS)
+from rate_limiter import estimate_tokens
+from url_utils import normalize_url
+from run_context import get_active_run_context, PAGE_PRUNED
 import sys
 
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
 # Add at the top of the file
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+EXTRACTION_INSTRUCTION = "Extract product information from this e-commerce product page. Extract exactly one product object with whatever information is available. Include title, image URL, product URL, current price, original price if discounted, discount percentage. Also provide suspicion reasons based on available data and indicators like low price, missing brand info, or suspicious seller. Do not assign suspicion_score - it will be set from search relevance. All fields are optional."
+
+
+def score_to_suspicion(score: float) -> int:
+    """Convert a 0-1 search score to a 1-10 suspicion_score."""
+    return max(1, min(10, round(score * 10)))
+
+
 def get_search_score_for_url(url: str) -> int:
-    """Get the search score for a URL from step_2_search_results.json and convert to suspicion_score (1-10)."""
-    from urllib.parse import urlparse
-    search_results_path = os.path.join(output_dir, "step_2_search_results.json")
-    try:
-        with open(search_results_path, 'r', encoding='utf-8') as f:
-            search_data = json.load(f)
-
-        # Extract base URL (without query parameters and fragments) for comparison
-        parsed_input_url = urlparse(url)
-        input_base_url = f"{parsed_input_url.scheme}://{parsed_input_url.netloc}{parsed_input_url.path}"
-
-        for result in search_data.get('results', []):
-            result_url = result.get('url', '')
-            parsed_result_url = urlparse(result_url)
-            result_base_url = f"{parsed_result_url.scheme}://{parsed_result_url.netloc}{parsed_result_url.path}"
-
-            # Match by base URL (ignoring query parameters)
-            if input_base_url == result_base_url:
-                score = result.get('score', 0.0)
-                # Convert 0-1 score to 1-10 suspicion_score
-                suspicion_score = max(1, min(10, round(score * 10)))
-                return suspicion_score
-    except (FileNotFoundError, json.JSONDecodeError, KeyError):
-        pass
+    """Get the search score for a URL from the active run and convert to suspicion_score (1-10)."""
+    ctx = get_active_run_context()
+    result = ctx.search_result_for(url) if ctx is not None else None
+    if result:
+        return score_to_suspicion(result.get('score', 0.0))
     return 1  # Default low suspicion if not found
 
 
+def build_extraction_config() -> CrawlerRunConfig:
+    """Build the crawler run config with the Gemini product extraction strategy."""
+    # Generate schema string from Pydantic model
+    schema_str = generate_schema_string(SingleExtractedProduct)
+
+    # Create LLM extraction strategy for product details (rate limited by the shared Gemini quota)
+    extraction_strategy = ProductExtractionStrategy(
+        llm_config=LLMConfig(
+            provider="gemini/gemini-2.5-flash",
+            api_token=GOOGLE_API_KEY,
+        ),
+        instruction=EXTRACTION_INSTRUCTION,
+        extract_type="schema",
+        # The pruned markdown; crawl4ai falls back to the full markdown when pruning left nothing
+        input_format="fit_markdown" if EXTRACTION_PRUNING else "markdown",
+        schema=schema_str,
+        extra_args={
+            "temperature": 0.0,
+            "max_tokens": 4096,
+        },
+        verbose=True,
+    )
+
+    if not EXTRACTION_PRUNING:
+        return CrawlerRunConfig(extraction_strategy=extraction_strategy,
+                                target_elements=EXTRACTION_TARGET_SELECTORS or None)
+
+    # Drop page chrome before markdown generation, then score the remaining blocks by text and link density
+    return CrawlerRunConfig(
+        extraction_strategy=extraction_strategy,
+        markdown_generator=DefaultMarkdownGenerator(
+            content_filter=PruningContentFilter(threshold=EXTRACTION_PRUNING_THRESHOLD, threshold_type="dynamic"),
+        ),
+        excluded_tags=EXTRACTION_EXCLUDED_TAGS,
+        excluded_selector=EXTRACTION_EXCLUDED_SELECTOR or None,
+        target_elements=EXTRACTION_TARGET_SELECTORS or None,
+    )
+
+
+def report_pruning(url: str, result, on_pruned=None):
+    """
+    Log the page's token count before pruning and as sent to the extraction model, and report it
+    to on_pruned(url, raw_tokens, input_tokens), or else as a PAGE_PRUNED event of the active run.
+    """
+    markdown = result.markdown
+    raw = getattr(markdown, "raw_markdown", None) or str(markdown or "")
+    fit = getattr(markdown, "fit_markdown", None) if EXTRACTION_PRUNING else None
+    raw_tokens = estimate_tokens(raw)
+    input_tokens = sum(estimate_tokens(section) for section in cap_sections([fit or raw]))
+    saved = 1 - input_tokens / raw_tokens if raw_tokens else 0.0
+    logger.info(f"Extraction input for {url}: {raw_tokens} -> {input_tokens} tokens ({saved:.0%} pruned)")
+    if on_pruned is not None:
+        on_pruned(url, raw_tokens, input_tokens)
+        return
+    ctx = get_active_run_context()
+    if ctx is not None:
+        ctx.emit(PAGE_PRUNED, url=url, raw_tokens=raw_tokens, input_tokens=input_tokens)
+
+
+def parse_extracted_content(extracted_json: str, suspicion_score: int, page_url: str = None) -> dict:
+    """Turn the strategy's raw JSON into one validated product dict. Raises ValueError on failure."""
+    data = json.loads(extracted_json)
+    # Handle if data is a list (take the most suspicious product)
+    if isinstance(data, list):
+        # Drop the error blocks crawl4ai appends when a chunk fails
+        data = [item for item in data if isinstance(item, dict) and not item.get('error')]
+        if len(data) == 0:
+            # No products extracted
+            raise ValueError("No product data extracted from page")
+        elif len(data) == 1:
+            data = data[0]
+        else:
+            # Take the product with the highest suspicion_score (default to 0 for None)
+            data = max(data, key=lambda x: x.get('suspicion_score') or 0)
+    if not isinstance(data, dict) or 'error' in data:
+        raise ValueError(data.get('error') if isinstance(data, dict) else "Unexpected extraction output")
+    # Set suspicion_score from search results
+    data['suspicion_score'] = suspicion_score
+    if page_url and not data.get('page_url'):
+        data['page_url'] = page_url
+    # Validate against Pydantic model
+    return SingleExtractedProduct(**data).model_dump()
+
+
 class Crawl4AIScrapeWebsiteTool(BaseTool):
     name: str = "Crawl4AI Website Scraper"
     description: str = "Scrape website content using Crawl4AI with LLM for structured product extraction"
 
     def _run(self, url: str) -> str:
         """Scrape the given URL using Crawl4AI with LLM extraction and return structured product data as JSON."""
-        # Generate schema string from Pydantic model
-        schema_str = generate_schema_string(SingleExtractedProduct)
-
-        # Create LLM extraction strategy for product details
-        extraction_strategy = LLMExtractionStrategy(
-            llm_config=LLMConfig(
-                provider="gemini/gemini-2.5-flash",
-                api_token=GOOGLE_API_KEY,
-            ),
-            instruction="Extract product information from this e-commerce product page. Extract exactly one product object with whatever information is available. Include title, image URL, product URL, current price, original price if discounted, discount percentage. Also provide suspicion reasons based on available data and indicators like low price, missing brand info, or suspicious seller. Do not assign suspicion_score - it will be set from search relevance. All fields are optional.",
-            extract_type="schema",
-            schema=schema_str,
-            extra_args={
-                "temperature": 0.0,
-                "max_tokens": 4096,
-            },
-            verbose=True,
-        )
-
-        config = CrawlerRunConfig(extraction_strategy=extraction_strategy)
-
-        async def scrape():
+        config = build_extraction_config()
+        # Serve fresh or revalidated snapshots to the extractor without a network fetch
+        snapshot = page_cache.lookup(url)
+        target = f"raw:{snapshot['html']}" if snapshot else url
+
+        async def scrape(crawler):
+            results = await crawler.arun(target, config=config)
+            return results[0] if results else None
+
+        def scrape_with_pool():
+            # Reuse the shared, pre-warmed browser instead of starting Chromium per URL
             try:
-                async with AsyncWebCrawler() as crawler:
-                    results = await crawler.arun(url, config=config)
-                    if results and results[0].success:
-                        return results[0].extracted_content
-                    else:
-                        return json.dumps({"error": "Failed to extract structured data"})
+                result = get_crawler_pool().run(scrape)
+                if result is None or not result.success:
+                    return json.dumps({"error": "Failed to extract structured data"})
+                if snapshot is None:
+                    page_cache.put_crawl_result(url, result)
+                report_pruning(url, result)
+                return result.extracted_content
             except Exception as e:
                 return json.dumps({"error": f"Error in scrape function: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"})
 
         try:
-            extracted_json = asyncio.run(scrape())
-            # Validate it's proper JSON and matches the schema
-            data = json.loads(extracted_json)
-            # Handle if data is a list (take the most suspicious product)
-            if isinstance(data, list):
-                if len(data) == 0:
-                    # No products extracted
-                    return json.dumps({"error": "No product data extracted from page"})
-                elif len(data) == 1:
-                    data = data[0]
-                else:
-                    # Take the product with the highest suspicion_score (default to 0 for None)
-                    data = max(data, key=lambda x: x.get('suspicion_score') or 0)
-            # Set suspicion_score from search results
-            data['suspicion_score'] = get_search_score_for_url(url)
-            # Validate against Pydantic model
-            product = SingleExtractedProduct(**data)
-            # Wait 15 seconds to respect Gemini API rate limit
-            time.sleep(15)
+            extracted_json = scrape_with_pool()
+            data = parse_extracted_content(extracted_json, get_search_score_for_url(url), url)
             return json.dumps(data)
         except Exception as e:
             error_msg = f"Error scraping {url}: {str(e)}\n\nFull traceback:\n{traceback.format_exc()}"
-            # Wait even on error to maintain rate limiting
-            time.sleep(15)
             return json.dumps({"error": error_msg})
+
+    def extract_many(self, search_results, concurrency: int = None, on_result=None,
+                     on_pruned=None) -> AllExtractedProducts:
+        """
+        Fetch and extract every search result page concurrently.
+
+        Args:
+            search_results: The step_2_search_results.json content, either the
+                {"results": [...]} dict or the list of result dicts
+            concurrency (int, optional): Maximum pages crawled at once, defaults to SCRAPE_CONCURRENCY
+            on_result (callable, optional): Called as on_result(url, product, error) for every URL,
+                as soon as that page is done
+            on_pruned (callable, optional): Called as on_pruned(url, raw_tokens, input_tokens) for every
+                crawled page, instead of emitting PAGE_PRUNED to the active run
+
+        Returns:
+            AllExtractedProducts: Extracted products plus one error entry per failed URL
+        """
+        if isinstance(search_results, dict):
+            search_results = search_results.get('results', [])
+
+        # One crawl per distinct page, scored from its search relevance
+        scores, seen = {}, set()
+        for result in search_results:
+            url = result.get('url')
+            if url and normalize_url(url) not in seen:
+                seen.add(normalize_url(url))
+                scores[url] = score_to_suspicion(result.get('score', 0.0))
+        urls = list(scores)
+        if not urls:
+            return AllExtractedProducts(products=[])
+        concurrency = max(1, concurrency or SCRAPE_CONCURRENCY)
+
+        # Cached pages are crawled from their stored HTML, the rest from the network
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            snapshots = dict(zip(urls, executor.map(page_cache.lookup, urls)))
+        # Byte-identical snapshots (mirrors, a shared captcha page) are one crawl target for all of their URLs
+        targets = {}
+        for url in urls:
+            snapshot = snapshots[url]
+            targets.setdefault(f"raw:{snapshot['html']}" if snapshot else url, []).append(url)
+
+        # Stream results so each page is recorded (and on_result fires) as soon as it is extracted
+        config = build_extraction_config().clone(stream=True)
+        dispatcher = SemaphoreDispatcher(semaphore_count=concurrency)
+
+        products, errors = [], []
+        pending = set(urls)
+
+        def record(url, product=None, error=None):
+            pending.discard(url)
+            if product is not None:
+                products.append(product)
+            else:
+                errors.append(ExtractionError(url=url, error=error))
+            if on_result is not None:
+                on_result(url, product, error)
+
+        # Results are matched back to their target by normalized URL, as the crawler may rewrite the one it was given
+        def target_key(target):
+            return target if target.startswith("raw:") else normalize_url(target)
+
+        target_urls = {target_key(target): target_urls for target, target_urls in targets.items()}
+
+        def handle(result):
+            matched = target_urls.get(target_key(result.url or ""))
+            if matched is None:
+                logger.warning(f"Crawl result for an unrequested URL ignored: {(result.url or '')[:200]}")
+                return
+            for url in matched:
+                if url in pending:
+                    handle_url(url, result)
+
+        def handle_url(url, result):
+            if result.success and snapshots[url] is None:
+                page_cache.put_crawl_result(url, result)
+            if not result.success:
+                record(url, error=result.error_message or "Failed to extract structured data")
+                return
+            report_pruning(url, result, on_pruned)
+            try:
+                record(url, product=parse_extracted_content(result.extracted_content, scores[url], url))
+            except Exception as e:
+                record(url, error=f"Error scraping {url}: {str(e)}")
+
+        async def scrape_all(crawler):
+            async for result in await crawler.arun_many(list(targets), config=config, dispatcher=dispatcher):
+                handle(result)
+
+        try:
+            get_crawler_pool().run(scrape_all, pages=len(urls) - sum(1 for s in snapshots.values() if s))
+        except Exception as e:
+            for url in list(pending):
+                record(url, error=f"Error in scrape function: {str(e)}")
+            return AllExtractedProducts(products=products, errors=errors)
+
+        for url in list(pending):
+            record(url, error="No crawl result returned")
+
+        return AllExtractedProducts(products=products, errors=errors)
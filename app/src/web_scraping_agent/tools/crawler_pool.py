@@ -0,0 +1,180 @@
+# Developed by Montassar Bellah Abdallah
+
+import asyncio
+import atexit
+import logging
+import threading
+from crawl4ai import AsyncWebCrawler
+from config import CRAWLER_POOL_SIZE, CRAWLER_MAX_PAGES, CRAWLER_MAX_RSS_MB
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+def _process_tree_rss_mb() -> float:
+    """Resident memory of this process and its children (Chromium) in MB."""
+    try:
+        import psutil  # Installed with crawl4ai
+    except ImportError:
+        return 0.0
+    process = psutil.Process()
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+class _CrawlerSlot:
+    """One pool slot: a started crawler (or None) and the pages it has served."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.crawler = None
+        self.pages = 0
+
+
+class CrawlerPool:
+    """
+    Process-wide pool of headless Chromium crawlers.
+
+    The crawlers live on a dedicated event loop thread, so synchronous tool calls
+    coming from any thread can share them instead of launching a browser per URL.
+    A crawler is recycled after `max_pages` pages, when the process tree exceeds
+    `max_rss_mb`, or when its browser is found disconnected.
+    """
+
+    def __init__(self, size: int = CRAWLER_POOL_SIZE, max_pages: int = CRAWLER_MAX_PAGES,
+                 max_rss_mb: int = CRAWLER_MAX_RSS_MB, browser_config=None):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.max_rss_mb = max_rss_mb
+        self.browser_config = browser_config
+        self._loop = None
+        self._thread = None
+        self._idle = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the pool loop and pre-warm every crawler. Safe to call repeatedly."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._loop = asyncio.new_event_loop()
+            self._idle = asyncio.Queue()
+            for index in range(self.size):
+                self._idle.put_nowait(_CrawlerSlot(index))
+            self._thread = threading.Thread(target=self._loop.run_forever, name="crawler-pool", daemon=True)
+            self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._warm(), self._loop).result()
+
+    def run(self, fn, pages: int = 1, timeout: float = None):
+        """
+        Run `await fn(crawler)` on a pooled crawler and return its result.
+
+        Args:
+            fn: Coroutine function receiving a started AsyncWebCrawler
+            pages (int): Number of pages the call crawls, counted towards recycling
+            timeout (float, optional): Seconds to wait for the result
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._run(fn, pages), self._loop)
+        return future.result(timeout)
+
+    def close(self):
+        """Close every crawler and stop the pool loop."""
+        with self._lock:
+            if self._thread is None:
+                return
+            loop, thread = self._loop, self._thread
+            self._thread = None
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(timeout=30)
+        except Exception as e:
+            logger.warning(f"Failed to close crawler pool cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    async def _run(self, fn, pages):
+        slot = await self._acquire()
+        try:
+            return await fn(slot.crawler)
+        finally:
+            await self._release(slot, pages)
+
+    async def _warm(self):
+        slots = []
+        try:
+            for _ in range(self.size):
+                slots.append(await self._acquire())
+            logger.info(f"Crawler pool warmed with {len(slots)} browser(s)")
+        except Exception as e:
+            logger.warning(f"Crawler pool warm-up failed, browsers will start on demand: {e}")
+        for slot in slots:
+            await self._release(slot, 0)
+
+    async def _acquire(self):
+        slot = await self._idle.get()
+        try:
+            if slot.crawler is not None and not self._is_alive(slot.crawler):
+                logger.warning(f"Crawler {slot.index} failed its liveness check, restarting it")
+                await self._recycle(slot)
+            if slot.crawler is None:
+                crawler = AsyncWebCrawler(config=self.browser_config)
+                await crawler.start()
+                slot.crawler, slot.pages = crawler, 0
+        except BaseException:
+            self._idle.put_nowait(slot)
+            raise
+        return slot
+
+    async def _release(self, slot, pages):
+        slot.pages += pages
+        if slot.pages >= self.max_pages:
+            logger.info(f"Recycling crawler {slot.index} after {slot.pages} pages")
+            await self._recycle(slot)
+        elif self.max_rss_mb and _process_tree_rss_mb() > self.max_rss_mb:
+            logger.info(f"Recycling crawler {slot.index}: memory above {self.max_rss_mb} MB")
+            await self._recycle(slot)
+        self._idle.put_nowait(slot)
+
+    async def _recycle(self, slot):
+        crawler, slot.crawler, slot.pages = slot.crawler, None, 0
+        if crawler is None:
+            return
+        try:
+            await crawler.close()
+        except Exception as e:
+            logger.warning(f"Error while closing crawler {slot.index}: {e}")
+
+    async def _close_all(self):
+        for _ in range(self.size):
+            slot = await self._idle.get()
+            await self._recycle(slot)
+
+    @staticmethod
+    def _is_alive(crawler) -> bool:
+        """Cheap liveness check: crawler started and its browser still connected."""
+        if not getattr(crawler, "ready", True):
+            return False
+        browser_manager = getattr(getattr(crawler, "crawler_strategy", None), "browser_manager", None)
+        browser = getattr(browser_manager, "browser", None)
+        if browser is not None and not browser.is_connected():
+            return False
+        return True
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_crawler_pool() -> CrawlerPool:
+    """Return the process-wide crawler pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CrawlerPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,71 @@
+# Developed by Montassar Bellah Abdallah
+
+import asyncio
+import logging
+import os
+from crawl4ai import LLMExtractionStrategy
+from config import gemini_rate_limiter, CACHE_DIR, EXTRACTION_CACHE_TTL, EXTRACTION_MAX_INPUT_TOKENS
+from rate_limiter import estimate_tokens
+from cache_store import SQLiteCache, make_cache_key
+from ..schema import SingleExtractedProduct
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+# Validated extraction results keyed by page content, instruction and schema
+extraction_cache = SQLiteCache(os.path.join(CACHE_DIR, "extraction_cache.sqlite3"), default_ttl=EXTRACTION_CACHE_TTL)
+
+
+def cap_sections(sections, max_tokens: int = EXTRACTION_MAX_INPUT_TOKENS) -> list:
+    """Keep the leading sections of a page up to max_tokens (0 = no cap), cutting the last one short."""
+    sections = list(sections)
+    if max_tokens <= 0:
+        return sections
+    capped, remaining = [], max_tokens
+    for section in sections:
+        tokens = estimate_tokens(section)
+        if tokens <= remaining:
+            capped.append(section)
+            remaining -= tokens
+            continue
+        if remaining > 0:
+            capped.append(str(section)[:remaining * 4])
+        break
+    return capped
+
+
+class ProductExtractionStrategy(LLMExtractionStrategy):
+    """
+    LLMExtractionStrategy whose Gemini calls draw from the shared quota and
+    whose results are cached by a hash of the cleaned page content. Pages
+    longer than EXTRACTION_MAX_INPUT_TOKENS are cut to their leading sections.
+    """
+
+    def _cache_key(self, sections) -> str:
+        return make_cache_key(self.llm_config.provider, self.instruction, self.schema, list(sections))
+
+    def run(self, url: str, sections, *q, **kwargs):
+        sections = cap_sections(sections)
+        key = self._cache_key(sections)
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            logger.info(f"Extraction cache hit for {url}")
+            return cached
+
+        blocks = super().run(url, sections, *q, **kwargs)
+
+        # Only cache pages whose every block validated, so failures are retried next time
+        try:
+            if blocks and all(isinstance(b, dict) and not b.get("error") for b in blocks):
+                extraction_cache.set(key, [SingleExtractedProduct(**b).model_dump() for b in blocks])
+        except Exception as e:
+            logger.info(f"Not caching extraction for {url}: {e}")
+        return blocks
+
+    async def arun(self, url: str, sections, *q, **kwargs):
+        # Single code path through run() so the cache is consulted exactly once
+        return await asyncio.to_thread(self.run, url, sections, *q, **kwargs)
+
+    def extract(self, url: str, ix: int, html: str):
+        gemini_rate_limiter.acquire(estimate_tokens(html))
+        return super().extract(url, ix, html)
@@ -0,0 +1,195 @@
+# Developed by Montassar Bellah Abdallah
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+import requests
+from config import PAGE_CACHE_DIR, PAGE_CACHE_TTL, PAGE_CACHE_MAX_MB
+from url_utils import normalize_url
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """
+    On-disk cache of rendered product pages.
+
+    Each snapshot is a gzip-compressed JSON file named after the SHA-256 of the
+    normalized URL and holds the rendered HTML, the markdown, the fetch time and
+    the ETag / Last-Modified validators. Fresh snapshots are served without any
+    network access, stale ones are revalidated with a conditional GET, and the
+    least recently used files are evicted to keep the directory under budget.
+    The snapshots are kept as evidence of what the page showed when analyzed.
+    """
+
+    def __init__(self, cache_dir: str = PAGE_CACHE_DIR, ttl: int = PAGE_CACHE_TTL, max_mb: int = PAGE_CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._size = None  # Running estimate of the bytes on disk, None until the first scan
+        self._evicting = False
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json.gz")
+
+    def get(self, url: str):
+        """Return the stored snapshot for `url` regardless of age, or None."""
+        path = self._path(url)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable page snapshot for {url}: {e}")
+            self._remove(path)
+            return None
+        # Touch for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return snapshot
+
+    def lookup(self, url: str):
+        """Return a usable snapshot: fresh, or stale but confirmed unchanged by the server. None means crawl."""
+        snapshot = self.get(url)
+        if snapshot is None:
+            return None
+        if time.time() - snapshot.get("fetched_at", 0) < self.ttl:
+            return snapshot
+        if self.revalidate(url, snapshot):
+            return snapshot
+        return None
+
+    def revalidate(self, url: str, snapshot: dict) -> bool:
+        """Conditional GET with the stored validators. True (and refreshed) when the server answers 304."""
+        headers = {}
+        if snapshot.get("etag"):
+            headers["If-None-Match"] = snapshot["etag"]
+        if snapshot.get("last_modified"):
+            headers["If-Modified-Since"] = snapshot["last_modified"]
+        if not headers:
+            return False
+        try:
+            response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
+        except requests.RequestException as e:
+            logger.info(f"Revalidation failed for {url}: {e}")
+            return False
+        if response.status_code != 304:
+            return False
+        snapshot["fetched_at"] = time.time()
+        snapshot["revalidated_at"] = datetime.now().isoformat()
+        self._write(self._path(url), snapshot)
+        return True
+
+    def put(self, url: str, html: str, markdown: str = "", response_headers: dict = None, status_code: int = None):
+        """Store a freshly crawled page; eviction runs in the background once the cache is over budget."""
+        if not html:
+            return None
+        headers = {k.lower(): v for k, v in (response_headers or {}).items()}
+        snapshot = {
+            "url": url,
+            "normalized_url": normalize_url(url),
+            "fetched_at": time.time(),
+            "fetched_at_iso": datetime.now().isoformat(),
+            "status_code": status_code,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "content_sha256": hashlib.sha256(html.encode("utf-8")).hexdigest(),
+            "html": html,
+            "markdown": markdown or "",
+        }
+        path = self._path(url)
+        previous_size = self._file_size(path)
+        self._write(path, snapshot)
+        self._track_write(self._file_size(path) - previous_size)
+        return snapshot
+
+    def put_crawl_result(self, url: str, result):
+        """Store a successful Crawl4AI result."""
+        markdown = getattr(result.markdown, "raw_markdown", None) or str(result.markdown or "")
+        return self.put(url, result.html, markdown, result.response_headers, result.status_code)
+
+    def _track_write(self, delta: int):
+        """
+        Add a write to the size estimate and start a background eviction when
+        it exceeds the budget, so the crawler's event loop never walks the tree.
+        """
+        with self._lock:
+            if self._size is not None:
+                self._size += delta
+            due = not self._evicting and (self._size is None or self._size > self.max_bytes)
+            if due:
+                self._evicting = True
+        if due:
+            threading.Thread(target=self._evict_in_background, name="page-cache-evict", daemon=True).start()
+
+    def _evict_in_background(self):
+        try:
+            self.evict()
+        except Exception as e:
+            logger.warning(f"Page cache eviction failed: {e}")
+        finally:
+            with self._lock:
+                self._evicting = False
+
+    def evict(self):
+        """Delete least recently used snapshots until the cache fits in its size budget (walks the whole tree)."""
+        entries, total = [], 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json.gz"):
+                    continue  # Skip in-flight temp files
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                self._remove(path)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        with self._lock:
+            self._size = total
+
+    def _write(self, path: str, snapshot: dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                f.write(json.dumps(snapshot, ensure_ascii=False).encode("utf-8"))
+            os.replace(tmp_path, path)
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+page_cache = PageCache()
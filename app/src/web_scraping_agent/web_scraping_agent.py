@@ -2,8 +2,7 @@
 
 import logging
 from crewai import Agent, Task
-from config import scraping_llm, output_dir
-import os
+from config import scraping_llm
 from .tools.crawl4ai_tool import Crawl4AIScrapeWebsiteTool
 from .schema import AllExtractedProducts
 
@@ -41,7 +40,6 @@ scraping_task = Task(
     ]),
     expected_output="A JSON object containing extracted product details with suspicion indicators",
     output_json=AllExtractedProducts,
-    output_file=os.path.join(output_dir, "step_3_scraped_products.json"),
     agent=scraping_agent,
     async_execution=False,  # Run synchronously to better handle errors
     timeout=600,  # 10 minute timeout for web scraping tasks
@@ -0,0 +1,10 @@
+# WHOIS Lookup Module for Douane Illicit Product Detector
+# Developed by Montassar Bellah Abdallah
+
+from .enrichment import convert_datetimes_to_strings, lookup_whois, enrich_products_with_whois
+from .rdap_client import RDAPClient, RDAPError, RDAPNotAvailable, get_rdap_client, normalize_rdap, normalize_python_whois
+
+__all__ = [
+    'convert_datetimes_to_strings', 'lookup_whois', 'enrich_products_with_whois',
+    'RDAPClient', 'RDAPError', 'RDAPNotAvailable', 'get_rdap_client', 'normalize_rdap', 'normalize_python_whois',
+]
@@ -0,0 +1,162 @@
+# Developed by Montassar Bellah Abdallah
+
+import logging
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+import requests
+import whois
+from config import WHOIS_MAX_WORKERS, WHOIS_TIMEOUT, WHOIS_DOMAIN_DEADLINE, CACHE_DIR, WHOIS_CACHE_TTL, WHOIS_NEGATIVE_CACHE_TTL, RDAP_ENABLED
+from cache_store import SQLiteCache, make_cache_key
+from url_utils import registrable_domain
+from .rdap_client import get_rdap_client, normalize_python_whois, RDAPNotAvailable, RDAPError
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+
+def convert_datetimes_to_strings(obj):
+    """Recursively convert datetime objects to strings in a dict/list structure."""
+    if isinstance(obj, dict):
+        return {k: convert_datetimes_to_strings(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_datetimes_to_strings(item) for item in obj]
+    elif isinstance(obj, datetime):
+        return str(obj)
+    else:
+        return obj
+
+
+# Normalized domain records keyed by registrable domain, shared by the pipeline and the dashboard
+whois_cache = SQLiteCache(os.path.join(CACHE_DIR, "whois_cache.sqlite3"), default_ttl=WHOIS_CACHE_TTL)
+
+
+def _whois_uncached(domain: str) -> dict:
+    try:
+        # Socket timeout per port-43 connection, so a silent server cannot hold a worker thread
+        w = whois.whois(domain, timeout=WHOIS_TIMEOUT)
+        info = convert_datetimes_to_strings(dict(w))
+    except socket.timeout:
+        return {"error": f"WHOIS lookup timed out after {WHOIS_TIMEOUT:.0f}s"}
+    except Exception as e:
+        return {"error": str(e)}
+    # Rate-limited or unknown domains come back as a record with no data at all
+    if not any(value for value in info.values()):
+        return {"error": "No WHOIS data returned (rate limited or domain not found)"}
+    return normalize_python_whois(info, domain)
+
+
+def _lookup_uncached(domain: str) -> dict:
+    """RDAP when the TLD has a service, port-43 WHOIS otherwise or when the RDAP server is unreachable."""
+    if RDAP_ENABLED:
+        try:
+            return get_rdap_client().lookup(domain)
+        except RDAPNotAvailable:
+            pass
+        except RDAPError as e:
+            return {"error": str(e)}
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"RDAP lookup failed for {domain}, falling back to WHOIS: {e}")
+    return _whois_uncached(domain)
+
+
+def lookup_whois(domain: str, use_cache: bool = True) -> dict:
+    """
+    Normalized registration record for one domain, or {"error": ...} on failure.
+
+    Every record has the same keys whichever backend answered (see
+    `rdap_client.empty_record`), with ISO 8601 dates and list-valued
+    `status` and `name_servers`. Results are cached per registrable domain:
+    successes for WHOIS_CACHE_TTL, errors and rate-limit answers only for
+    WHOIS_NEGATIVE_CACHE_TTL.
+    """
+    domain = registrable_domain(domain) or domain
+    key = make_cache_key("domain-record", domain)
+    if use_cache:
+        cached = whois_cache.get(key)
+        if cached is not None:
+            return cached
+    info = _lookup_uncached(domain)
+    whois_cache.set(key, info, ttl=WHOIS_NEGATIVE_CACHE_TTL if "error" in info else WHOIS_CACHE_TTL)
+    return info
+
+
+def enrich_products_with_whois(products: list, max_workers: int = WHOIS_MAX_WORKERS, on_lookup=None,
+                               deadline: float = WHOIS_DOMAIN_DEADLINE) -> dict:
+    """
+    Set `whois_info` on every product, looking each distinct domain up once.
+
+    Lookups run concurrently in a bounded thread pool. RDAP requests time out
+    after RDAP_TIMEOUT (retried once) and port-43 connections after
+    WHOIS_TIMEOUT, and each domain gets at most `deadline` seconds from the
+    start of its lookup: a domain over it is recorded with a timeout error and
+    never holds up the others or the return of this function.
+
+    Args:
+        products (list): Product dicts with an optional `business_website`
+        max_workers (int): Maximum concurrent lookups
+        on_lookup (callable, optional): Called as on_lookup(domain, info) as each domain finishes
+        deadline (float): Seconds allowed per domain
+
+    Returns:
+        dict: WHOIS result per domain
+    """
+    products_by_domain = {}
+    for product in products:
+        domain = registrable_domain(product.get("business_website"))
+        if domain:
+            products_by_domain.setdefault(domain, []).append(product)
+        else:
+            product["whois_info"] = None
+    if not products_by_domain:
+        return {}
+
+    workers = max(1, min(max_workers, len(products_by_domain)))
+    results = {}
+    started = {}
+
+    def timed_lookup(domain: str) -> dict:
+        started[domain] = time.monotonic()
+        return lookup_whois(domain)
+
+    def finish(domain: str, info: dict):
+        results[domain] = info
+        if "error" in info:
+            logger.warning(f"WHOIS lookup failed for {domain}: {info['error']}")
+        if on_lookup is not None:
+            on_lookup(domain, info)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whois")
+    overdue = False
+    try:
+        futures = {executor.submit(timed_lookup, domain): domain for domain in products_by_domain}
+        pending = set(futures)
+        while pending:
+            # Wake up when a lookup finishes or when the earliest running one reaches its deadline
+            running = [started[futures[future]] for future in pending if futures[future] in started]
+            timeout = max(0.0, min(running) + deadline - time.monotonic()) if running else deadline
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    info = future.result()
+                except Exception as e:
+                    info = {"error": str(e)}
+                finish(futures[future], info)
+            now = time.monotonic()
+            for future in list(pending):
+                domain = futures[future]
+                if domain in started and now - started[domain] >= deadline:
+                    pending.discard(future)
+                    overdue = True
+                    finish(domain, {"error": f"WHOIS lookup timed out after {deadline:.0f}s"})
+    finally:
+        # An overdue lookup keeps its thread until its own socket timeout; do not wait for it
+        executor.shutdown(wait=not overdue, cancel_futures=True)
+
+    for domain, domain_products in products_by_domain.items():
+        info = results[domain]
+        for product in domain_products:
+            product["whois_info"] = dict(info)
+    return results
@@ -0,0 +1,265 @@
+# Developed by Montassar Bellah Abdallah
+
+import logging
+import threading
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import RDAP_BOOTSTRAP_URL, RDAP_BASE_URLS, RDAP_TIMEOUT, RDAP_POOL_SIZE
+
+# Setup logging for error tracking (internal only, not shown to user)
+logger = logging.getLogger(__name__)
+
+# RDAP entity roles mapped to the contact prefixes used in normalized records
+CONTACT_ROLES = {
+    "registrant": "registrant",
+    "administrative": "admin",
+    "technical": "tech",
+}
+
+
+class RDAPNotAvailable(Exception):
+    """The TLD has no RDAP service; the caller should fall back to port-43 WHOIS."""
+
+
+class RDAPError(Exception):
+    """The RDAP server answered with an error (domain not found, rate limited...)."""
+
+
+def iso_date(value):
+    """ISO 8601 string for a date given as datetime, string or list (first item), or None."""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    text = str(value).strip()
+    for candidate in (text.replace("Z", "+00:00"), text.replace(" ", "T", 1)):
+        try:
+            return datetime.fromisoformat(candidate).isoformat()
+        except ValueError:
+            continue
+    for fmt in ("%d-%m-%Y", "%d/%m/%Y", "%d-%b-%Y", "%Y.%m.%d"):
+        try:
+            return datetime.strptime(text.split()[0], fmt).isoformat()
+        except ValueError:
+            continue
+    return text
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def empty_record(domain: str, source: str) -> dict:
+    """Normalized domain record with every field present."""
+    record = {
+        "domain_name": domain.lower(),
+        "source": source,
+        "registrar": None,
+        "registrar_url": None,
+        "registrar_iana_id": None,
+        "whois_server": None,
+        "creation_date": None,
+        "updated_date": None,
+        "expiration_date": None,
+        "status": [],
+        "name_servers": [],
+        "dnssec": None,
+    }
+    for prefix in CONTACT_ROLES.values():
+        for field in ("name", "organization", "address", "city", "state", "zipcode", "country", "phone", "email"):
+            record[f"{prefix}_{field}"] = None
+    return record
+
+
+def _vcard(entity: dict) -> dict:
+    """Flatten a jCard (RFC 7095) into name/organization/email/phone/address fields."""
+    fields = {}
+    vcard = entity.get("vcardArray") or []
+    properties = vcard[1] if len(vcard) > 1 else []
+    for prop in properties:
+        if len(prop) < 4:
+            continue
+        name, params, _, value = prop[0], prop[1] or {}, prop[2], prop[3]
+        if name == "fn" and value:
+            fields.setdefault("name", value)
+        elif name == "org" and value:
+            fields.setdefault("organization", value[0] if isinstance(value, list) else value)
+        elif name == "email" and value:
+            fields.setdefault("email", value)
+        elif name == "tel" and value:
+            fields.setdefault("phone", str(value).replace("tel:", ""))
+        elif name == "adr":
+            if isinstance(value, list) and len(value) >= 7:
+                street = value[2]
+                fields.setdefault("address", ", ".join(_as_list(street)) if street else None)
+                fields.setdefault("city", value[3] or None)
+                fields.setdefault("state", value[4] or None)
+                fields.setdefault("zipcode", value[5] or None)
+                fields.setdefault("country", value[6] or params.get("cc") or None)
+            elif params.get("label"):
+                fields.setdefault("address", params["label"])
+    return fields
+
+
+def _walk_entities(entities):
+    for entity in entities or []:
+        yield entity
+        yield from _walk_entities(entity.get("entities"))
+
+
+def normalize_rdap(data: dict, domain: str) -> dict:
+    """Map an RDAP domain response (RFC 9083) to the normalized record."""
+    record = empty_record(data.get("ldhName") or domain, "rdap")
+    record["whois_server"] = data.get("port43")
+    record["status"] = _as_list(data.get("status"))
+    record["name_servers"] = sorted({ns.get("ldhName", "").lower() for ns in data.get("nameservers", []) if ns.get("ldhName")})
+    secure_dns = data.get("secureDNS") or {}
+    if "delegationSigned" in secure_dns:
+        record["dnssec"] = "signed" if secure_dns["delegationSigned"] else "unsigned"
+
+    for event in data.get("events", []):
+        action = event.get("eventAction")
+        if action == "registration":
+            record["creation_date"] = iso_date(event.get("eventDate"))
+        elif action in ("last changed", "last update of RDAP database") and not record["updated_date"]:
+            record["updated_date"] = iso_date(event.get("eventDate"))
+        elif action == "expiration":
+            record["expiration_date"] = iso_date(event.get("eventDate"))
+
+    for entity in _walk_entities(data.get("entities")):
+        roles = entity.get("roles") or []
+        fields = _vcard(entity)
+        if "registrar" in roles and not record["registrar"]:
+            record["registrar"] = fields.get("name") or fields.get("organization")
+            for public_id in entity.get("publicIds", []):
+                if "IANA" in public_id.get("type", ""):
+                    record["registrar_iana_id"] = public_id.get("identifier")
+            for link in entity.get("links", []):
+                if link.get("href") and link.get("rel") in ("about", "related"):
+                    record["registrar_url"] = link["href"]
+                    break
+        for role, prefix in CONTACT_ROLES.items():
+            if role in roles:
+                for field, value in fields.items():
+                    if record.get(f"{prefix}_{field}") is None:
+                        record[f"{prefix}_{field}"] = value
+    return record
+
+
+def normalize_python_whois(info: dict, domain: str) -> dict:
+    """Map a python-whois result (datetimes already stringified) to the normalized record."""
+    record = empty_record(domain, "whois")
+    names = _as_list(info.get("domain_name"))
+    if names:
+        record["domain_name"] = str(names[0]).lower()
+    record["registrar"] = info.get("registrar")
+    record["registrar_url"] = info.get("registrar_url") or info.get("referral_url")
+    record["registrar_iana_id"] = info.get("registrar_iana_id") or info.get("registrar_id")
+    record["whois_server"] = info.get("whois_server")
+    record["creation_date"] = iso_date(info.get("creation_date"))
+    record["updated_date"] = iso_date(info.get("updated_date") or info.get("last_updated"))
+    record["expiration_date"] = iso_date(info.get("expiration_date"))
+    record["status"] = [str(s).split()[0] for s in _as_list(info.get("status")) if s]
+    record["name_servers"] = sorted({str(ns).lower() for ns in _as_list(info.get("name_servers") or info.get("nameservers")) if ns})
+    record["dnssec"] = info.get("dnssec")
+
+    # python-whois uses either prefixed keys or bare registrant keys depending on the TLD parser
+    bare = {
+        "name": info.get("name"),
+        "organization": info.get("org") or info.get("organization"),
+        "address": info.get("address"),
+        "city": info.get("city"),
+        "state": info.get("state"),
+        "zipcode": info.get("zipcode") or info.get("registrant_postal_code"),
+        "country": info.get("country"),
+        "phone": info.get("phone"),
+        "email": _as_list(info.get("emails"))[0] if info.get("emails") else None,
+    }
+    for prefix in CONTACT_ROLES.values():
+        for field in ("name", "organization", "address", "city", "state", "zipcode", "country", "phone", "email"):
+            value = info.get(f"{prefix}_{field}")
+            if value is None and prefix == "registrant":
+                value = bare[field]
+            if isinstance(value, list):
+                value = ", ".join(str(v) for v in value)
+            record[f"{prefix}_{field}"] = value
+    return record
+
+
+class RDAPClient:
+    """
+    RDAP domain lookups over pooled keep-alive HTTPS connections.
+
+    The RDAP server of each TLD comes from the IANA bootstrap registry,
+    overridable per TLD with RDAP_BASE_URLS (e.g. to point at a local stand-in).
+    """
+
+    def __init__(self, bootstrap_url: str = RDAP_BOOTSTRAP_URL, base_urls: dict = None,
+                 timeout: float = RDAP_TIMEOUT, pool_size: int = RDAP_POOL_SIZE):
+        self.bootstrap_url = bootstrap_url
+        self.base_urls = {k.lower().lstrip("."): v for k, v in (RDAP_BASE_URLS if base_urls is None else base_urls).items()}
+        self.timeout = timeout
+        self._services = None
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        # One retry only: a lookup already costs up to twice RDAP_TIMEOUT before the WHOIS fallback
+        retry = Retry(total=1, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset(["GET"]))
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept": "application/rdap+json, application/json"})
+
+    def _load_services(self) -> dict:
+        with self._lock:
+            if self._services is None:
+                services = {}
+                try:
+                    response = self.session.get(self.bootstrap_url, timeout=self.timeout)
+                    response.raise_for_status()
+                    for tlds, urls in response.json().get("services", []):
+                        # Prefer HTTPS endpoints
+                        url = next((u for u in urls if u.startswith("https://")), urls[0] if urls else None)
+                        for tld in tlds:
+                            services[tld.lower()] = url
+                except (requests.RequestException, ValueError) as e:
+                    logger.warning(f"RDAP bootstrap unavailable, using overrides only: {e}")
+                    return {}  # Not cached, retried on the next lookup
+                self._services = services
+            return self._services
+
+    def base_url_for(self, domain: str):
+        """RDAP base URL serving `domain`, or None when its TLD has no RDAP service."""
+        tld = domain.rsplit(".", 1)[-1].lower()
+        return self.base_urls.get(tld) or self._load_services().get(tld)
+
+    def lookup(self, domain: str) -> dict:
+        """Normalized record for `domain`. Raises RDAPNotAvailable or RDAPError."""
+        base_url = self.base_url_for(domain)
+        if not base_url:
+            raise RDAPNotAvailable(f"No RDAP service for {domain}")
+        response = self.session.get(f"{base_url.rstrip('/')}/domain/{domain}", timeout=self.timeout)
+        if response.status_code == 404:
+            raise RDAPError(f"Domain {domain} not found in RDAP")
+        if response.status_code == 429:
+            raise RDAPError("RDAP rate limit exceeded")
+        response.raise_for_status()
+        return normalize_rdap(response.json(), domain)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_rdap_client() -> RDAPClient:
+    """Return the process-wide RDAP client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RDAPClient()
+        return _client
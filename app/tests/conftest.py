@@ -0,0 +1,16 @@
+# Developed by Montassar Bellah Abdallah
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# The application modules are imported as top-level modules from app/src
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+# config creates ./ai-agent-output (runs, caches) on import: keep it out of the working tree
+_workdir = tempfile.mkdtemp(prefix="douane-tests-")
+os.chdir(_workdir)
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
@@ -0,0 +1,157 @@
+# Developed by Montassar Bellah Abdallah
+
+import sys
+import types
+
+import pytest
+
+import batch_runner
+from run_context import PAGE_PRUNED, PRODUCT_EXTRACTED
+from url_utils import normalize_url
+
+
+def score_to_suspicion(score):
+    return max(1, min(10, round(score * 10)))
+
+
+class FakePipeline:
+    """
+    Stand-ins for the search stage, the Crawl4AI tool and the WHOIS stage.
+
+    `searches[category]` lists the search results of each attempt; `products`
+    maps the URLs that extract successfully to their product.
+    """
+
+    def __init__(self, searches: dict, products: dict):
+        self.searches = searches
+        self.products = {normalize_url(url): product for url, product in products.items()}
+        self.scraped = []
+        self.widened = {}
+
+    def install(self, monkeypatch):
+        main_crewai = types.ModuleType("main_crewai")
+        main_crewai.make_budget = lambda max_attempts=None, *args: {
+            "max_attempts": max_attempts or 3, "score_th": 0.1, "max_search_results": 1, "no_keywords": 3}
+        main_crewai.attempt_inputs = lambda category, excluded, budget, attempt: {"product_category": category}
+        main_crewai.queries_and_search_stage = self.search
+        tool = types.ModuleType("web_scraping_agent.tools.crawl4ai_tool")
+        tool.score_to_suspicion = score_to_suspicion
+        tool.Crawl4AIScrapeWebsiteTool = lambda: self
+        whois = types.ModuleType("whois_lookup")
+        whois.enrich_products_with_whois = lambda products, on_lookup=None: {}
+        monkeypatch.setitem(sys.modules, "main_crewai", main_crewai)
+        monkeypatch.setitem(sys.modules, "web_scraping_agent.tools.crawl4ai_tool", tool)
+        monkeypatch.setitem(sys.modules, "whois_lookup", whois)
+        monkeypatch.setattr(batch_runner, "init_telemetry", lambda: None)
+
+    def search(self, ctx, checkpoint, inputs, search_mode, widen_search, pages, serper_budget=None):
+        attempts = self.searches[inputs["product_category"]]
+        self.widened.setdefault(inputs["product_category"], []).append(widen_search)
+        ctx.set_search_results(attempts[min(pages, len(attempts)) - 1])
+
+    def extract_many(self, results, on_result=None, on_pruned=None):
+        for result in results:
+            url = result["url"]
+            self.scraped.append(url)
+            on_pruned(url, 1000, 200)
+            if normalize_url(url) in self.products:
+                on_result(url, dict(self.products[normalize_url(url)]), None)
+            else:
+                on_result(url, None, "No product data extracted from page")
+
+
+def result(url, score=0.5):
+    return {"url": url, "title": url, "score": score}
+
+
+def run(monkeypatch, pipeline, categories, **kwargs):
+    pipeline.install(monkeypatch)
+    events = []
+    batch = batch_runner.run_batch(categories, [], on_event=events.append, max_workers=2, **kwargs)
+    return batch, events
+
+
+def test_page_found_by_two_categories_is_scraped_once_and_scored_per_category(monkeypatch):
+    pipeline = FakePipeline(
+        searches={
+            "parfums": [[result("https://shop.tn/p/1", 0.9), result("https://shop.tn/p/2", 0.5)]],
+            "montres": [[result("https://shop.tn/p/1?utm_source=x", 0.3)]],
+        },
+        products={"https://shop.tn/p/1": {"product_title": "A"}, "https://shop.tn/p/2": {"product_title": "B"}},
+    )
+    batch, events = run(monkeypatch, pipeline, ["parfums", "montres"], max_attempts=1)
+
+    assert sorted(pipeline.scraped) == ["https://shop.tn/p/1", "https://shop.tn/p/2"]
+    parfums, montres = batch["runs"]
+    assert (parfums["products_count"], montres["products_count"]) == (2, 1)
+    assert (parfums["shared_pages"], montres["shared_pages"]) == (1, 1)
+    assert batch["stats"]["distinct_pages"] == 2 and batch["stats"]["scrapes_saved"] == 1
+
+    extracted = {(e["run_id"], e["url"]): e["product"]["suspicion_score"] for e in events if e["type"] == PRODUCT_EXTRACTED}
+    assert extracted[(parfums["run_id"], "https://shop.tn/p/1")] == 9
+    assert extracted[(montres["run_id"], "https://shop.tn/p/1")] == 3
+
+
+def test_duplicate_urls_within_a_category_are_attributed_once(monkeypatch):
+    # Agent search mode does not deduplicate its results
+    pipeline = FakePipeline(
+        searches={"parfums": [[result("https://shop.tn/p/1", 0.4), result("https://SHOP.tn/p/1/#avis", 0.8)]]},
+        products={"https://shop.tn/p/1": {"product_title": "A"}},
+    )
+    batch, events = run(monkeypatch, pipeline, ["parfums"], max_attempts=1)
+
+    # Crawled once, from the better-ranked of the two results
+    assert pipeline.scraped == ["https://SHOP.tn/p/1/#avis"]
+    assert batch["runs"][0]["products_count"] == 1
+    assert batch["runs"][0]["search_results"] == 1
+    assert len([e for e in events if e["type"] == PRODUCT_EXTRACTED]) == 1
+
+
+def test_category_without_products_is_retried_with_a_wider_search(monkeypatch):
+    pipeline = FakePipeline(
+        searches={
+            "parfums": [[result("https://shop.tn/p/1")]],
+            "montres": [[result("https://shop.tn/broken")], [result("https://shop.tn/w/2")]],
+        },
+        products={"https://shop.tn/p/1": {"product_title": "A"}, "https://shop.tn/w/2": {"product_title": "W"}},
+    )
+    batch, _ = run(monkeypatch, pipeline, ["parfums", "montres"], max_attempts=2)
+
+    assert [r["success"] for r in batch["runs"]] == [True, True]
+    assert pipeline.widened == {"parfums": [False], "montres": [False, True]}
+    # The failed page is retried alongside the new one; the category that succeeded is not searched again
+    assert pipeline.scraped == ["https://shop.tn/p/1", "https://shop.tn/broken", "https://shop.tn/broken", "https://shop.tn/w/2"]
+
+
+def test_category_failing_every_attempt_is_reported_without_fallback(monkeypatch):
+    pipeline = FakePipeline(searches={"parfums": [[]]}, products={})
+    batch, events = run(monkeypatch, pipeline, ["parfums"], max_attempts=2)
+
+    assert batch["runs"][0]["success"] is False
+    assert batch["runs"][0]["error"] == "No search results"
+    assert pipeline.widened == {"parfums": [False, True]}
+    assert not any(e["type"] == "fallback_used" for e in events)
+
+
+def test_pruning_tokens_are_reported_to_every_category_of_a_page(monkeypatch):
+    pipeline = FakePipeline(
+        searches={"parfums": [[result("https://shop.tn/p/1")]], "montres": [[result("https://shop.tn/p/1")]]},
+        products={"https://shop.tn/p/1": {"product_title": "A"}},
+    )
+    batch, events = run(monkeypatch, pipeline, ["parfums", "montres"], max_attempts=1)
+
+    for record in batch["runs"]:
+        assert (record["page_tokens"], record["extraction_input_tokens"]) == (1000, 200)
+    assert len([e for e in events if e["type"] == PAGE_PRUNED]) == 2
+
+
+@pytest.mark.parametrize("scores, expected", [((0.2, 0.7), 0.7), ((0.7, 0.2), 0.7)])
+def test_page_union_keeps_the_best_result_per_run(scores, expected):
+    union = batch_runner._PageUnion()
+    category_run = batch_runner._CategoryRun.__new__(batch_runner._CategoryRun)
+    category_run.found = {}
+    added = union.add(category_run, [result("https://shop.tn/p/1", scores[0]), result("https://shop.tn/p/1#top", scores[1])])
+
+    assert len(added) == 1
+    assert list(category_run.found.values())[0]["score"] == expected
+    assert union.runs("https://shop.tn/p/1") == [category_run]
@@ -0,0 +1,97 @@
+# Developed by Montassar Bellah Abdallah
+
+import json
+import os
+
+import pytest
+
+from checkpoint import RunCheckpoint
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "run")
+
+
+def load(directory, category="parfums", excluded=("jumia.com.tn",)):
+    return RunCheckpoint.load_or_create("run-1", category, list(excluded), directory=directory)
+
+
+def started(directory):
+    """Checkpoint past its search stage, as it is when pages are scraped."""
+    checkpoint = load(directory)
+    checkpoint.complete_stage("search", {"results": []})
+    return checkpoint
+
+
+def test_completed_stages_are_resumed(directory):
+    checkpoint = load(directory)
+    checkpoint.complete_stage("queries", {"queries": ["parfum original"]})
+
+    assert load(directory).stage("queries") == {"queries": ["parfum original"]}
+    assert load(directory).stage("search") is None
+
+
+def test_url_outcomes_are_appended_to_the_log_and_replayed(directory):
+    checkpoint = started(directory)
+    checkpoint.record_url("https://shop.tn/p/1", product={"product_title": "A"})
+    checkpoint.record_url("https://shop.tn/p/2", error="Timeout")
+
+    # Recording a URL does not rewrite the checkpoint JSON
+    with open(checkpoint.path, encoding="utf-8") as f:
+        assert json.load(f)["urls"] == {}
+    with open(checkpoint.urls_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+    resumed = load(directory)
+    assert resumed.url_done("https://SHOP.tn/p/1/")
+    assert not resumed.url_done("https://shop.tn/p/2")
+    assert resumed.products() == [{"product_title": "A"}]
+
+
+def test_full_save_folds_the_log_into_the_json(directory):
+    checkpoint = started(directory)
+    checkpoint.record_url("https://shop.tn/p/1", product={"product_title": "A"})
+    checkpoint.mark_completed()
+
+    assert not os.path.exists(checkpoint.urls_path)
+    resumed = load(directory)
+    assert resumed.state["completed"] and resumed.url_done("https://shop.tn/p/1")
+
+
+def test_retried_url_keeps_its_latest_outcome(directory):
+    checkpoint = started(directory)
+    checkpoint.record_url("https://shop.tn/p/1", error="Timeout")
+    checkpoint.record_url("https://shop.tn/p/1", product={"product_title": "A"})
+
+    assert load(directory).url_done("https://shop.tn/p/1")
+
+
+def test_line_cut_short_by_a_crash_is_ignored(directory):
+    checkpoint = started(directory)
+    checkpoint.record_url("https://shop.tn/p/1", product={"product_title": "A"})
+    with open(checkpoint.urls_path, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://shop.tn/p/2", "sta')
+
+    resumed = load(directory)
+    assert resumed.url_done("https://shop.tn/p/1")
+    assert not resumed.url_done("https://shop.tn/p/2")
+
+
+def test_checkpoint_of_other_inputs_is_not_resumed(directory):
+    checkpoint = started(directory)
+    checkpoint.record_url("https://shop.tn/p/1", product={"product_title": "A"})
+
+    other = load(directory, category="montres")
+    assert other.stage("search") is None
+    assert not other.url_done("https://shop.tn/p/1")
+    assert not os.path.exists(other.urls_path)
+
+
+def test_unreadable_checkpoint_starts_over(directory):
+    checkpoint = load(directory)
+    os.makedirs(directory, exist_ok=True)
+    with open(checkpoint.path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+
+    assert load(directory).stage("queries") is None
@@ -0,0 +1,80 @@
+# Developed by Montassar Bellah Abdallah
+
+import sys
+import time
+import types
+
+import pytest
+
+from monitor import Monitor
+from monitor_store import MonitorStore
+
+
+class FakePageCache:
+    """Page cache whose snapshots of `unchanged` URLs revalidate as not modified."""
+
+    def __init__(self, unchanged=()):
+        self.unchanged = set(unchanged)
+        self.revalidated = []
+
+    def get(self, url):
+        return {"html": "<html></html>"}
+
+    def revalidate(self, url, snapshot):
+        self.revalidated.append(url)
+        return url in self.unchanged
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MonitorStore(str(tmp_path / "monitor.sqlite3"))
+
+
+def install_page_cache(monkeypatch, page_cache):
+    module = types.ModuleType("web_scraping_agent.tools.page_cache")
+    module.page_cache = page_cache
+    monkeypatch.setitem(sys.modules, "web_scraping_agent.tools.page_cache", module)
+
+
+def age(store, category, url, seconds):
+    """Pretend the page was last checked `seconds` ago."""
+    with store._connect() as conn:
+        conn.execute("UPDATE seen_urls SET last_checked = ? WHERE category = ? AND url = ?",
+                     (time.time() - seconds, store._category_key(category), url))
+
+
+def test_filter_keeps_new_changed_and_failed_pages(store, monkeypatch):
+    page_cache = FakePageCache(unchanged={"https://a.tn/failed"})
+    install_page_cache(monkeypatch, page_cache)
+    store.record("parfums", "https://a.tn/seen", "Parfum A", "sha-a")
+    store.record("parfums", "https://a.tn/retitled", "Old title", "sha-b")
+    store.record("parfums", "https://a.tn/failed", "Parfum C", failed=True)
+    # Failed long ago and its cached crawl would revalidate: it must still be retried
+    age(store, "parfums", "https://a.tn/failed", 100 * 3600)
+
+    results = [
+        {"url": "https://a.tn/new", "title": "Parfum N"},
+        {"url": "https://a.tn/seen", "title": "Parfum A"},
+        {"url": "https://a.tn/retitled", "title": "New title"},
+        {"url": "https://a.tn/failed", "title": "Parfum C"},
+    ]
+    kept = Monitor([], store=store, recheck_hours=72).url_filter("parfums")(results)
+
+    assert [r["url"] for r in kept] == ["https://a.tn/new", "https://a.tn/retitled", "https://a.tn/failed"]
+    assert page_cache.revalidated == []
+
+
+def test_filter_skips_revalidated_pages_and_rescrapes_modified_ones(store, monkeypatch):
+    page_cache = FakePageCache(unchanged={"https://a.tn/same"})
+    install_page_cache(monkeypatch, page_cache)
+    for url in ("https://a.tn/same", "https://a.tn/modified"):
+        store.record("parfums", url, "Parfum", "sha")
+        age(store, "parfums", url, 100 * 3600)
+
+    results = [{"url": "https://a.tn/same", "title": "Parfum"}, {"url": "https://a.tn/modified", "title": "Parfum"}]
+    kept = Monitor([], store=store, recheck_hours=72).url_filter("parfums")(results)
+
+    assert [r["url"] for r in kept] == ["https://a.tn/modified"]
+    assert sorted(page_cache.revalidated) == ["https://a.tn/modified", "https://a.tn/same"]
+    # The revalidated page counts as checked now
+    assert time.time() - store.seen("parfums", ["https://a.tn/same"])["https://a.tn/same"]["last_checked"] < 60
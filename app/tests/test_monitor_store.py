@@ -0,0 +1,74 @@
+# Developed by Montassar Bellah Abdallah
+
+import time
+
+import pytest
+
+from monitor_store import MonitorStore, NEW, CHANGED, UNCHANGED, FAILED
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MonitorStore(str(tmp_path / "monitor" / "monitor.sqlite3"))
+
+
+def test_record_reports_the_listing_state(store):
+    assert store.record("parfums", "https://a.tn/p", "Parfum", "sha-1") == NEW
+    assert store.record("parfums", "https://a.tn/p", "Parfum", "sha-1") == UNCHANGED
+    assert store.record("parfums", "https://a.tn/p", "Parfum", "sha-2") == CHANGED
+    assert store.record("parfums", "https://a.tn/p", "Parfum (promo)", "sha-2") == CHANGED
+
+
+def test_failed_page_is_new_once_it_scrapes(store):
+    assert store.record("parfums", "https://a.tn/p", "Parfum", failed=True) == FAILED
+    assert store.record("parfums", "https://a.tn/p", "Parfum", "sha-1") == NEW
+
+
+def test_failure_keeps_the_last_known_content_hash(store):
+    store.record("parfums", "https://a.tn/p", "Parfum", "sha-1")
+    store.record("parfums", "https://a.tn/p", failed=True)
+
+    row = store.seen("parfums", ["https://a.tn/p"])["https://a.tn/p"]
+    assert (row["status"], row["title"], row["content_sha256"]) == (FAILED, "Parfum", "sha-1")
+
+
+def test_urls_are_keyed_by_normalized_url_per_category(store):
+    store.record("Parfums ", "https://A.tn/p/?utm_source=x", "Parfum")
+
+    assert list(store.seen("parfums", ["https://a.tn/p"])) == ["https://a.tn/p"]
+    assert store.seen("montres", ["https://a.tn/p"]) == {}
+
+
+def test_seen_handles_more_urls_than_the_parameter_limit(store):
+    urls = [f"https://a.tn/p/{index}" for index in range(1200)]
+    for url in urls[::100]:
+        store.record("parfums", url, "Parfum")
+
+    assert len(store.seen("parfums", urls)) == 12
+
+
+def test_touch_only_updates_last_checked_when_revalidated(store):
+    store.record("parfums", "https://a.tn/p", "Parfum")
+    with store._connect() as conn:
+        conn.execute("UPDATE seen_urls SET last_seen = 0, last_checked = 0")
+
+    store.touch("parfums", ["https://a.tn/p"])
+    row = store.seen("parfums", ["https://a.tn/p"])["https://a.tn/p"]
+    assert row["last_seen"] > 0 and row["last_checked"] == 0
+
+    store.touch("parfums", ["https://a.tn/p"], checked=True)
+    assert store.seen("parfums", ["https://a.tn/p"])["https://a.tn/p"]["last_checked"] > 0
+
+
+def test_last_run_and_stats(store):
+    assert store.last_run("parfums") is None
+    store.record_run("parfums", "run-1", "ok", started_at=1000.0)
+    store.record_run("Parfums", "run-2", "failed")
+
+    last_run, run_id, status = store.last_run("parfums")
+    assert (run_id, status) == ("run-2", "failed") and time.time() - last_run < 60
+
+    store.record("parfums", "https://a.tn/1", "A")
+    store.record("parfums", "https://a.tn/2", "B")
+    store.record("parfums", "https://a.tn/3", "C", failed=True)
+    assert store.stats("parfums") == {NEW: 2, FAILED: 1}
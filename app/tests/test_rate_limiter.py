@@ -0,0 +1,111 @@
+# Developed by Montassar Bellah Abdallah
+
+import threading
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RequestBudget, TokenBucketRateLimiter, estimate_tokens, limit_llm_calls
+
+
+class FakeClock:
+    """Replaces time.monotonic and time.sleep in rate_limiter; sleeping advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("x" * 40) == 10
+    assert estimate_tokens([{"role": "user", "content": "x" * 40}, "y" * 8]) == 12
+
+
+def test_acquire_is_free_below_the_request_limit(clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=3)
+    assert [limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert clock.slept == []
+
+
+def test_acquire_waits_for_the_next_request_slot(clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=60)
+    for _ in range(60):
+        limiter.acquire()
+    assert limiter.acquire() == pytest.approx(1.0)
+
+
+def test_acquire_waits_for_tokens(clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=100, tokens_per_minute=600)
+    assert limiter.acquire(600) == 0.0
+    # 300 tokens refill in 30 seconds
+    assert limiter.acquire(300) == pytest.approx(30.0)
+
+
+def test_call_larger_than_the_bucket_only_waits_for_a_full_bucket(clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=100, tokens_per_minute=600)
+    limiter.acquire(600)
+    assert limiter.acquire(10_000) == pytest.approx(60.0)
+
+
+def test_zero_requests_per_minute_disables_limiting(clock):
+    limiter = TokenBucketRateLimiter(requests_per_minute=0)
+    assert all(limiter.acquire(10_000) == 0.0 for _ in range(100))
+
+
+def test_limit_llm_calls_acquires_before_each_call(clock):
+    class LLM:
+        def call(self, messages, **kwargs):
+            return "answer"
+
+    acquired = []
+    limiter = TokenBucketRateLimiter(requests_per_minute=10, tokens_per_minute=1000)
+    limiter.acquire = lambda tokens=0: acquired.append(tokens) or 0.0
+    llm = limit_llm_calls(LLM(), limiter)
+
+    assert llm.call([{"role": "user", "content": "x" * 400}]) == "answer"
+    assert acquired == [100]
+
+
+def test_request_budget_grants_what_is_left():
+    budget = RequestBudget(total=5)
+    assert budget.take(3) == 3
+    assert budget.take(3) == 2
+    assert budget.take(1) == 0
+    assert budget.remaining == 0
+
+
+def test_unlimited_request_budget():
+    budget = RequestBudget(total=0)
+    assert budget.take(1000) == 1000
+    assert budget.remaining is None
+
+
+def test_request_budget_is_shared_between_threads():
+    budget = RequestBudget(total=100)
+    granted = []
+
+    def take():
+        granted.extend(budget.take(1) for _ in range(30))
+
+    threads = [threading.Thread(target=take) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(granted) == 100 and budget.used == 100
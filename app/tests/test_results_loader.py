@@ -0,0 +1,89 @@
+# Developed by Montassar Bellah Abdallah
+
+import json
+import os
+
+import pytest
+
+import results_loader
+from results_loader import ResultsUnavailable, load_results
+
+PRODUCTS = {"products": [{"page_url": "https://a.tn/1", "suspicion_score": 7, "suspicion_reasons": ["Prix tr\\u00e8s bas"]}]}
+SEARCH = {"results": [{"url": "https://a.tn/1", "score": 0.9}, {"url": "https://b.tn/2", "score": 0.456}]}
+
+
+def write(path, data):
+    path.write_text(data if isinstance(data, str) else json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def fallback_dir(tmp_path, monkeypatch):
+    path = tmp_path / "fallback"
+    path.mkdir()
+    monkeypatch.setattr(results_loader, "FALLBACK_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def run_files(tmp_path):
+    return write(tmp_path / "products.json", PRODUCTS), write(tmp_path / "search.json", SEARCH)
+
+
+def test_results_are_normalized_for_display(fallback_dir, run_files):
+    view = load_results(*run_files)
+
+    assert not view.using_fallback and view.notices == ()
+    assert view.products[0]["suspicion_score"] == 70
+    assert view.products[0]["suspicion_reasons"] == ["Prix très bas"]
+    assert view.scraped_urls == frozenset({"https://a.tn/1"})
+    assert [(r["url"], r["display_score"]) for r in view.unscraped_results] == [("https://b.tn/2", 46)]
+
+
+def test_loaded_results_are_read_only(fallback_dir, run_files):
+    view = load_results(*run_files)
+
+    with pytest.raises(TypeError):
+        view.products[0]["suspicion_score"] = 0
+    with pytest.raises(TypeError):
+        view.search_results.append({})
+    assert isinstance(view.products[0], dict) and json.dumps(view.products)
+
+
+def test_view_is_cached_until_a_file_changes(fallback_dir, run_files):
+    products_path, search_path = run_files
+    first = load_results(products_path, search_path)
+    assert load_results(products_path, search_path) is first
+
+    with open(products_path, "w", encoding="utf-8") as f:
+        json.dump({"products": []}, f)
+    stat = os.stat(products_path)
+    os.utime(products_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    changed = load_results(products_path, search_path)
+    assert changed is not first and changed.products == []
+
+
+def test_missing_run_files_use_the_fallback_data(fallback_dir, tmp_path):
+    write(fallback_dir / "step_3_scraped_products.json", PRODUCTS)
+    write(fallback_dir / "step_2_search_results.json", SEARCH)
+
+    view = load_results(str(tmp_path / "missing-products.json"), str(tmp_path / "missing-search.json"))
+
+    assert view.using_fallback and len(view.products) == 1
+    assert [level for level, _ in view.notices] == ["info", "info"]
+
+
+def test_unreadable_run_file_falls_back(fallback_dir, tmp_path):
+    write(fallback_dir / "step_3_scraped_products.json", PRODUCTS)
+    products_path = write(tmp_path / "products.json", "{not json")
+
+    view = load_results(products_path, str(tmp_path / "missing-search.json"))
+
+    assert view.using_fallback and len(view.products) == 1 and view.search_results == []
+    assert [level for level, _ in view.notices] == ["error"]
+
+
+def test_nothing_to_show(fallback_dir, tmp_path):
+    with pytest.raises(ResultsUnavailable) as error:
+        load_results(str(tmp_path / "missing-products.json"), str(tmp_path / "missing-search.json"))
+    assert error.value.level == "warning"
@@ -0,0 +1,70 @@
+# Developed by Montassar Bellah Abdallah
+
+import os
+import time
+
+import pytest
+
+import run_store
+
+
+@pytest.fixture
+def runs_dir(tmp_path, monkeypatch):
+    path = tmp_path / "runs"
+    path.mkdir()
+    monkeypatch.setattr(run_store, "RUNS_DIR", str(path))
+    return path
+
+
+def make_run(runs_dir, name, age_days):
+    path = runs_dir / name
+    path.mkdir()
+    (path / "step_3_scraped_products.json").write_text("{}", encoding="utf-8")
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+
+
+def remaining(runs_dir):
+    return sorted(entry.name for entry in runs_dir.iterdir())
+
+
+def test_prune_keeps_the_newest_runs(runs_dir):
+    for index in range(5):
+        make_run(runs_dir, f"run-{index}", age_days=index + 1)
+
+    removed = run_store.prune_runs(max_runs=3, max_age_days=0, grace=0)
+
+    assert sorted(removed) == ["run-3", "run-4"]
+    assert remaining(runs_dir) == ["run-0", "run-1", "run-2"]
+
+
+def test_prune_removes_expired_runs(runs_dir):
+    make_run(runs_dir, "recent", age_days=1)
+    make_run(runs_dir, "old", age_days=40)
+
+    assert run_store.prune_runs(max_runs=0, max_age_days=30, grace=0) == ["old"]
+    assert remaining(runs_dir) == ["recent"]
+
+
+def test_prune_spares_kept_and_in_progress_runs(runs_dir):
+    make_run(runs_dir, "kept", age_days=40)
+    make_run(runs_dir, "in-progress", age_days=0)
+    make_run(runs_dir, "old", age_days=40)
+    (runs_dir / ".tmp").mkdir()
+
+    removed = run_store.prune_runs(max_runs=1, max_age_days=30, keep={"kept"}, grace=3600)
+
+    assert removed == ["old"]
+    assert remaining(runs_dir) == [".tmp", "in-progress", "kept"]
+
+
+def test_prune_without_runs_directory(runs_dir, monkeypatch):
+    monkeypatch.setattr(run_store, "RUNS_DIR", str(runs_dir / "missing"))
+    assert run_store.prune_runs() == []
+
+
+@pytest.mark.parametrize("run_id", ["", "../x", "a/b", ".hidden"])
+def test_invalid_run_ids_are_rejected(run_id):
+    with pytest.raises(ValueError):
+        run_store.run_dir(run_id)
+    assert not run_store.run_exists(run_id)
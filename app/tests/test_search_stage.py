@@ -0,0 +1,74 @@
+# Developed by Montassar Bellah Abdallah
+
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("requests")
+
+from search_agent import search_stage
+from search_agent.search_stage import SearchResultFilter, run_search_stage
+
+
+def result(url, score=0.5):
+    return {"url": url, "title": url, "score": score, "search_query": "q"}
+
+
+@pytest.mark.parametrize("url, accepted", [
+    ("https://shop.tn/p/1", True),
+    ("https://www.mega.tn/p/1", False),          # Price comparator
+    ("https://jumia.com.tn/p/1", False),         # Excluded platform
+    ("https://promo.jumia.com.tn/p/1", False),   # Subdomain of an excluded platform
+    ("https://notjumia.com.tn/p/1", True),
+    ("https://shop.com/p/1", False),             # Outside the search TLD
+    ("not a url", False),
+])
+def test_filter_rules(url, accepted):
+    result_filter = SearchResultFilter(["https://www.jumia.com.tn/"], score_th=0.3, comparator_domains=["mega.tn"])
+    assert result_filter.accepts(result(url)) is accepted
+
+
+def test_filter_applies_the_score_threshold():
+    result_filter = SearchResultFilter([], score_th=0.3, comparator_domains=[])
+    assert result_filter.accepts(result("https://shop.tn/p/1", 0.3))
+    assert not result_filter.accepts(result("https://shop.tn/p/1", 0.2))
+
+
+class FakeSerperClient:
+    def __init__(self, responses: dict):
+        self.responses = responses
+        self.searches = []
+
+    def search_many(self, searches, budget=None):
+        self.searches.extend(searches)
+        return [self.responses.get(search, {}) for search in searches]
+
+
+def organic(*links):
+    return {"organic": [{"title": link, "link": link} for link in links]}
+
+
+def test_search_stage_keeps_the_best_distinct_pages(monkeypatch):
+    client = FakeSerperClient({
+        ("parfum", 1): organic("https://a.tn/1", "https://b.tn/2", "https://jumia.com.tn/3"),
+        ("parfum original", 1): organic("https://b.tn/2/", "https://c.tn/4"),
+    })
+    monkeypatch.setattr(search_stage, "get_serper_client", lambda: client)
+
+    search_results = run_search_stage(["parfum", "parfum original"], ["jumia.com.tn"], 0.0, max_search_results=2)
+
+    # b.tn/2 is ranked by its best position (first result of the second query)
+    assert [(r.url, r.score) for r in search_results.results] == [("https://a.tn/1", 1.0), ("https://b.tn/2/", 1.0)]
+
+
+def test_search_stage_reads_deeper_pages_and_applies_the_url_filter(monkeypatch):
+    client = FakeSerperClient({
+        ("parfum", 1): organic("https://a.tn/1"),
+        ("parfum", 2): organic("https://b.tn/2"),
+    })
+    monkeypatch.setattr(search_stage, "get_serper_client", lambda: client)
+
+    search_results = run_search_stage(["parfum"], [], 0.0, max_search_results=5, pages=2,
+                                      url_filter=lambda results: [r for r in results if "a.tn" not in r["url"]])
+
+    assert client.searches == [("parfum", 1), ("parfum", 2)]
+    assert [r.url for r in search_results.results] == ["https://b.tn/2"]
@@ -0,0 +1,43 @@
+# Developed by Montassar Bellah Abdallah
+
+import pytest
+
+from url_utils import normalize_url, registrable_domain, website_domain
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Shop.TN/p/1/", "https://shop.tn/p/1"),
+    ("https://shop.tn:443/p/1", "https://shop.tn/p/1"),
+    ("http://shop.tn:80/", "http://shop.tn/"),
+    ("https://shop.tn:8443/p/1", "https://shop.tn:8443/p/1"),
+    ("https://shop.tn/p/1#avis", "https://shop.tn/p/1"),
+    ("https://shop.tn/p?b=2&utm_source=x&a=1&gclid=y", "https://shop.tn/p?a=1&b=2"),
+    ("", ""),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+@pytest.mark.parametrize("url", ["http://example.com:99999/x", "http://example.com:abc/x"])
+def test_normalize_url_drops_an_invalid_port(url):
+    assert normalize_url(url) == "http://example.com/x"
+
+
+@pytest.mark.parametrize("website, expected", [
+    ("https://www.Shop.tn/x", "shop.tn"),
+    ("www.shop.tn", "shop.tn"),
+    ("shop.tn.", "shop.tn"),
+    ("", ""),
+])
+def test_website_domain(website, expected):
+    assert website_domain(website) == expected
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("shop.vendor.com.tn", "vendor.com.tn"),
+    ("a.b.vendor.tn", "vendor.tn"),
+    ("vendor.tn", "vendor.tn"),
+    ("https://www.shop.co.uk/p", "shop.co.uk"),
+])
+def test_registrable_domain(host, expected):
+    assert registrable_domain(host) == expected